@@ -9,6 +9,7 @@ import time
 
 from proto import analysis_push_gateway_pb2 as pb2
 from proto import analysis_push_gateway_pb2_grpc as pb2_grpc
+from common.grpc_channels import SERVER_OPTIONS
 
 HTTP_API_ENDPOINT = os.getenv("HTTP_API_ENDPOINT")
 
@@ -60,7 +61,7 @@ def serve():
     if (HTTP_API_ENDPOINT is None) :
         print("No HTTP_API_ENDPOINT")
         sys.exit(1)
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=50))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=50), options=SERVER_OPTIONS)
     pb2_grpc.add_AnalysisPushGatewayServicer_to_server(AnalysisPushGatewayServicer(), server)
     server.add_insecure_port('[::]:50053')
     print("gRPC Server is running on port 50053")
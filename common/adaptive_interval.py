@@ -0,0 +1,33 @@
+class AdaptiveInterval:
+    """Poll interval that follows the arrival rate of new items.
+
+    The rate is an exponentially weighted average of items per second over recent
+    polls; the next interval is the time expected for items_per_poll new items to
+    arrive, kept within [min_interval, max_interval]. Quiet periods back off to
+    max_interval, bursts poll at min_interval.
+    """
+    def __init__(
+            self,
+            min_interval: float,
+            max_interval: float,
+            items_per_poll: float = 1,
+            smoothing: float = 0.3):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError(f"Invalid interval bounds [{min_interval}, {max_interval}]")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.items_per_poll = items_per_poll
+        self.smoothing = smoothing
+        self.rate = 0.0 # items per second
+        self.interval = min_interval
+
+    def update(self, new_items: int, elapsed: float) -> float:
+        """Record a poll that found new_items in elapsed seconds, returns the next interval"""
+        if elapsed > 0:
+            self.rate += self.smoothing * (new_items / elapsed - self.rate)
+        if self.rate <= 0:
+            self.interval = self.max_interval
+        else:
+            self.interval = self.items_per_poll / self.rate
+        self.interval = min(self.max_interval, max(self.min_interval, self.interval))
+        return self.interval
@@ -0,0 +1,72 @@
+from typing import Any, Dict, List, NotRequired, TypedDict
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from selenium.webdriver import Remote as RemoteWebDriver
+
+# Runs in the page: reads every field of every card in one pass and returns them all,
+# Selenium sends the array back as JSON in a single response.
+CARD_SCRIPT = """
+const [cardSelector, fields] = arguments;
+return Array.from(document.querySelectorAll(cardSelector), (card, index) => {
+    const values = {index: index};
+    for (const [name, field] of Object.entries(fields)) {
+        const node = field.selector ? card.querySelector(field.selector) : card;
+        let value = null;
+        if (node !== null) {
+            if (field.attribute) {
+                // like WebElement.get_attribute: the property (resolved href) first, then the attribute
+                value = node[field.attribute];
+                if (value === undefined || value === null || typeof value === "object") {
+                    value = node.getAttribute(field.attribute);
+                }
+            } else {
+                value = node.innerText;
+            }
+        }
+        values[name] = value === null || value === undefined ? null : String(value).trim();
+    }
+    return values;
+});
+"""
+
+class CardField(TypedDict):
+    selector: NotRequired[str]      # CSS selector inside the card, the card itself by default
+    attribute: NotRequired[str]     # property or attribute to read, the visible text by default
+
+def extract_cards(
+        driver: RemoteWebDriver,
+        card_selector: str,
+        fields: Dict[str, CardField]) -> List[Dict[str, Any]]:
+    """Fields of every card matching card_selector, in page order, read with one WebDriver
+    round trip instead of one per element and attribute. Each card also has its index;
+    fields whose node is missing are None."""
+    return driver.execute_script(CARD_SCRIPT, card_selector, fields) or []
+
+def extract_cards_from_html(
+        html: str,
+        card_selector: str,
+        fields: Dict[str, CardField],
+        base_url: str = "") -> List[Dict[str, Any]]:
+    """CARD_SCRIPT evaluated on saved markup instead of a live page. href and src are
+    resolved against base_url like their properties are; text is the text content of
+    the node, which is close to but not exactly innerText."""
+    soup = BeautifulSoup(html, "html.parser")
+    cards = []
+    for index, card in enumerate(soup.select(card_selector)):
+        values: Dict[str, Any] = {"index": index}
+        for name, field in fields.items():
+            node = card.select_one(field["selector"]) if field.get("selector") else card
+            value = None
+            if node is not None:
+                attribute = field.get("attribute")
+                if attribute:
+                    value = node.get(attribute)
+                    if isinstance(value, list):
+                        value = " ".join(value)
+                    if value is not None and attribute in ("href", "src"):
+                        value = urljoin(base_url, value)
+                else:
+                    value = node.get_text()
+            values[name] = None if value is None else str(value).strip()
+        cards.append(values)
+    return cards
@@ -0,0 +1,138 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+import aio_pika
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD_ENCODING = "zstd"
+SCHEMA_VERSION_HEADER = "x-schema-version"
+COMPRESS_MIN_SIZE = 1024 # bytes, smaller bodies are not worth a zstd frame
+
+class Codec(ABC):
+    content_type: str = ""
+
+    @abstractmethod
+    def encode(self, obj: Any) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, data: bytes) -> Any:
+        pass
+
+class JsonCodec(Codec):
+    content_type = "application/json"
+
+    def encode(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+class OrjsonCodec(Codec):
+    """Same wire format as JsonCodec, faster encode/decode"""
+    content_type = "application/json"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+
+    def encode(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def decode(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+class MsgpackCodec(Codec):
+    content_type = "application/msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("msgpack is not installed")
+
+    def encode(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def decode(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+class CodecRegistry:
+    """Picks a codec by the message content type, messages without one use the default codec"""
+    def __init__(self, default: Codec):
+        self.default = default
+        self.codecs: Dict[str, Codec] = {default.content_type: default}
+
+    def register(self, codec: Codec):
+        self.codecs[codec.content_type] = codec
+        return self
+
+    def get(self, content_type: Optional[str] = None) -> Codec:
+        if not content_type:
+            return self.default
+        codec = self.codecs.get(content_type.split(";")[0].strip().lower())
+        if codec is None:
+            raise ValueError(f"No codec registered for content type {content_type}")
+        return codec
+
+    def decode(self, data: bytes, content_type: Optional[str] = None, content_encoding: Optional[str] = None) -> Any:
+        return self.get(content_type).decode(decompress(data, content_encoding))
+
+def compress(data: bytes, min_size: int = COMPRESS_MIN_SIZE) -> Tuple[bytes, Optional[str]]:
+    """zstd compress data of at least min_size bytes.
+    Returns the data and its content encoding (None when left uncompressed)."""
+    if zstandard is None:
+        raise ImportError("zstandard is not installed")
+    if len(data) < min_size:
+        return data, None
+    return zstandard.ZstdCompressor().compress(data), ZSTD_ENCODING
+
+def decompress(data: bytes, content_encoding: Optional[str] = None) -> bytes:
+    if not content_encoding or content_encoding == "identity":
+        return data
+    if content_encoding != ZSTD_ENCODING:
+        raise ValueError(f"Unsupported content encoding {content_encoding}")
+    if zstandard is None:
+        raise ImportError("zstandard is not installed")
+    return zstandard.ZstdDecompressor().decompress(data)
+
+def encode_message(
+        obj: Any,
+        codec: Codec,
+        compressed: bool = False,
+        schema_version: Optional[int] = None,
+        **properties) -> aio_pika.Message:
+    """AMQP message of obj encoded with codec, with the content type, content encoding and
+    schema version consumers need to decode it"""
+    body, content_encoding = compress(codec.encode(obj)) if compressed else (codec.encode(obj), None)
+    headers = dict(properties.pop("headers", None) or {})
+    if schema_version is not None:
+        headers[SCHEMA_VERSION_HEADER] = schema_version
+    return aio_pika.Message(
+        body=body,
+        content_type=codec.content_type,
+        content_encoding=content_encoding,
+        headers=headers,
+        **properties)
+
+def decode_message(message: aio_pika.abc.AbstractMessage, codecs: CodecRegistry) -> Any:
+    return codecs.decode(message.body, message.content_type, message.content_encoding)
+
+def default_codecs() -> CodecRegistry:
+    """JSON (orjson when installed) as the default, plus msgpack when installed"""
+    registry = CodecRegistry(OrjsonCodec() if orjson is not None else JsonCodec())
+    if msgpack is not None:
+        registry.register(MsgpackCodec())
+    return registry
@@ -0,0 +1,167 @@
+import os
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from cachetools import TTLCache
+
+DEFAULT_DEDUP_TTL = 7 * 24 * 3600 # seconds
+DEFAULT_LEASE = 300 # seconds a reserved key stays claimed, a crashed fetch frees it after that
+TRACKING_PREFIXES = ("utm_",)
+TRACKING_PARAMS = {"fbclid", "gclid", "ref", "mc_cid", "mc_eid"}
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+def normalize_url(url: str) -> str:
+    """Canonical form of an article URL: lowercase scheme and host, no fragment,
+    no tracking parameters, sorted query and no trailing slash"""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not is_tracking_param(k))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+class DedupStore(ABC):
+    """Set of keys already processed, entries expire after ttl seconds"""
+    @abstractmethod
+    def seen(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def add(self, key: str):
+        pass
+
+    @abstractmethod
+    def reserve(self, key: str) -> bool:
+        """Claim key for processing unless it was processed or is claimed, in one step:
+        True if this caller claimed it. The claim is a lease, not an entry; add() makes
+        the entry once processing succeeded."""
+        pass
+
+    @abstractmethod
+    def release(self, key: str):
+        """Drop the claim on a key whose processing failed"""
+        pass
+
+    def close(self):
+        pass
+
+class MemoryDedupStore(DedupStore):
+    def __init__(self, maxsize: int, ttl: float = DEFAULT_DEDUP_TTL, lease: float = DEFAULT_LEASE):
+        self.keys = TTLCache(maxsize, ttl)
+        self.pending = TTLCache(maxsize, lease)
+        self.lock = threading.Lock()
+
+    def seen(self, key: str) -> bool:
+        with self.lock:
+            return key in self.keys
+
+    def add(self, key: str):
+        with self.lock:
+            self.keys[key] = True
+            self.pending.pop(key, None)
+
+    def reserve(self, key: str) -> bool:
+        with self.lock:
+            if key in self.keys or key in self.pending:
+                return False
+            self.pending[key] = True
+            return True
+
+    def release(self, key: str):
+        with self.lock:
+            self.pending.pop(key, None)
+
+class SqliteDedupStore(DedupStore):
+    """Durable store in a SQLite file, survives restarts. Processes on one node can
+    share the file, WAL mode lets them read while one writes. WAL needs a local
+    filesystem: replicas on different nodes, or on a network volume, need a file each.
+    Claims are leases in their own table, a fetch that dies holding one only delays
+    the key by the lease."""
+    EVICT_EVERY = 1000 # adds
+
+    def __init__(self, path: str, ttl: float = DEFAULT_DEDUP_TTL, lease: float = DEFAULT_LEASE):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl = ttl
+        self.lease = lease
+        self.lock = threading.Lock()
+        self.adds = 0
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen_keys (key TEXT PRIMARY KEY, seen_at REAL NOT NULL) WITHOUT ROWID")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS pending_keys (key TEXT PRIMARY KEY, lease_until REAL NOT NULL) WITHOUT ROWID")
+        self.evict()
+
+    def seen(self, key: str) -> bool:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM seen_keys WHERE key = ? AND seen_at >= ?",
+                (key, time.time() - self.ttl)).fetchone()
+        return row is not None
+
+    def add(self, key: str):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    "INSERT INTO seen_keys (key, seen_at) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET seen_at = excluded.seen_at",
+                    (key, time.time()))
+                self.conn.execute("DELETE FROM pending_keys WHERE key = ?", (key,))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.adds += 1
+        if self.adds % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def reserve(self, key: str) -> bool:
+        now = time.time()
+        with self.lock:
+            # the write lock is taken up front, so two processes cannot both claim a key
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                seen = self.conn.execute(
+                    "SELECT 1 FROM seen_keys WHERE key = ? AND seen_at >= ?", (key, now - self.ttl)).fetchone()
+                # an expired lease counts as absent
+                reserved = seen is None and self.conn.execute(
+                    "INSERT INTO pending_keys (key, lease_until) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET lease_until = excluded.lease_until "
+                    "WHERE pending_keys.lease_until < ?",
+                    (key, now + self.lease, now)).rowcount > 0
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return reserved
+
+    def release(self, key: str):
+        with self.lock:
+            self.conn.execute("DELETE FROM pending_keys WHERE key = ?", (key,))
+
+    def evict(self) -> int:
+        now = time.time()
+        with self.lock:
+            self.conn.execute("DELETE FROM pending_keys WHERE lease_until < ?", (now,))
+            return self.conn.execute(
+                "DELETE FROM seen_keys WHERE seen_at < ?", (now - self.ttl,)).rowcount
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def dedup_store_from_env(maxsize: int) -> DedupStore:
+    """SqliteDedupStore at DEDUP_STORE_PATH if set, otherwise an in-memory store"""
+    ttl = float(os.getenv("DEDUP_TTL_SECONDS", str(DEFAULT_DEDUP_TTL)))
+    path: Optional[str] = os.getenv("DEDUP_STORE_PATH")
+    if path:
+        return SqliteDedupStore(path, ttl)
+    return MemoryDedupStore(maxsize, ttl)
@@ -0,0 +1,105 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+from selenium.webdriver import Remote as RemoteWebDriver
+from common.logger import SingletonLoggerSafe
+
+class DriverPool:
+    """A bounded set of Selenium Grid sessions leased to worker threads.
+
+    Sessions are created on demand up to size, prepared once (e.g. login cookies
+    copied in) and checked before each lease; a session that fails the check or is
+    returned broken is quit and replaced by a fresh one.
+    """
+    def __init__(
+            self,
+            factory: Callable[[], RemoteWebDriver],
+            size: int,
+            prepare: Optional[Callable[[RemoteWebDriver], None]] = None):
+        if size < 1:
+            raise ValueError(f"size must be at least 1, got {size}")
+        self.factory = factory
+        self.size = size
+        self.prepare = prepare
+        self.idle: "queue.Queue[RemoteWebDriver]" = queue.Queue()
+        self.sessions: List[RemoteWebDriver] = []
+        self.lock = threading.Lock()
+
+    def _new_session(self) -> RemoteWebDriver:
+        driver = self.factory()
+        try:
+            if self.prepare is not None:
+                self.prepare(driver)
+        except Exception as e:
+            self._quit(driver)
+            raise e
+        return driver
+
+    @staticmethod
+    def healthy(driver: RemoteWebDriver) -> bool:
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _quit(self, driver: RemoteWebDriver):
+        with self.lock:
+            if driver in self.sessions:
+                self.sessions.remove(driver)
+        try:
+            driver.quit()
+        except Exception as e:
+            SingletonLoggerSafe.error(f"Failed to quit browser session: {e}")
+
+    def _acquire(self, timeout: Optional[float]) -> RemoteWebDriver:
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            grow = len(self.sessions) < self.size
+            if grow:
+                self.sessions.append(None) # reserve the slot
+        if not grow:
+            return self.idle.get(timeout=timeout)
+        try:
+            driver = self._new_session()
+        except Exception as e:
+            with self.lock:
+                self.sessions.remove(None)
+            raise e
+        with self.lock:
+            self.sessions[self.sessions.index(None)] = driver
+        SingletonLoggerSafe.info(f"Browser session {len(self.sessions)}/{self.size} started")
+        return driver
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """Borrow a healthy session; if the block raises and the session is broken, it is replaced"""
+        driver = self._acquire(timeout)
+        if not self.healthy(driver):
+            SingletonLoggerSafe.error("Browser session unhealthy, replacing it")
+            self._quit(driver)
+            driver = self._acquire(timeout)
+        try:
+            yield driver
+        except Exception as e:
+            if not self.healthy(driver):
+                self._quit(driver)
+                driver = None
+            raise e
+        finally:
+            if driver is not None:
+                self.idle.put(driver)
+
+    def close(self):
+        with self.lock:
+            sessions, self.sessions = [d for d in self.sessions if d is not None], []
+        while not self.idle.empty():
+            self.idle.get_nowait()
+        for driver in sessions:
+            try:
+                driver.quit()
+            except Exception as e:
+                SingletonLoggerSafe.error(f"Failed to quit browser session: {e}")
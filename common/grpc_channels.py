@@ -0,0 +1,118 @@
+import json
+import asyncio
+import threading
+import weakref
+from typing import Dict, List, Optional
+import grpc
+
+KEEPALIVE_TIME_MS = 30_000
+KEEPALIVE_TIMEOUT_MS = 10_000
+MAX_MESSAGE_LENGTH = 16 * 1024 * 1024
+
+# default deadline of every method called from python, in seconds
+METHOD_TIMEOUTS = {
+    ("trading_executor.TradeExecutor", "ExecuteTrade"): 30,
+    ("analysispush.AnalysisPushGateway", "Push"): 600,
+    ("stock_hub.StockQuote", "GetQuote"): 10,
+}
+# only calls that are safe to repeat are retried, a retried TradeExecutor.ExecuteTrade could
+# trade twice. The gateway never answers UNAVAILABLE itself, a retried Push is one that did
+# not reach it.
+IDEMPOTENT_METHODS = [
+    {"service": "analysispush.AnalysisPushGateway", "method": "Push"},
+    {"service": "stock_hub.StockQuote", "method": "GetQuote"},
+]
+# accept the keepalive pings of clients using channel_options
+SERVER_OPTIONS = [
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.min_recv_ping_interval_without_data_ms", 15000),
+]
+
+def service_config(retry_methods: List[dict] = IDEMPOTENT_METHODS, max_attempts: int = 4) -> str:
+    """Round robin over all resolved addresses, a default deadline per method and retries
+    of UNAVAILABLE calls for retry_methods. A timeout passed by the caller takes precedence."""
+    config = {"loadBalancingConfig": [{"round_robin": {}}]}
+    retried = {(name["service"], name["method"]) for name in retry_methods}
+    method_config = []
+    for (service, method), timeout in METHOD_TIMEOUTS.items():
+        entry = {"name": [{"service": service, "method": method}], "timeout": f"{timeout}s"}
+        if (service, method) in retried:
+            entry["retryPolicy"] = {
+                "maxAttempts": max_attempts,
+                "initialBackoff": "0.2s",
+                "maxBackoff": "5s",
+                "backoffMultiplier": 2,
+                "retryableStatusCodes": ["UNAVAILABLE"],
+            }
+        method_config.append(entry)
+    config["methodConfig"] = method_config
+    return json.dumps(config)
+
+def channel_options() -> list:
+    return [
+        ("grpc.keepalive_time_ms", KEEPALIVE_TIME_MS),
+        ("grpc.keepalive_timeout_ms", KEEPALIVE_TIMEOUT_MS),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+        ("grpc.max_send_message_length", MAX_MESSAGE_LENGTH),
+        ("grpc.max_receive_message_length", MAX_MESSAGE_LENGTH),
+        ("grpc.enable_retries", 1),
+        ("grpc.service_config", service_config()),
+    ]
+
+def resolve_target(target: str) -> str:
+    """host:port -> dns:///host:port, so every replica behind a (headless) service
+    name is resolved and balanced over, instead of pinning the first address"""
+    if "://" in target or target.startswith(("unix:", "ipv4:", "ipv6:", "dns:")):
+        return target
+    return f"dns:///{target}"
+
+class GrpcChannelRegistry:
+    """Process-wide client channels, one per target, sync and aio. Channels are
+    thread-safe and multiplex calls, so every client of a target shares one.
+    aio channels are bound to their event loop and kept per loop."""
+    def __init__(self):
+        self.options = channel_options()
+        self.lock = threading.Lock()
+        self.channels: Dict[str, grpc.Channel] = {}
+        # aio channels by loop, then target; a closed loop's channels go with it
+        self.aio_channels: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, grpc.aio.Channel]]" = weakref.WeakKeyDictionary()
+
+    def channel(self, target: str) -> grpc.Channel:
+        target = resolve_target(target)
+        with self.lock:
+            if target not in self.channels:
+                self.channels[target] = grpc.insecure_channel(target, options=self.options)
+            return self.channels[target]
+
+    def aio_channel(self, target: str) -> grpc.aio.Channel:
+        target = resolve_target(target)
+        with self.lock:
+            channels = self.aio_channels.setdefault(asyncio.get_running_loop(), {})
+            if target not in channels:
+                channels[target] = grpc.aio.insecure_channel(target, options=self.options)
+            return channels[target]
+
+    def close(self):
+        with self.lock:
+            channels, self.channels = self.channels, {}
+        for channel in channels.values():
+            channel.close()
+
+    async def aclose(self):
+        """Close the aio channels of the running loop, and the sync channels"""
+        with self.lock:
+            channels = self.aio_channels.pop(asyncio.get_running_loop(), {})
+        for channel in channels.values():
+            await channel.close()
+        self.close()
+
+_registry: Optional[GrpcChannelRegistry] = None
+_registry_lock = threading.Lock()
+
+def channel_registry() -> GrpcChannelRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = GrpcChannelRegistry()
+        return _registry
@@ -0,0 +1,192 @@
+import os
+import time
+import queue
+import hashlib
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+from common.logger import SingletonLoggerSafe
+from common.dedup_store import normalize_url
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_ARCHIVE_DIR = "output/html_archive"
+DEFAULT_ARCHIVE_MAX_AGE = 30 * 24 * 3600 # seconds
+DEFAULT_ARCHIVE_MAX_BYTES = 1024 * 1024 * 1024
+
+@dataclass
+class Snapshot:
+    key: str
+    url: str
+    title: str
+    archived_at: float
+
+class HtmlArchive:
+    """Content-addressed archive of raw page snapshots.
+
+    A page is stored once per distinct content, zstd compressed, at
+    <root>/<key[:2]>/<key[2:4]>/<key>.html.zst; an SQLite index maps URLs to the
+    snapshots taken of them. put() only hashes and enqueues, a background thread
+    writes and applies the retention limits, so the scrape loop never waits on disk.
+    """
+    PRUNE_EVERY = 100 # writes
+
+    def __init__(
+            self,
+            root: str,
+            max_age: Optional[float] = DEFAULT_ARCHIVE_MAX_AGE,
+            max_bytes: Optional[int] = DEFAULT_ARCHIVE_MAX_BYTES,
+            level: int = 3,
+            queue_size: int = 256):
+        if zstandard is None:
+            raise ImportError("zstandard is not installed")
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.level = level
+        self.writes = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            os.path.join(root, "index.db"), timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, size INTEGER NOT NULL, archived_at REAL NOT NULL) WITHOUT ROWID")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots (url TEXT NOT NULL, key TEXT NOT NULL, title TEXT NOT NULL, archived_at REAL NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS snapshots_url ON snapshots (url, archived_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS snapshots_key ON snapshots (key)")
+        self.pending: "queue.Queue[Optional[tuple]]" = queue.Queue(queue_size)
+        self.writer = threading.Thread(target=self._run, name="html-archive", daemon=True)
+        self.writer.start()
+
+    @staticmethod
+    def content_key(html: str) -> str:
+        return hashlib.blake2b(html.encode("utf-8"), digest_size=16).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], f"{key}.html.zst")
+
+    def put(self, url: str, html: str, title: str = "") -> Optional[str]:
+        """Queue a snapshot of url, returns its key or None when the writer is behind and it was dropped"""
+        key = self.content_key(html)
+        try:
+            self.pending.put_nowait((key, normalize_url(url), title, html, time.time()))
+        except queue.Full:
+            SingletonLoggerSafe.error(f"HTML archive queue full, snapshot of {url} dropped")
+            return None
+        return key
+
+    def flush(self):
+        """Wait until every queued snapshot is written"""
+        self.pending.join()
+
+    def _run(self):
+        while True:
+            item = self.pending.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            except Exception as e:
+                SingletonLoggerSafe.error(f"Failed to archive page: {e}")
+            finally:
+                self.pending.task_done()
+
+    def _write(self, key: str, url: str, title: str, html: str, archived_at: float):
+        path = self.path(key)
+        if os.path.exists(path):
+            size = os.path.getsize(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = zstandard.ZstdCompressor(level=self.level).compress(html.encode("utf-8"))
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            size = len(data)
+        with self.lock:
+            # the row is written whether or not the file was, a file left without one
+            # (e.g. a crash after the write) gets it back and is pruned again
+            self.conn.execute(
+                "INSERT INTO pages (key, size, archived_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET size = excluded.size, archived_at = excluded.archived_at",
+                (key, size, archived_at))
+            self.conn.execute(
+                "INSERT INTO snapshots (url, key, title, archived_at) VALUES (?, ?, ?, ?)",
+                (url, key, title, archived_at))
+        self.writes += 1
+        if self.writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def get(self, key: str) -> Optional[str]:
+        """Page HTML by content key, None if not archived"""
+        try:
+            with open(self.path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+
+    def lookup(self, url: str) -> List[Snapshot]:
+        """Snapshots of url, newest first"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT key, url, title, archived_at FROM snapshots WHERE url = ? ORDER BY archived_at DESC",
+                (normalize_url(url),)).fetchall()
+        return [Snapshot(*row) for row in rows]
+
+    def snapshots(self, since: float = 0) -> Iterator[Snapshot]:
+        """All snapshots taken since a timestamp, oldest first, e.g. to re-run extractors"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT key, url, title, archived_at FROM snapshots WHERE archived_at >= ? ORDER BY archived_at",
+                (since,)).fetchall()
+        for row in rows:
+            yield Snapshot(*row)
+
+    def prune(self) -> int:
+        """Remove pages past max_age, then the oldest ones until the archive fits in max_bytes.
+        Returns the number of pages removed."""
+        expired = []
+        with self.lock:
+            if self.max_age is not None:
+                expired += [key for (key,) in self.conn.execute(
+                    "SELECT key FROM pages WHERE archived_at < ?", (time.time() - self.max_age,))]
+            if self.max_bytes is not None:
+                total = 0
+                for key, size in self.conn.execute("SELECT key, size FROM pages ORDER BY archived_at DESC"):
+                    total += size
+                    if total > self.max_bytes and key not in expired:
+                        expired.append(key)
+            for key in expired:
+                self.conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                self.conn.execute("DELETE FROM snapshots WHERE key = ?", (key,))
+        for key in expired:
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+        return len(expired)
+
+    def close(self):
+        """Write what is queued, then stop the writer"""
+        self.pending.put(None)
+        self.writer.join()
+        with self.lock:
+            self.conn.close()
+
+def html_archive_from_env() -> Optional[HtmlArchive]:
+    """HtmlArchive at HTML_ARCHIVE_DIR, None when it is set empty or zstandard is not installed"""
+    root = os.getenv("HTML_ARCHIVE_DIR", DEFAULT_ARCHIVE_DIR)
+    if not root or zstandard is None:
+        return None
+    return HtmlArchive(
+        root,
+        max_age=float(os.getenv("HTML_ARCHIVE_MAX_AGE_DAYS", str(DEFAULT_ARCHIVE_MAX_AGE / 86400))) * 86400,
+        max_bytes=int(float(os.getenv("HTML_ARCHIVE_MAX_MB", str(DEFAULT_ARCHIVE_MAX_BYTES >> 20))) * (1 << 20)))
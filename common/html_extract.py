@@ -0,0 +1,92 @@
+from typing import Dict, NotRequired, Optional, TypedDict
+from bs4 import BeautifulSoup
+from news_model.message import ArticlePayload
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml
+    BS_PARSER = "lxml"
+except ImportError:
+    BS_PARSER = "html.parser"
+
+class ExtractionRule(TypedDict):
+    title: str                  # CSS selector of the title node
+    body: str                   # CSS selector of the article body
+    paragraphs: NotRequired[str]    # CSS selector of the text nodes in the body, "p" by default
+    stop: NotRequired[str]      # CSS selector in the body where the article text ends
+    anchor: NotRequired[str]    # markup inside the first tag of the article, parsing starts at that tag
+
+TRADINGVIEW_RULE = ExtractionRule(
+    title="h1.title-KX2tCBZq",
+    body="div.body-KX2tCBZq",
+    anchor='class="title-KX2tCBZq')
+
+INVESTING_RULE = ExtractionRule(
+    title="h1#articleTitle",
+    body="div#article",
+    stop="#article-newsletter-hook",
+    anchor='id="articleTitle"')
+
+RULES: Dict[str, ExtractionRule] = {
+    "tradingview": TRADINGVIEW_RULE,
+    "investing": INVESTING_RULE,
+}
+
+def article_subtree(html: str, anchor: Optional[str]) -> Optional[str]:
+    """The page from the tag holding anchor to the end, skipping the head and navigation
+    (most of a page_source). The parser closes the ancestors left open."""
+    if not anchor:
+        return None
+    pos = html.find(anchor)
+    if pos < 0:
+        return None
+    start = html.rfind("<", 0, pos)
+    return html[start:] if start >= 0 else None
+
+def _extract_lexbor(html: str, rule: ExtractionRule):
+    tree = LexborHTMLParser(html)
+    title = tree.css_first(rule["title"])
+    body = tree.css_first(rule["body"])
+    if body is None:
+        return title and title.text(strip=True), None
+    paragraphs = rule.get("paragraphs", "p")
+    stop = rule.get("stop")
+    content = []
+    for node in body.css(f"{paragraphs}, {stop}" if stop else paragraphs):
+        if stop and node.css_matches(stop):
+            break
+        content.append(node.text(deep=True, separator="", strip=True))
+    return title and title.text(strip=True), content
+
+def _extract_soup(html: str, rule: ExtractionRule):
+    soup = BeautifulSoup(html, BS_PARSER)
+    title = soup.select_one(rule["title"])
+    body = soup.select_one(rule["body"])
+    if body is None:
+        return title and title.get_text(strip=True), None
+    paragraphs = rule.get("paragraphs", "p")
+    stop = rule.get("stop")
+    content = []
+    for node in body.select(f"{paragraphs}, {stop}" if stop else paragraphs):
+        if stop and node.css.match(stop):
+            break
+        content.append(node.get_text(strip=True))
+    return title and title.get_text(strip=True), content
+
+def extract_article(html: str, rule: ExtractionRule) -> ArticlePayload:
+    """Title and paragraphs of an article page by rule. Parses with lexbor (selectolax) when
+    installed, BeautifulSoup otherwise, and only the article subtree when the anchor is found."""
+    extract = _extract_lexbor if LexborHTMLParser is not None else _extract_soup
+    subtree = article_subtree(html, rule.get("anchor"))
+    title, content = extract(subtree, rule) if subtree is not None else (None, None)
+    if content is None:
+        # anchor missing or not ahead of the body, the whole page it is
+        title, content = extract(html, rule)
+    return ArticlePayload(
+        title=title if title else "No Title",
+        content="\n".join(content) if content else ArticlePayload.NO_CONTENT
+    )
@@ -0,0 +1,77 @@
+import asyncio
+import importlib.util
+import pickle
+import threading
+from typing import Iterable, Optional
+import httpx
+from common.logger import SingletonLoggerSafe
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/139.0.0.0 Safari/537.36")
+
+class HttpPageFetcher:
+    """Pooled, cookie-aware HTTP client for pages that do not need a browser to render.
+
+    Cookies come from a Selenium session (or the pickle it was saved to), so requests
+    are made as the logged-in user. HTTP/2 is used when h2 is installed. Requests run on an
+    async client in the fetcher's own loop thread, so the fetching threads multiplex over
+    its connections; fetch is called from those threads, afetch from that loop.
+    """
+    def __init__(
+            self,
+            cookies: Iterable[dict] = (),
+            user_agent: str = DEFAULT_USER_AGENT,
+            timeout: float = 10,
+            max_connections: int = 8,
+            transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.max_connections = max_connections
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="http-fetcher", daemon=True)
+        self.thread.start()
+        self.client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            timeout=timeout,
+            follow_redirects=True,
+            headers={"User-Agent": user_agent, "Accept-Language": "en-US,en;q=0.9"},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport)
+        self.update_cookies(cookies)
+
+    @classmethod
+    def from_cookie_file(cls, path: str, **kwargs) -> "HttpPageFetcher":
+        with open(path, "rb") as file:
+            return cls(pickle.load(file), **kwargs)
+
+    def update_cookies(self, cookies: Iterable[dict]):
+        """Cookies in the Selenium get_cookies() format"""
+        for cookie in cookies:
+            self.client.cookies.set(
+                cookie["name"], cookie["value"],
+                domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+
+    def set_user_agent(self, user_agent: str):
+        self.client.headers["User-Agent"] = user_agent
+
+    def fetch(self, url: str) -> Optional[str]:
+        """Page HTML, or None if the request failed. Blocks the calling thread."""
+        return asyncio.run_coroutine_threadsafe(self.afetch(url), self.loop).result()
+
+    async def afetch(self, url: str) -> Optional[str]:
+        try:
+            response = await self.client.get(url)
+            if response.status_code != 200:
+                await SingletonLoggerSafe.ainfo(f"HTTP fetch of {url} returned {response.status_code}")
+                return None
+            return response.text
+        except httpx.HTTPError as e:
+            await SingletonLoggerSafe.aerror(f"HTTP fetch of {url} failed: {e}")
+            return None
+
+    def close(self):
+        if self.loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
@@ -1,33 +1,279 @@
 import asyncio
+import collections
+import json
 import os
+import random
 import threading
 import logging
 import sys
+from typing import Any, Dict, List, Optional
+
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+LOG_OVERFLOW = os.getenv("LOG_OVERFLOW", "drop_oldest") # drop_oldest | drop_newest | block
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text") # text | json (JSON lines)
+LOG_FIELD_LIMIT = int(os.getenv("LOG_FIELD_LIMIT", "512")) # max chars per payload field, 0 = unlimited
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "") # e.g. "Agent=0.1,PostgresWriter=0.01,*=0"
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "component=rate,..." into a dict, "*" sets the default rate"""
+    rates = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, rate = item.split("=", 1)
+        rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+class _LogPipeline:
+    """Bounded ring buffer of log records drained by a single background writer thread.
+
+    Producers only pay an append. The writer formats records and writes them to the
+    sinks in batches with one flush per batch. When the buffer is full the overflow
+    policy applies: drop_oldest, drop_newest or block. Coroutines running on an event
+    loop never block, they fall back to drop_oldest.
+    """
+    OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+    def __init__(
+            self,
+            sinks: List[logging.Handler],
+            capacity: int = LOG_QUEUE_SIZE,
+            batch_size: int = LOG_BATCH_SIZE,
+            overflow: str = LOG_OVERFLOW):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown log overflow policy: {overflow}")
+        self.sinks = sinks
+        self.capacity = max(1, capacity)
+        self.batch_size = max(1, batch_size)
+        self.overflow = overflow
+        self.buffer = collections.deque()
+        self.cond = threading.Condition()
+        self.pending = 0
+        self.dropped = 0
+        self.total_dropped = 0
+        self.closed = False
+        self.writer = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.writer.start()
+
+    def put(self, record: logging.LogRecord):
+        with self.cond:
+            if self.closed:
+                self._write([record])
+                return
+            if len(self.buffer) >= self.capacity:
+                if self.overflow == "block" and not self._in_event_loop():
+                    while len(self.buffer) >= self.capacity and not self.closed:
+                        self.cond.wait()
+                elif self.overflow == "drop_newest":
+                    self._drop()
+                    return
+                else:
+                    self.buffer.popleft()
+                    self.pending -= 1
+                    self._drop()
+            self.buffer.append(record)
+            self.pending += 1
+            self.cond.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every enqueued record has been written"""
+        if threading.current_thread() is self.writer:
+            return True
+        with self.cond:
+            return self.cond.wait_for(lambda: self.pending == 0 or not self.writer.is_alive(), timeout)
+
+    def close(self):
+        with self.cond:
+            if self.closed:
+                return
+            self.closed = True
+            self.cond.notify_all()
+        if threading.current_thread() is not self.writer:
+            self.writer.join()
+        for sink in self.sinks:
+            sink.close()
+
+    def _drop(self):
+        self.dropped += 1
+        self.total_dropped += 1
+
+    @staticmethod
+    def _in_event_loop() -> bool:
+        try:
+            asyncio.get_running_loop()
+            return True
+        except RuntimeError:
+            return False
+
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.buffer or self.closed)
+                if not self.buffer:
+                    return
+                batch = [self.buffer.popleft() for _ in range(min(self.batch_size, len(self.buffer)))]
+                dropped, self.dropped = self.dropped, 0
+                self.cond.notify_all()
+
+            if dropped:
+                batch.append(logging.makeLogRecord({
+                    "name": "SingletonLoggerSafe",
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"Log buffer full, dropped {dropped} records",
+                }))
+            self._write(batch)
+
+            with self.cond:
+                self.pending -= len(batch) - (1 if dropped else 0)
+                self.cond.notify_all()
+
+    def _write(self, records: List[logging.LogRecord]):
+        for sink in self.sinks:
+            lines = []
+            for record in records:
+                if record.levelno < sink.level or not sink.filter(record):
+                    continue
+                try:
+                    lines.append(sink.format(record) + sink.terminator)
+                except Exception:
+                    sink.handleError(record)
+            if not lines:
+                continue
+            sink.acquire()
+            try:
+                sink.stream.write("".join(lines))
+                sink.flush()
+            except Exception:
+                sink.handleError(records[-1])
+            finally:
+                sink.release()
+
+
+class _QueueBufferHandler(logging.Handler):
+    """Handler that hands records over to a _LogPipeline"""
+    def __init__(self, pipeline: _LogPipeline):
+        super().__init__()
+        self.pipeline = pipeline
+
+    def handle(self, record):
+        # skip the handler lock, the pipeline does its own locking
+        rv = self.filter(record)
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record):
+        try:
+            self.pipeline.put(record)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.pipeline.flush()
+
+    def close(self):
+        self.pipeline.close()
+        super().close()
+
+
+class _PayloadFormatter(logging.Formatter):
+    """Formatter that renders payload fields attached to a record, as text or JSON lines.
+
+    Payload fields are rendered here, on the writer thread. Values may be callables,
+    which are only invoked at this point. Unless the record carries the full payload
+    (sampled or error), each field is truncated to field_limit characters.
+    """
+    def __init__(self, fmt: str, structured: bool = False, field_limit: int = LOG_FIELD_LIMIT):
+        super().__init__(fmt)
+        self.structured = structured
+        self.field_limit = field_limit
+
+    def _render_field(self, value: Any, full: bool) -> str:
+        if callable(value):
+            value = value()
+        if not isinstance(value, str):
+            value = json.dumps(value, ensure_ascii=False, default=str)
+        if not full and self.field_limit and len(value) > self.field_limit:
+            value = f"{value[:self.field_limit]}...(+{len(value) - self.field_limit} chars)"
+        return value
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None) or {}
+        full = getattr(record, "full_payload", True)
+        rendered = {}
+        for key, value in fields.items():
+            try:
+                rendered[key] = self._render_field(value, full)
+            except Exception as e:
+                rendered[key] = f"<unrenderable: {e}>"
+
+        if not self.structured:
+            line = super().format(record)
+            if rendered:
+                line += "".join(f"\n  {key}: {value}" for key, value in rendered.items())
+            return line
+
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "component": getattr(record, "component", None),
+            "msg": record.getMessage(),
+        }
+        if rendered:
+            entry["fields"] = rendered
+            entry["truncated"] = not full
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
 
 class SingletonLoggerSafe:
     _instance = None
     _create_lock = threading.Lock()
     class _ComponentLoggerAdapter(logging.LoggerAdapter):
-        """LoggerAdapter wrapper that supports async methods ainfo / aerror"""
-        def __init__(self, logger, component_name: str):
+        """LoggerAdapter wrapper that supports async methods ainfo / aerror
+
+        Payload fields passed as fields={...} are kept in full for a sampled fraction
+        of info records (per-component sample_rate) and for every error record,
+        otherwise they are truncated by the formatter.
+        """
+        def __init__(self, logger, component_name: str, sample_rate: float = 0.0):
             super().__init__(logger, {"component": component_name})
             self._component_name = component_name
+            self.sample_rate = sample_rate
+
+        def process(self, msg, kwargs):
+            fields = kwargs.pop("fields", None)
+            full_payload = kwargs.pop("full_payload", False)
+            kwargs["extra"] = {**self.extra, "fields": fields, "full_payload": full_payload, **kwargs.get("extra", {})}
+            return msg, kwargs
 
-        def info(self, msg, *args, **kwargs):
+        def info(self, msg, *args, fields: Optional[Dict[str, Any]] = None, **kwargs):
             msg = f"[{self._component_name}] {msg}"
-            super().info(msg, *args, **kwargs)
+            full_payload = fields is not None and random.random() < self.sample_rate
+            super().info(msg, *args, fields=fields, full_payload=full_payload, **kwargs)
 
-        def error(self, msg, *args, **kwargs):
+        def error(self, msg, *args, fields: Optional[Dict[str, Any]] = None, **kwargs):
             msg = f"[{self._component_name}] {msg}"
-            super().error(msg, *args, **kwargs)
+            super().error(msg, *args, fields=fields, full_payload=True, **kwargs)
 
-        async def ainfo(self, msg: str):
-            await asyncio.to_thread(self.info, msg)
+        async def ainfo(self, msg: str, **kwargs):
+            self.info(msg, **kwargs)
 
-        async def aerror(self, msg: str):
-            await asyncio.to_thread(self.error, msg)
+        async def aerror(self, msg: str, **kwargs):
+            self.error(msg, **kwargs)
 
-    def __new__(cls, file_path: str):
+    def __new__(
+            cls,
+            file_path: str,
+            queue_size: int = LOG_QUEUE_SIZE,
+            batch_size: int = LOG_BATCH_SIZE,
+            overflow: str = LOG_OVERFLOW,
+            log_format: str = LOG_FORMAT,
+            field_limit: int = LOG_FIELD_LIMIT,
+            sample_rates: str = LOG_SAMPLE_RATES):
         if cls._instance:
             return cls._instance
 
@@ -35,57 +281,56 @@ class SingletonLoggerSafe:
             if cls._instance:
                 return cls._instance
 
+            if log_format not in ("text", "json"):
+                raise ValueError(f"Unknown log format: {log_format}")
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
             logging.basicConfig(
                 level=logging.INFO,
                 format="%(asctime)s [%(levelname)s] %(message)s"
             )
             logger = logging.getLogger("SingletonLoggerSafe")
+            # Closing a previous _QueueBufferHandler drains and stops its writer
             for handler in logger.handlers[:]:
                 handler.close()
                 logger.removeHandler(handler)
 
             logger.setLevel(logging.INFO)
             logger.propagate = False     # Prevent double logging
-            logger.write_lock = threading.Lock()
-
-            for handler in logger.handlers[:]:
-                logger.removeHandler(handler)
-                handler.close()
 
             # # Console handler
             ch = logging.StreamHandler(sys.stdout)
             ch.setLevel(logging.INFO)
-            ch_formatter = logging.Formatter(
-                "%(asctime)s [%(levelname)s] %(message)s")
+            ch_formatter = _PayloadFormatter(
+                "%(asctime)s [%(levelname)s] %(message)s", log_format == "json", field_limit)
             ch.setFormatter(ch_formatter)
-            logger.addHandler(ch)
 
             # File handler
             fh = logging.FileHandler(file_path)
             fh.setLevel(logging.INFO)
-            fh_formatter = logging.Formatter(
-                "%(asctime)s [%(levelname)s] %(message)s")
+            fh_formatter = _PayloadFormatter(
+                "%(asctime)s [%(levelname)s] %(message)s", log_format == "json", field_limit)
             fh.setFormatter(fh_formatter)
-            logger.addHandler(fh)
-            
+
+            # Console and file writes happen on the pipeline's writer thread
+            logger.pipeline = _LogPipeline([ch, fh], queue_size, batch_size, overflow)
+            logger.addHandler(_QueueBufferHandler(logger.pipeline))
+            logger.sample_rates = parse_sample_rates(sample_rates)
+
             cls._instance = logger
         logger.info(cls.__dict__)
         return cls
 
     @classmethod
-    def info(cls, msg: str):
+    def info(cls, msg: str, **kwargs):
         if not cls._instance:
             raise ValueError("Logger not initialized")
-        with cls._instance.write_lock:
-            cls._instance.info(msg)
-    
+        cls._instance.info(msg, **kwargs)
+
     @classmethod
-    def error(cls, msg: str):
+    def error(cls, msg: str, **kwargs):
         if not cls._instance:
             raise ValueError("Logger not initialized")
-        with cls._instance.write_lock:
-            cls._instance.error(msg)
+        cls._instance.error(msg, **kwargs)
 
     @classmethod
     def section(cls, section: str):
@@ -94,17 +339,25 @@ class SingletonLoggerSafe:
         cls.info(message)
 
     @classmethod
-    async def ainfo(cls, msg: str):
-        await asyncio.to_thread(cls.info, msg)
+    async def ainfo(cls, msg: str, **kwargs):
+        cls.info(msg, **kwargs)
 
     @classmethod
-    async def aerror(cls, msg: str):
-        await asyncio.to_thread(cls.error, msg)
-        
+    async def aerror(cls, msg: str, **kwargs):
+        cls.error(msg, **kwargs)
+
+    @classmethod
+    def flush(cls, timeout: float = None) -> bool:
+        """Block until all buffered records are written"""
+        if not cls._instance:
+            raise ValueError("Logger not initialized")
+        return cls._instance.pipeline.flush(timeout)
+
     @classmethod
     def component(cls, name: str):
         if not cls._instance:
             raise ValueError("Logger not initialized")
-        return cls._ComponentLoggerAdapter(cls._instance, name)
+        rates = cls._instance.sample_rates
+        return cls._ComponentLoggerAdapter(cls._instance, name, rates.get(name, rates.get("*", 0.0)))
 
 
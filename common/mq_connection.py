@@ -0,0 +1,149 @@
+import os
+import time
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import Callable, List, Optional
+import aio_pika
+import aio_pika.pool
+from common.logger import SingletonLoggerSafe
+
+MQ_CONNECT_TIMEOUT = 60 # seconds
+MQ_HEARTBEAT = 60 # seconds
+MQ_PUBLISH_CHANNELS = 4
+
+class MQConnectionManager:
+    """One robust AMQP connection per broker and event loop, shared by every publisher
+    and consumer of the process.
+
+    Publishers borrow channels from a small pool with publish_channel(); consumers get
+    a dedicated channel each from consume_channel(), because QoS is per channel. Users
+    call connect() and release(); the connection closes when the last user releases it.
+    Channels of a robust connection are restored by aio_pika after a reconnect, use
+    on_reconnect()/on_close() or healthy to follow the connection state.
+    """
+    # connections are bound to their event loop
+    _shared: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+
+    def __init__(
+            self,
+            host: str,
+            username: str,
+            password: str,
+            heartbeat: int = MQ_HEARTBEAT,
+            publish_channels: int = MQ_PUBLISH_CHANNELS):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.heartbeat = heartbeat
+        self.connection: Optional[aio_pika.abc.AbstractRobustConnection] = None
+        self.connected = asyncio.Event()
+        self.users = 0
+        self._lock = asyncio.Lock()
+        self.publish_channels = publish_channels
+        self._publish_pool: Optional[aio_pika.pool.Pool] = None
+        self._reconnect_callbacks: List[Callable] = []
+        self._close_callbacks: List[Callable] = []
+
+    @classmethod
+    def shared(cls, host: str, username: str, password: str, **kwargs) -> "MQConnectionManager":
+        managers = cls._shared.setdefault(asyncio.get_running_loop(), {})
+        key = (host, username)
+        if key not in managers:
+            managers[key] = cls(host, username, password, **kwargs)
+        return managers[key]
+
+    @classmethod
+    def from_env(cls) -> "MQConnectionManager":
+        return cls.shared(
+            os.getenv("RABBITMQ_HOST", "rabbitmq"),
+            os.getenv("RABBITMQ_USER", "admin"),
+            os.getenv("RABBITMQ_PASS", "password"))
+
+    @property
+    def healthy(self) -> bool:
+        """Connected now; a robust connection is not closed while it reconnects, connected is clear then"""
+        return self.connection is not None and not self.connection.is_closed and self.connected.is_set()
+
+    def on_reconnect(self, callback: Callable[[], None]):
+        self._reconnect_callbacks.append(callback)
+
+    def on_close(self, callback: Callable[[Optional[BaseException]], None]):
+        self._close_callbacks.append(callback)
+
+    async def connect(self, timeout: Optional[float] = None) -> aio_pika.abc.AbstractRobustConnection:
+        """Open the shared connection on first use, retrying until timeout (once if None)"""
+        async with self._lock:
+            self.users += 1
+            if self.connection is not None:
+                return self.connection
+            giveup_time = time.time() + (timeout or 0)
+            while True:
+                try:
+                    self.connection = await aio_pika.connect_robust(
+                        host=self.host,
+                        login=self.username,
+                        password=self.password,
+                        heartbeat=self.heartbeat,
+                    )
+                    break
+                except Exception as e:
+                    SingletonLoggerSafe.error(f"Failed to connect to RabbitMQ: {e}")
+                    if time.time() >= giveup_time:
+                        self.users -= 1
+                        raise e
+                    await asyncio.sleep(5)
+            self.connection.reconnect_callbacks.add(self._on_reconnect)
+            self.connection.close_callbacks.add(self._on_close)
+            self.connected.set()
+            SingletonLoggerSafe.info(f"Connected to RabbitMQ at {self.host}")
+            return self.connection
+
+    async def release(self):
+        """Drop one user, closing the connection with the last one"""
+        async with self._lock:
+            self.users = max(0, self.users - 1)
+            if self.users > 0 or self.connection is None:
+                return
+            connection, self.connection = self.connection, None
+            self.connected.clear()
+            try:
+                if self._publish_pool is not None:
+                    await self._publish_pool.close()
+                    self._publish_pool = None
+                await connection.close()
+            except Exception as e:
+                SingletonLoggerSafe.error(f"Failed to close connection: {e}")
+
+    async def _new_channel(self) -> aio_pika.abc.AbstractChannel:
+        if self.connection is None:
+            raise Exception("Not connected to RabbitMQ")
+        return await self.connection.channel()
+
+    async def consume_channel(self, prefetch_count: Optional[int] = None) -> aio_pika.abc.AbstractChannel:
+        """A channel owned by the caller, who closes it"""
+        channel = await self._new_channel()
+        if prefetch_count is not None:
+            await channel.set_qos(prefetch_count=prefetch_count)
+        return channel
+
+    @asynccontextmanager
+    async def publish_channel(self):
+        """Borrow a channel from the publish pool"""
+        if self._publish_pool is None:
+            self._publish_pool = aio_pika.pool.Pool(self._new_channel, max_size=self.publish_channels)
+        async with self._publish_pool.acquire() as channel:
+            yield channel
+
+    def _on_reconnect(self, connection):
+        self.connected.set()
+        SingletonLoggerSafe.info(f"Reconnected to RabbitMQ at {self.host}")
+        for callback in self._reconnect_callbacks:
+            callback()
+
+    def _on_close(self, connection, exc: Optional[BaseException] = None):
+        self.connected.clear()
+        if exc is not None:
+            SingletonLoggerSafe.error(f"RabbitMQ connection lost: {exc}")
+        for callback in self._close_callbacks:
+            callback(exc)
@@ -1,24 +1,75 @@
 import asyncio
-from typing import List, Callable
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NotRequired, Optional, Set
 import aio_pika
 from common.logger import SingletonLoggerSafe
+from common.codec import CodecRegistry, decode_message
+from common.mq_retry import RetryTopology, DEFAULT_RETRY_BASE_DELAY_MS, DEFAULT_RETRY_BACKOFF, DEFAULT_MAX_RETRIES
+from common.mq_connection import MQConnectionManager
+from common.mq_metrics import ConsumerMetrics, start_metrics_server
 from typing import TypedDict
 import signal
 
+DEFAULT_CONCURRENCY = 1
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_BATCH_TIMEOUT_MS = 200
+FAILURE_POLICIES = ("ack", "requeue", "dead_letter", "retry")
+
 class RabbitMQConfig(TypedDict):
     host: str
     queue_name: str
     username: str
     password: str
-    
+    concurrency: NotRequired[int]       # messages processed at the same time, default 1
+    prefetch_count: NotRequired[int]    # unacked messages the broker may push, default 2 * batch_size with batch handlers, 2 * concurrency otherwise
+    handler_timeout: NotRequired[float] # seconds per handler call, default no timeout
+    failure_policy: NotRequired[str]    # ack | requeue | dead_letter | retry when any handler fails, default ack
+    retry_base_delay_ms: NotRequired[int] # first retry delay for the retry policy, default 5000
+    retry_backoff: NotRequired[float]   # delay multiplier between retries, default 3
+    max_retries: NotRequired[int]       # retries before a message is parked, default 4
+    metrics_port: NotRequired[int]      # serve prometheus metrics on this port, default disabled
+    batch_size: NotRequired[int]        # max messages per batch for batch handlers, default 50
+    batch_timeout_ms: NotRequired[int]  # max wait to fill a batch, default 200
+
+# A batch handler receives the payloads of a batch and returns the indices of the items
+# it failed to process (None or empty when all succeeded). Raising fails the whole batch.
+BatchHandler = Callable[[List[Any]], Awaitable[Optional[Iterable[int]]]]
+
+class HandlerFailure(Exception):
+    """Raised inside message.process() so the message is rejected instead of acked"""
+
 class RabbitMQConsumer:
     def __init__(self, config: RabbitMQConfig):
         self.config = config
         self.connection = None
+        self.mq: Optional[MQConnectionManager] = None
         self.channel = None
         self.queue = None
         self.handlers: List[Callable[[str], None]] = []
+        self.handler_timeouts: List[Optional[float]] = []
+        self.handler_timeout: Optional[float] = config.get("handler_timeout")
+        self.failure_policy = config.get("failure_policy", "ack")
+        if self.failure_policy not in FAILURE_POLICIES:
+            raise ValueError(f"Unknown failure policy: {self.failure_policy}")
+        self.retries: Optional[RetryTopology] = None
+        if self.failure_policy == "retry":
+            self.retries = RetryTopology(
+                config["queue_name"],
+                config.get("retry_base_delay_ms", DEFAULT_RETRY_BASE_DELAY_MS),
+                config.get("retry_backoff", DEFAULT_RETRY_BACKOFF),
+                config.get("max_retries", DEFAULT_MAX_RETRIES))
+        self.metrics = ConsumerMetrics(config["queue_name"], enabled="metrics_port" in config)
         self.stop_event = asyncio.Event()
+        self.concurrency = max(1, config.get("concurrency", DEFAULT_CONCURRENCY))
+        self.batch_size = max(1, config.get("batch_size", DEFAULT_BATCH_SIZE))
+        self.batch_timeout = config.get("batch_timeout_ms", DEFAULT_BATCH_TIMEOUT_MS) / 1000
+        self.batch_handlers: List[BatchHandler] = []
+        self.batch_handler_timeouts: List[Optional[float]] = []
+        self.ordering_key: Optional[Callable[[Any], str]] = None
+        self.codecs: Optional[CodecRegistry] = None
+        self.message_type: Optional[Callable[[Any], Any]] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._key_tails: Dict[str, asyncio.Task] = {}
 
     async def __aenter__(self):
         await self.connect()
@@ -29,21 +80,29 @@ class RabbitMQConsumer:
         await self.shutdown()
 
     async def connect(self):
+        if "metrics_port" in self.config:
+            start_metrics_server(self.config["metrics_port"])
         try:
-            self.connection = await aio_pika.connect_robust(
-                host=self.config["host"],
-                login=self.config["username"],
-                password=self.config["password"],
-                heartbeat=60,
-            )
-            self.channel = await self.connection.channel()
+            self.mq = MQConnectionManager.shared(
+                self.config["host"], self.config["username"], self.config["password"])
+            self.connection = await self.mq.connect()
+            self.channel = await self.mq.consume_channel(self.prefetch_count())
             self.queue = await self.channel.declare_queue(
                 self.config["queue_name"],
                 durable=True,
             )
+            if self.retries is not None:
+                await self.retries.declare(self.channel)
         except Exception as e:
             raise Exception(f"Failed to connect to RabbitMQ: {e}")
-    
+
+    def prefetch_count(self) -> int:
+        """From the handlers registered by now; consume_batches() applies it again"""
+        if "prefetch_count" in self.config:
+            return self.config["prefetch_count"]
+        # a batch cannot fill beyond what the broker pushes
+        return 2 * (self.batch_size if self.batch_handlers else self.concurrency)
+
     async def shutdown(self):
         if self.stop_event:
             try:
@@ -55,35 +114,292 @@ class RabbitMQConsumer:
                 await self.channel.close()
             except Exception as e:
                 SingletonLoggerSafe.error(f"Failed to close channel: {e}")
-        if self.connection:
-            try:
-                await self.connection.close()
-            except Exception as e:
-                SingletonLoggerSafe.error(f"Failed to close connection: {e}")
-        
-    def with_handler(self, handler):
+        if self.mq is not None and self.connection:
+            # the connection is shared, it closes with its last user
+            await self.mq.release()
+            self.connection = None
+
+    def with_handler(self, handler, timeout: Optional[float] = None):
+        """Handlers of one message run concurrently, each bounded by timeout
+        (falls back to handler_timeout from the config)"""
         self.handlers.append(handler)
+        self.handler_timeouts.append(timeout if timeout is not None else self.handler_timeout)
+        return self
+
+    def with_batch_handler(self, handler: BatchHandler, timeout: Optional[float] = None):
+        """Switches the consumer to batching mode, see consume_batches()"""
+        self.batch_handlers.append(handler)
+        self.batch_handler_timeouts.append(timeout if timeout is not None else self.handler_timeout)
+        return self
+
+    def with_codec(self, codecs: CodecRegistry, message_type: Optional[Callable[[Any], Any]] = None):
+        """Decode each message once, with the codec matching its content type, and pass
+        message_type(decoded) to the handlers. Without a codec handlers get the UTF-8 body."""
+        self.codecs = codecs
+        self.message_type = message_type
+        return self
+
+    def with_ordering_key(self, key_func: Callable[[Any], str]):
+        """Messages with the same key are processed one at a time, in delivery order"""
+        self.ordering_key = key_func
         return self
 
     async def consume(self):
         if self.queue is None:
             raise Exception("Queue not initialized")
-        
+
+        if self.handlers and self.batch_handlers:
+            raise Exception("Cannot mix message handlers and batch handlers")
+
+        if self.batch_handlers:
+            return await self.consume_batches()
+
         if self.handlers is None or len(self.handlers) == 0:
             raise Exception("No handlers registered")
-        
-        async with self.queue.iterator() as iterator:
-            async for message in iterator:
-                async with message.process():
+
+        slots = asyncio.Semaphore(self.concurrency)
+        try:
+            async with self.queue.iterator() as iterator:
+                async for message in iterator:
                     if self.stop_event.is_set():
+                        break # leave the message unacked, the broker redelivers it
+                    await slots.acquire()
+                    self._dispatch(message, slots)
+        finally:
+            if self._inflight:
+                await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def _dispatch(self, message: aio_pika.abc.AbstractIncomingMessage, slots: asyncio.Semaphore):
+        self.metrics.received(message)
+        key = None
+        try:
+            payload = self._decode(message)
+        except Exception as e:
+            SingletonLoggerSafe.error(f"Failed to decode message: {e}")
+            coro = self._reject_undecodable(message, str(e))
+        else:
+            key = self._message_key(payload)
+            previous = self._key_tails.get(key) if key is not None else None
+            coro = self._process_message(message, payload, previous)
+        task = asyncio.create_task(coro)
+        self._inflight.add(task)
+        if key is not None:
+            self._key_tails[key] = task
+
+        def _done(t: asyncio.Task):
+            slots.release()
+            self._inflight.discard(t)
+            if key is not None and self._key_tails.get(key) is t:
+                del self._key_tails[key]
+        task.add_done_callback(_done)
+
+    def _decode(self, message: aio_pika.abc.AbstractIncomingMessage) -> Any:
+        if self.codecs is None:
+            return message.body.decode("utf-8")
+        decoded = decode_message(message, self.codecs)
+        return self.message_type(decoded) if self.message_type else decoded
+
+    async def _reject_undecodable(self, message: aio_pika.abc.AbstractIncomingMessage, reason: str = ""):
+        # retrying cannot fix a message we cannot decode
+        try:
+            if self.retries is not None:
+                await self.retries.park(message, f"Failed to decode message: {reason}")
+                await message.ack()
+                self.metrics.settled("parked")
+            else:
+                await message.reject(requeue=False)
+                self.metrics.settled("reject")
+        except Exception as e:
+            SingletonLoggerSafe.error(f"Failed to reject message: {e}")
+
+    def _message_key(self, payload: Any) -> Optional[str]:
+        if self.ordering_key is None:
+            return None
+        try:
+            return self.ordering_key(payload)
+        except Exception as e:
+            SingletonLoggerSafe.error(f"Failed to compute ordering key: {e}")
+            return None
+
+    async def _process_message(
+            self,
+            message: aio_pika.abc.AbstractIncomingMessage,
+            payload: Any,
+            previous: Optional[asyncio.Task] = None):
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        # dead_letter rejects without requeue, the broker routes the message to the
+        # queue's dead letter exchange if one is configured, otherwise drops it.
+        # retry republishes to a delay queue and acks; if that fails, it requeues.
+        requeue = self.failure_policy in ("requeue", "retry")
+        outcome = "ack"
+        try:
+            async with message.process(requeue=requeue):
+                results = await asyncio.gather(
+                    *(self._run_handler(handler, timeout, payload)
+                      for handler, timeout in zip(self.handlers, self.handler_timeouts)),
+                    return_exceptions=True)
+                failures = [r for r in results if isinstance(r, BaseException)]
+                if failures and self.failure_policy == "retry":
+                    try:
+                        retried = await self.retries.retry(message, "; ".join(repr(f) for f in failures))
+                        outcome = "retry" if retried else "parked"
+                    except Exception as e:
+                        raise HandlerFailure(f"Failed to schedule retry: {e}")
+                elif failures and self.failure_policy != "ack":
+                    raise HandlerFailure(f"{len(failures)} of {len(self.handlers)} handlers failed")
+        except HandlerFailure as e:
+            outcome = "requeue" if requeue else "reject"
+            SingletonLoggerSafe.error(f"{e}, message rejected (policy: {self.failure_policy})")
+        finally:
+            self.metrics.settled(outcome)
+
+    async def _run_handler(self, handler, timeout: Optional[float], body):
+        name = getattr(handler, "__qualname__", repr(handler))
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(handler(body), timeout)
+            self.metrics.handler_latency(name, time.perf_counter() - start, "ok")
+            return result
+        except asyncio.TimeoutError as e:
+            self.metrics.handler_latency(name, time.perf_counter() - start, "timeout")
+            SingletonLoggerSafe.error(f"Handler {name} timed out after {timeout}s")
+            raise e
+        except Exception as e:
+            self.metrics.handler_latency(name, time.perf_counter() - start, "error")
+            SingletonLoggerSafe.error(f"Handler {name} failed: {e}")
+            raise e
+
+    async def consume_batches(self):
+        """Accumulate up to batch_size messages or batch_timeout_ms, hand the batch to the
+        batch handlers and settle it: failed items are nacked one by one, then the rest is
+        acked with a single multiple-ack. Batches are settled one at a time, since a
+        multiple-ack covers every earlier unacked delivery on the channel.
+        """
+        if self.queue is None:
+            raise Exception("Queue not initialized")
+        if "prefetch_count" not in self.config:
+            # connect() may have run before the batch handlers were registered
+            await self.channel.set_qos(prefetch_count=self.prefetch_count())
+
+        arrivals: asyncio.Queue = asyncio.Queue()
+        async def pump():
+            try:
+                async with self.queue.iterator() as iterator:
+                    async for message in iterator:
+                        await arrivals.put(message)
+            finally:
+                await arrivals.put(None) # end of stream
+
+        pump_task = asyncio.create_task(pump())
+        loop = asyncio.get_running_loop()
+        try:
+            done = False
+            while not done:
+                message = await arrivals.get()
+                if message is None:
+                    break
+                batch = [message]
+                deadline = loop.time() + self.batch_timeout
+                while len(batch) < self.batch_size:
+                    try:
+                        message = await asyncio.wait_for(arrivals.get(), deadline - loop.time())
+                    except asyncio.TimeoutError:
+                        break
+                    if message is None:
+                        done = True
                         break
-                    for handler in self.handlers:
-                        try:
-                            await handler(message.body.decode("utf-8"))
-                        except Exception as e:
-                            SingletonLoggerSafe.error(f"Handler failed: {e}")
-    
+                    batch.append(message)
+
+                if self.stop_event.is_set():
+                    break # leave the batch unacked, the broker redelivers it
+                await self._process_batch(batch)
+        finally:
+            pump_task.cancel()
+            await asyncio.gather(pump_task, return_exceptions=True)
+
+    async def _process_batch(self, batch: List[aio_pika.abc.AbstractIncomingMessage]):
+        for message in batch:
+            self.metrics.received(message)
+        payloads = []
+        positions = [] # batch index of each decoded payload
+        undecodable = []
+        for i, message in enumerate(batch):
+            try:
+                payloads.append(self._decode(message))
+                positions.append(i)
+            except Exception as e:
+                SingletonLoggerSafe.error(f"Failed to decode message: {e}")
+                undecodable.append(i)
+
+        results = []
+        if payloads:
+            results = await asyncio.gather(
+                *(self._run_handler(handler, timeout, payloads)
+                  for handler, timeout in zip(self.batch_handlers, self.batch_handler_timeouts)),
+                return_exceptions=True)
+
+        failed: Set[int] = set()
+        for result in results:
+            if isinstance(result, BaseException):
+                failed = set(positions)
+                break
+            failed.update(positions[i] for i in (result or []) if 0 <= i < len(positions))
+
+        if failed:
+            SingletonLoggerSafe.error(
+                f"{len(failed)} of {len(batch)} messages in batch failed (policy: {self.failure_policy})")
+            if self.failure_policy == "ack":
+                failed = set()
+
+        republished = {"retry": 0, "parked": 0}
+        if self.retries is not None:
+            # republished messages are acked with the rest of the batch
+            kept = []
+            for i in undecodable:
+                if await self._republish(self.retries.park(batch[i], "Failed to decode message")):
+                    republished["parked"] += 1
+                else:
+                    kept.append(i)
+            undecodable = kept
+            kept = set()
+            for i in sorted(failed):
+                retried = await self._republish(self.retries.retry(batch[i], "Batch handler failed"))
+                if retried is None:
+                    kept.add(i)
+                else:
+                    republished["retry" if retried else "parked"] += 1
+            failed = kept
+
+        requeue = self.failure_policy in ("requeue", "retry")
+        try:
+            for i in undecodable:
+                await batch[i].nack(requeue=False)
+            for i in sorted(failed):
+                await batch[i].nack(requeue=requeue)
+            settled = failed.union(undecodable)
+            succeeded = [message for i, message in enumerate(batch) if i not in settled]
+            if succeeded:
+                await succeeded[-1].ack(multiple=True)
+        except Exception as e:
+            SingletonLoggerSafe.error(f"Failed to settle batch: {e}")
+        finally:
+            self.metrics.settled("reject", len(undecodable) + (0 if requeue else len(failed)))
+            self.metrics.settled("requeue", len(failed) if requeue else 0)
+            for outcome, count in republished.items():
+                self.metrics.settled(outcome, count)
+            self.metrics.settled("ack", len(batch) - len(undecodable) - len(failed) - sum(republished.values()))
+
+    async def _republish(self, republish: Awaitable) -> Optional[bool]:
+        """Returns the result of the republish (True: retry, False: parked), None on failure"""
+        try:
+            result = await republish
+            return result is not False
+        except Exception as e:
+            SingletonLoggerSafe.error(f"Failed to republish message: {e}")
+            return None
+
     def _register_sig_handler(self):
         loop = asyncio.get_running_loop()
         loop.add_signal_handler(signal.SIGINT, self.stop_event.set)
-        loop.add_signal_handler(signal.SIGTERM, self.stop_event.set)
\ No newline at end of file
+        loop.add_signal_handler(signal.SIGTERM, self.stop_event.set)
@@ -0,0 +1,127 @@
+import time
+from datetime import datetime, timezone
+from typing import Optional
+import aio_pika
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+_families = None
+_servers = set()
+
+def _metric_families() -> dict:
+    # prometheus metrics are process-wide, create them once and label them per queue
+    global _families
+    if _families is None:
+        _families = {
+            "received": prometheus_client.Counter(
+                "mq_messages_received_total", "Messages delivered to the consumer", ["queue"]),
+            "settled": prometheus_client.Counter(
+                "mq_messages_settled_total", "Messages settled, by outcome", ["queue", "outcome"]),
+            "inflight": prometheus_client.Gauge(
+                "mq_messages_inflight", "Messages received but not yet settled", ["queue"]),
+            "handler_latency": prometheus_client.Histogram(
+                "mq_handler_latency_seconds", "Handler call latency", ["queue", "handler", "status"],
+                buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)),
+            "time_in_queue": prometheus_client.Histogram(
+                "mq_time_in_queue_seconds", "Time between publish and delivery, from the message timestamp", ["queue"],
+                buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)),
+            "handoff_depth": prometheus_client.Gauge(
+                "handoff_queue_depth", "Items waiting in memory for the publisher", ["queue"]),
+            "handoff_journal_depth": prometheus_client.Gauge(
+                "handoff_journal_depth", "Items spilled to the overflow journal, not yet replayed", ["queue"]),
+            "handoff_spilled": prometheus_client.Counter(
+                "handoff_spilled_total", "Items spilled to the overflow journal, by reason", ["queue", "reason"]),
+            "handoff_replayed": prometheus_client.Counter(
+                "handoff_replayed_total", "Items replayed from the overflow journal", ["queue"]),
+            "handoff_blocked": prometheus_client.Counter(
+                "handoff_blocked_seconds_total", "Time producers waited on a full queue", ["queue"]),
+        }
+    return _families
+
+def start_metrics_server(port: int):
+    """Serve /metrics on port, once per process"""
+    if prometheus_client is None:
+        raise ImportError("prometheus_client is not installed")
+    if port not in _servers:
+        prometheus_client.start_http_server(port)
+        _servers.add(port)
+
+class ConsumerMetrics:
+    """Per-queue consumer metrics. All methods are no-ops when disabled."""
+    def __init__(self, queue_name: str, enabled: bool = True):
+        self.enabled = enabled
+        if not enabled:
+            return
+        if prometheus_client is None:
+            raise ImportError("prometheus_client is not installed")
+        families = _metric_families()
+        self.received_total = families["received"].labels(queue_name)
+        self.inflight_gauge = families["inflight"].labels(queue_name)
+        self.time_in_queue = families["time_in_queue"].labels(queue_name)
+        self.settled_total = families["settled"]
+        self.handler_latency_hist = families["handler_latency"]
+        self.queue_name = queue_name
+
+    def received(self, message: aio_pika.abc.AbstractIncomingMessage):
+        if not self.enabled:
+            return
+        self.received_total.inc()
+        self.inflight_gauge.inc()
+        published = message.timestamp
+        if isinstance(published, datetime):
+            if published.tzinfo is None:
+                published = published.replace(tzinfo=timezone.utc)
+            self.time_in_queue.observe(max(0.0, time.time() - published.timestamp()))
+
+    def settled(self, outcome: str, count: int = 1):
+        """outcome: ack | requeue | reject | retry | parked"""
+        if not self.enabled:
+            return
+        self.settled_total.labels(self.queue_name, outcome).inc(count)
+        self.inflight_gauge.dec(count)
+
+    def handler_latency(self, handler: str, seconds: float, status: Optional[str] = "ok"):
+        if not self.enabled:
+            return
+        self.handler_latency_hist.labels(self.queue_name, handler, status).observe(seconds)
+
+class HandoffMetrics:
+    """Per-queue metrics of a producer to publisher handoff. All methods are no-ops when disabled."""
+    def __init__(self, queue_name: str, enabled: bool = True):
+        self.enabled = enabled
+        if not enabled:
+            return
+        if prometheus_client is None:
+            raise ImportError("prometheus_client is not installed")
+        families = _metric_families()
+        self.depth_gauge = families["handoff_depth"].labels(queue_name)
+        self.journal_gauge = families["handoff_journal_depth"].labels(queue_name)
+        self.replayed_total = families["handoff_replayed"].labels(queue_name)
+        self.blocked_total = families["handoff_blocked"].labels(queue_name)
+        self.spilled_total = families["handoff_spilled"]
+        self.queue_name = queue_name
+
+    def depth(self, queued: int, journaled: int):
+        if not self.enabled:
+            return
+        self.depth_gauge.set(queued)
+        self.journal_gauge.set(journaled)
+
+    def spilled(self, reason: str, count: int = 1):
+        """reason: full | publish_failed"""
+        if not self.enabled:
+            return
+        self.spilled_total.labels(self.queue_name, reason).inc(count)
+
+    def replayed(self, count: int):
+        if not self.enabled:
+            return
+        self.replayed_total.inc(count)
+
+    def blocked(self, seconds: float):
+        if not self.enabled:
+            return
+        self.blocked_total.inc(seconds)
@@ -0,0 +1,93 @@
+from typing import List, Optional
+import aio_pika
+from common.logger import SingletonLoggerSafe
+
+RETRY_COUNT_HEADER = "x-retry-count"
+LAST_ERROR_HEADER = "x-last-error"
+DEFAULT_RETRY_BASE_DELAY_MS = 5000
+DEFAULT_RETRY_BACKOFF = 3
+DEFAULT_MAX_RETRIES = 4
+
+def backoff_delays(base_delay_ms: int, factor: float, max_retries: int) -> List[int]:
+    return [int(base_delay_ms * factor ** i) for i in range(max_retries)]
+
+class RetryTopology:
+    """Delayed retry queues and a parking queue for one work queue.
+
+    A failed message is republished to <queue>.retry.<delay>ms, which has a message TTL
+    of <delay> and dead-letters expired messages back to <queue> through the default
+    exchange. Each attempt moves to the next, longer delay. Once the retries are used
+    up, or if the message can never succeed, it goes to <queue>.parking. Callers ack the
+    original after a successful republish, so failing messages leave the hot queue
+    immediately.
+    """
+    def __init__(
+            self,
+            queue_name: str,
+            base_delay_ms: int = DEFAULT_RETRY_BASE_DELAY_MS,
+            backoff: float = DEFAULT_RETRY_BACKOFF,
+            max_retries: int = DEFAULT_MAX_RETRIES):
+        self.queue_name = queue_name
+        self.delays_ms = backoff_delays(base_delay_ms, backoff, max_retries)
+        self.retry_queue_names = [f"{queue_name}.retry.{delay}ms" for delay in self.delays_ms]
+        self.parking_queue_name = f"{queue_name}.parking"
+        self.channel: Optional[aio_pika.abc.AbstractChannel] = None
+
+    async def declare(self, channel: aio_pika.abc.AbstractChannel):
+        for name, delay in zip(self.retry_queue_names, self.delays_ms):
+            await channel.declare_queue(
+                name,
+                durable=True,
+                arguments={
+                    "x-message-ttl": delay,
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": self.queue_name,
+                })
+        await channel.declare_queue(self.parking_queue_name, durable=True)
+        self.channel = channel
+
+    @staticmethod
+    def attempts(message: aio_pika.abc.AbstractIncomingMessage) -> int:
+        try:
+            return int((message.headers or {}).get(RETRY_COUNT_HEADER, 0))
+        except (TypeError, ValueError):
+            return 0
+
+    async def retry(self, message: aio_pika.abc.AbstractIncomingMessage, reason: str) -> bool:
+        """Republish to the next retry queue, or park when out of retries.
+        Returns True if the message was scheduled for retry."""
+        attempt = self.attempts(message)
+        if attempt >= len(self.retry_queue_names):
+            await self.park(message, reason)
+            return False
+        await self._republish(message, self.retry_queue_names[attempt], attempt + 1, reason)
+        SingletonLoggerSafe.info(
+            f"Message scheduled for retry {attempt + 1}/{len(self.delays_ms)} in {self.delays_ms[attempt]}ms")
+        return True
+
+    async def park(self, message: aio_pika.abc.AbstractIncomingMessage, reason: str):
+        await self._republish(message, self.parking_queue_name, self.attempts(message), reason)
+        SingletonLoggerSafe.error(f"Message parked in {self.parking_queue_name}: {reason}")
+
+    async def _republish(
+            self,
+            message: aio_pika.abc.AbstractIncomingMessage,
+            routing_key: str,
+            attempt: int,
+            reason: str):
+        if self.channel is None:
+            raise Exception("Retry topology not declared")
+        headers = dict(message.headers or {})
+        headers[RETRY_COUNT_HEADER] = attempt
+        headers[LAST_ERROR_HEADER] = reason[:500]
+        await self.channel.default_exchange.publish(
+            aio_pika.Message(
+                body=message.body,
+                headers=headers,
+                content_type=message.content_type,
+                content_encoding=message.content_encoding,
+                message_id=message.message_id,
+                timestamp=message.timestamp,
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=routing_key)
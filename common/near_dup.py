@@ -0,0 +1,93 @@
+import time
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+from news_model.fingerprint import SIMHASH_BITS, hamming_distance
+from news_model.message import ArticlePayload
+
+DEFAULT_DEDUP_WINDOW = 6 * 3600 # seconds
+DEFAULT_MAX_DISTANCE = 3 # bits
+
+class NearDuplicateIndex:
+    """Recent article fingerprints, answers "have we seen this story" in a few dict lookups.
+
+    Exact copies match on content_hash. Near copies match on simhash within max_distance
+    bits: the 64 bits are split into max_distance + 1 bands, and two hashes that close
+    must agree on at least one whole band, so only articles sharing a band are compared.
+    Entries older than window seconds are forgotten.
+    """
+    def __init__(self, window: float = DEFAULT_DEDUP_WINDOW, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.window = window
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = SIMHASH_BITS // self.bands
+        self.lock = threading.Lock()
+        self.exact: Dict[str, str] = {}
+        self.band_index: List[Dict[int, Set[Tuple[int, str]]]] = [{} for _ in range(self.bands)]
+        self.entries = deque() # (added_at, article_id, content_hash, simhash), oldest first
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _band_keys(self, fingerprint: int):
+        mask = (1 << self.band_bits) - 1
+        for band in range(self.bands):
+            yield band, fingerprint >> (band * self.band_bits) & mask
+
+    def find(self, article: ArticlePayload, now: Optional[float] = None) -> Optional[str]:
+        """article_id of a recent duplicate of article, or None"""
+        if not article.content_hash:
+            return None
+        with self.lock:
+            self._evict(time.time() if now is None else now)
+            return self._find(article)
+
+    def check_and_add(self, article: ArticlePayload, now: Optional[float] = None) -> Optional[str]:
+        """Like find, and remembers article when it is not a duplicate"""
+        if not article.content_hash:
+            article.fingerprint()
+        if not article.content_hash:
+            # no body extracted, nothing to compare
+            return None
+        now = time.time() if now is None else now
+        with self.lock:
+            self._evict(now)
+            original = self._find(article)
+            if original is None:
+                self._add(article, now)
+            # a redelivered article matches itself
+            return None if original == article.article_id else original
+
+    def _find(self, article: ArticlePayload) -> Optional[str]:
+        if article.content_hash in self.exact:
+            return self.exact[article.content_hash]
+        if not article.simhash:
+            return None
+        fingerprint = int(article.simhash, 16)
+        for band, key in self._band_keys(fingerprint):
+            for candidate, article_id in self.band_index[band].get(key, ()):
+                if hamming_distance(fingerprint, candidate) <= self.max_distance:
+                    return article_id
+        return None
+
+    def _add(self, article: ArticlePayload, now: float):
+        fingerprint = int(article.simhash, 16) if article.simhash else None
+        self.exact[article.content_hash] = article.article_id
+        if fingerprint is not None:
+            for band, key in self._band_keys(fingerprint):
+                self.band_index[band].setdefault(key, set()).add((fingerprint, article.article_id))
+        self.entries.append((now, article.article_id, article.content_hash, fingerprint))
+
+    def _evict(self, now: float):
+        while self.entries and self.entries[0][0] < now - self.window:
+            _, article_id, digest, fingerprint = self.entries.popleft()
+            if self.exact.get(digest) == article_id:
+                del self.exact[digest]
+            if fingerprint is None:
+                continue
+            for band, key in self._band_keys(fingerprint):
+                bucket = self.band_index[band].get(key)
+                if bucket is not None:
+                    bucket.discard((fingerprint, article_id))
+                    if not bucket:
+                        del self.band_index[band][key]
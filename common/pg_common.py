@@ -1,4 +1,4 @@
-from typing import TypedDict
+from typing import NotRequired, TypedDict
 
 class PostgresConfig(TypedDict):
     host: str
@@ -6,4 +6,5 @@ class PostgresConfig(TypedDict):
     user: str
     password: str
     database: str
-    table_name: str
\ No newline at end of file
+    table_name: str
+    pool_size: NotRequired[int]
@@ -0,0 +1,180 @@
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, List, Optional, Tuple
+from common.logger import SingletonLoggerSafe
+from common.mq_metrics import HandoffMetrics
+
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_PUT_TIMEOUT = 5 # seconds a producer waits on a full queue before spilling
+REPLAY_BATCH = 16
+
+class SpillJournal:
+    """Append-only overflow journal in a SQLite file, read back oldest first. Survives restarts.
+
+    Entries read back are claimed, not removed: they stay in the file, in flight, until
+    acknowledged. Entries still in flight when the journal is opened (the last run stopped
+    before handing them on) are waiting again."""
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS spilled (id INTEGER PRIMARY KEY AUTOINCREMENT, body TEXT NOT NULL, spilled_at REAL NOT NULL, "
+            "in_flight INTEGER NOT NULL DEFAULT 0)")
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(spilled)")]
+        if "in_flight" not in columns:
+            # journals written before entries were claimed
+            self.conn.execute("ALTER TABLE spilled ADD COLUMN in_flight INTEGER NOT NULL DEFAULT 0")
+        self.conn.execute("UPDATE spilled SET in_flight = 0 WHERE in_flight = 1")
+        self.size = self.conn.execute("SELECT COUNT(*) FROM spilled").fetchone()[0]
+
+    def __len__(self) -> int:
+        """Entries waiting, not counting those in flight"""
+        return self.size
+
+    def append(self, body: str):
+        with self.lock:
+            self.conn.execute("INSERT INTO spilled (body, spilled_at) VALUES (?, ?)", (body, time.time()))
+            self.size += 1
+
+    def claim(self, count: int) -> List[Tuple[int, str]]:
+        """Up to count of the oldest waiting entries as (id, body), marked in flight"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, body FROM spilled WHERE in_flight = 0 ORDER BY id LIMIT ?", (count,)).fetchall()
+            if rows:
+                self.conn.executemany("UPDATE spilled SET in_flight = 1 WHERE id = ?", [(row_id,) for row_id, _ in rows])
+                self.size -= len(rows)
+        return rows
+
+    def ack(self, row_id: int):
+        """Remove a claimed entry, it was handed on"""
+        with self.lock:
+            self.conn.execute("DELETE FROM spilled WHERE id = ?", (row_id,))
+
+    def unclaim(self, row_id: int):
+        """Put a claimed entry back in line, in its old place"""
+        with self.lock:
+            if self.conn.execute("UPDATE spilled SET in_flight = 0 WHERE id = ? AND in_flight = 1", (row_id,)).rowcount:
+                self.size += 1
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class SpillQueue:
+    """Bounded handoff from producer threads to an asyncio consumer, with backpressure.
+
+    put() (producer thread) waits up to put_timeout for room, which slows the producer
+    down, then spills the item to a disk journal instead of growing memory. Items the
+    consumer fails to hand on are spilled too. get() (event loop) serves the in-memory
+    queue first and replays the journal when the queue runs empty. A replayed item leaves
+    the journal only at its task_done(), so one lost in a crash is replayed by the next
+    run. There is one consumer: task_done() is for the oldest item got and not yet done.
+    """
+    def __init__(
+            self,
+            loop: asyncio.AbstractEventLoop,
+            journal_path: str,
+            encode: Callable[[Any], str],
+            decode: Callable[[str], Any],
+            maxsize: int = DEFAULT_QUEUE_SIZE,
+            put_timeout: float = DEFAULT_PUT_TIMEOUT,
+            metrics: Optional[HandoffMetrics] = None):
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1, got {maxsize}")
+        self.loop = loop
+        # (journal id or None, item)
+        self.queue: asyncio.Queue[Tuple[Optional[int], Any]] = asyncio.Queue(maxsize)
+        self.journal = SpillJournal(journal_path)
+        # journal ids of the items got and not yet done, in get order
+        self.taken: Deque[Optional[int]] = deque()
+        self.encode = encode
+        self.decode = decode
+        self.put_timeout = put_timeout
+        self.metrics = metrics or HandoffMetrics("", enabled=False)
+        if len(self.journal):
+            SingletonLoggerSafe.info(f"{len(self.journal)} spilled items to replay from {journal_path}")
+        self._update_depth()
+
+    def _update_depth(self):
+        self.metrics.depth(self.queue.qsize(), len(self.journal))
+
+    async def _put(self, item) -> bool:
+        # the timeout runs on the loop, so the item is either queued or not, never both
+        try:
+            await asyncio.wait_for(self.queue.put((None, item)), timeout=self.put_timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._update_depth()
+        return True
+
+    def put(self, item) -> bool:
+        """From a producer thread: True if queued, False if spilled to the journal"""
+        start = time.monotonic()
+        queued = asyncio.run_coroutine_threadsafe(self._put(item), self.loop).result()
+        self.metrics.blocked(time.monotonic() - start)
+        if not queued:
+            self.spill(item, "full")
+        return queued
+
+    def spill(self, item, reason: str = "full"):
+        self.journal.append(self.encode(item))
+        self.metrics.spilled(reason)
+        self._update_depth()
+        SingletonLoggerSafe.info(f"Spilled item to the overflow journal ({reason}), {len(self.journal)} waiting")
+
+    async def get(self, timeout: Optional[float] = None):
+        """Next item, or None after timeout seconds without one"""
+        if self.queue.empty() and len(self.journal):
+            await self._replay()
+        try:
+            row_id, item = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.taken.append(row_id)
+        self._update_depth()
+        return item
+
+    async def _replay(self):
+        rows = await asyncio.to_thread(self.journal.claim, min(REPLAY_BATCH, self.queue.maxsize))
+        replayed = 0
+        for row_id, body in rows:
+            try:
+                item = self.decode(body)
+            except Exception as e:
+                SingletonLoggerSafe.error(f"Dropping unreadable spilled item: {e}")
+                await asyncio.to_thread(self.journal.ack, row_id)
+                continue
+            try:
+                self.queue.put_nowait((row_id, item))
+                replayed += 1
+            except asyncio.QueueFull:
+                # producers refilled the queue meanwhile, keep it for a later replay
+                await asyncio.to_thread(self.journal.unclaim, row_id)
+        self.metrics.replayed(replayed)
+        self._update_depth()
+
+    def task_done(self):
+        """The oldest item got was handed on, or spilled again"""
+        row_id = self.taken.popleft()
+        if row_id is not None:
+            self.journal.ack(row_id)
+        self.queue.task_done()
+
+    def empty(self) -> bool:
+        """True when nothing is waiting in memory; the journal is kept for the next run"""
+        return self.queue.empty()
+
+    async def join(self):
+        await self.queue.join()
+
+    def close(self):
+        self.journal.close()
@@ -0,0 +1,27 @@
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+# incoming RabbitMQ messages for the consumer tests
+
+def tracked_message(body):
+    """Message whose process() records whether it was acked, requeued or rejected"""
+    message = MagicMock()
+    message.body.decode.return_value = body
+    message.outcome = None
+
+    @asynccontextmanager
+    async def process(requeue=False, **kwargs):
+        try:
+            yield message
+            message.outcome = "ack"
+        except BaseException:
+            message.outcome = "requeue" if requeue else "reject"
+            raise
+    message.process = process
+    return message
+
+def batch_message(body, tag):
+    message = AsyncMock()
+    message.body = body.encode()
+    message.delivery_tag = tag
+    return message
@@ -0,0 +1,26 @@
+import pytest
+from common.adaptive_interval import AdaptiveInterval
+
+def test_quiet_period_backs_off_to_max():
+    interval = AdaptiveInterval(5, 60)
+    assert interval.update(0, 5) == 60
+
+def test_burst_polls_at_min():
+    interval = AdaptiveInterval(5, 60)
+    assert interval.update(10, 10) == 5
+
+def test_interval_follows_arrival_rate():
+    interval = AdaptiveInterval(1, 600, smoothing=1)
+    # one article every 20s
+    assert interval.update(3, 60) == pytest.approx(20)
+
+def test_backs_off_gradually_after_burst():
+    interval = AdaptiveInterval(5, 60)
+    interval.update(10, 10)
+    intervals = [interval.update(0, interval.interval) for _ in range(5)]
+    assert intervals == sorted(intervals)
+    assert intervals[0] < 60
+
+def test_invalid_bounds():
+    with pytest.raises(ValueError):
+        AdaptiveInterval(10, 5)
@@ -0,0 +1,38 @@
+from unittest import mock
+from common.card_extract import CARD_SCRIPT, CardField, extract_cards, extract_cards_from_html
+
+def test_one_round_trip_for_all_cards():
+    driver = mock.MagicMock()
+    driver.execute_script.return_value = [
+        {"index": 0, "href": "https://a/2", "title": "two"},
+        {"index": 1, "href": "https://a/1", "title": None},
+    ]
+    fields = {"href": CardField(attribute="href"), "title": CardField(selector=".title")}
+
+    cards = extract_cards(driver, ".card", fields)
+
+    driver.execute_script.assert_called_once_with(CARD_SCRIPT, ".card", fields)
+    driver.find_elements.assert_not_called()
+    assert [card["href"] for card in cards] == ["https://a/2", "https://a/1"]
+
+def test_no_cards():
+    driver = mock.MagicMock()
+    driver.execute_script.return_value = None
+    assert extract_cards(driver, ".card", {"title": CardField()}) == []
+
+def test_cards_from_saved_markup():
+    html = """
+    <div class="card" data-id="c2"><a href="/news/2/"><time datetime="2026-10-18">now</time></a>
+      <span class="title"> two </span></div>
+    <div class="card" data-id="c1"><a href="/news/1/">one</a></div>
+    """
+    fields = {
+        "href": CardField(selector="a:has(time)", attribute="href"),
+        "title": CardField(selector=".title"),
+        "card_id": CardField(attribute="data-id"),
+    }
+    cards = extract_cards_from_html(html, ".card", fields, base_url="https://www.tradingview.com/news-flow/")
+    assert cards == [
+        {"index": 0, "href": "https://www.tradingview.com/news/2/", "title": "two", "card_id": "c2"},
+        {"index": 1, "href": None, "title": None, "card_id": "c1"},
+    ]
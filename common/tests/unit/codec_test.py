@@ -0,0 +1,77 @@
+import pytest
+from common.codec import (
+    CodecRegistry, JsonCodec, MsgpackCodec, OrjsonCodec, SCHEMA_VERSION_HEADER, ZSTD_ENCODING,
+    decode_message, decompress, default_codecs, encode_message, msgpack, orjson, zstandard)
+from news_model.message import ArticlePayload
+
+@pytest.fixture
+def article():
+    return ArticlePayload(article_id="test_001", title="标题", content="content")
+
+def test_json_codec_round_trip(article):
+    codec = JsonCodec()
+    data = codec.encode(article.to_dict())
+
+    assert ArticlePayload.from_dict(codec.decode(data)) == article
+    # compatible with the legacy to_json/from_json format
+    assert ArticlePayload.from_json(data.decode("utf-8")) == article
+    assert ArticlePayload.from_dict(codec.decode(article.to_json().encode())) == article
+
+@pytest.mark.skipif(orjson is None, reason="orjson not installed")
+def test_orjson_codec_reads_json(article):
+    assert ArticlePayload.from_dict(OrjsonCodec().decode(JsonCodec().encode(article.to_dict()))) == article
+
+@pytest.mark.skipif(msgpack is None, reason="msgpack not installed")
+def test_msgpack_codec_round_trip(article):
+    codec = MsgpackCodec()
+    assert ArticlePayload.from_dict(codec.decode(codec.encode(article.to_dict()))) == article
+
+def test_registry_selects_by_content_type():
+    json_codec = JsonCodec()
+    registry = CodecRegistry(json_codec)
+
+    assert registry.get(None) is json_codec
+    assert registry.get("application/json; charset=utf-8") is json_codec
+    with pytest.raises(ValueError):
+        registry.get("application/x-unknown")
+
+def test_default_codecs():
+    registry = default_codecs()
+    assert registry.get().content_type == "application/json"
+
+def test_from_dict_ignores_unknown_fields(article):
+    assert ArticlePayload.from_dict({**article.to_dict(), "added_later": 1}) == article
+
+@pytest.mark.skipif(zstandard is None or msgpack is None, reason="zstandard or msgpack not installed")
+def test_compressed_msgpack_message_round_trip(article):
+    article.content = "新闻内容 " * 500
+    message = encode_message(article.to_dict(), MsgpackCodec(), compressed=True, schema_version=ArticlePayload.SCHEMA_VERSION)
+
+    assert message.content_type == "application/msgpack"
+    assert message.content_encoding == ZSTD_ENCODING
+    assert message.headers[SCHEMA_VERSION_HEADER] == ArticlePayload.SCHEMA_VERSION
+    assert len(message.body) < len(article.content.encode())
+    assert ArticlePayload.from_dict(decode_message(message, default_codecs())) == article
+
+@pytest.mark.skipif(zstandard is None, reason="zstandard not installed")
+def test_small_bodies_are_not_compressed(article):
+    message = encode_message(article.to_dict(), JsonCodec(), compressed=True)
+    assert message.content_encoding is None
+    # plain JSON, readable by consumers that predate the binary format
+    assert ArticlePayload.from_json(message.body.decode("utf-8")) == article
+
+def test_unknown_content_encoding():
+    with pytest.raises(ValueError):
+        decompress(b"data", "br")
+
+def test_messages_for_version_1_consumers(article):
+    v1_fields = {"article_id", "time", "title", "content", "analysis", "error"}
+    # unset fingerprints are left out of current messages too
+    assert set(article.to_dict()) == v1_fields
+
+    article.fingerprint()
+    assert {"content_hash", "simhash"} <= set(article.to_dict())
+    data = article.to_dict(schema_version=1)
+    assert set(data) == v1_fields
+    # version 1 consumers pass every key to the constructor
+    assert ArticlePayload(**data).content == article.content
@@ -0,0 +1,123 @@
+import threading
+import pytest
+from unittest import mock
+from common.dedup_store import MemoryDedupStore, SqliteDedupStore, normalize_url
+from common.utils import cached_fetcher
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://WWW.TradingView.com/news/abc/?utm_source=x&b=2&a=1#top") \
+        == "https://www.tradingview.com/news/abc?a=1&b=2"
+    assert normalize_url("https://www.tradingview.com/news/abc") \
+        == normalize_url("https://www.tradingview.com/news/abc/")
+
+def test_sqlite_store_survives_restart(tmp_path):
+    path = str(tmp_path / "dedup.db")
+    store = SqliteDedupStore(path)
+    store.add("https://a")
+    store.close()
+
+    store = SqliteDedupStore(path)
+    assert store.seen("https://a")
+    assert not store.seen("https://b")
+    store.close()
+
+def test_sqlite_store_expires_entries(tmp_path):
+    store = SqliteDedupStore(str(tmp_path / "dedup.db"), ttl=60)
+    with mock.patch("common.dedup_store.time.time", return_value=1000):
+        store.add("https://a")
+    with mock.patch("common.dedup_store.time.time", return_value=1100):
+        assert not store.seen("https://a")
+        assert store.evict() == 1
+    store.close()
+
+def test_memory_store():
+    store = MemoryDedupStore(2)
+    store.add("a")
+    assert store.seen("a")
+    assert not store.seen("b")
+
+def test_cached_fetcher_dedups_on_key(tmp_path):
+    calls = []
+
+    @cached_fetcher(20, key=lambda link: normalize_url(link), store=lambda _: SqliteDedupStore(str(tmp_path / "dedup.db")))
+    def fetch(link):
+        calls.append(link)
+        return None if "fail" in link else link
+
+    assert fetch("https://a/x") == "https://a/x"
+    assert fetch("https://A/x/?utm_medium=rss") is None
+    fetch("https://a/fail")
+    fetch("https://a/fail") # failed fetches are retried
+    assert calls == ["https://a/x", "https://a/fail", "https://a/fail"]
+
+def test_only_ref_itself_is_a_tracking_param():
+    assert normalize_url("https://a/x?ref=rss&referrer=home&reference=7") \
+        == "https://a/x?reference=7&referrer=home"
+
+@pytest.mark.parametrize("make_store", [
+    lambda tmp_path: MemoryDedupStore(20),
+    lambda tmp_path: SqliteDedupStore(str(tmp_path / "dedup.db")),
+])
+def test_reserve_and_release(tmp_path, make_store):
+    store = make_store(tmp_path)
+    assert store.reserve("a")
+    assert not store.reserve("a")
+    # a claim is not an entry
+    assert not store.seen("a")
+    store.release("a")
+    assert store.reserve("a")
+    store.add("a")
+    assert store.seen("a")
+    assert not store.reserve("a")
+    store.close()
+
+def test_sqlite_reserve_is_shared_between_connections(tmp_path):
+    first = SqliteDedupStore(str(tmp_path / "dedup.db"), ttl=3600, lease=60)
+    second = SqliteDedupStore(str(tmp_path / "dedup.db"), ttl=3600, lease=60)
+    with mock.patch("common.dedup_store.time.time", return_value=1000):
+        assert first.reserve("a")
+        assert not second.reserve("a")
+    first.close()
+    # the claimer died without releasing, the lease runs out and frees the key
+    with mock.patch("common.dedup_store.time.time", return_value=1100):
+        assert not second.seen("a")
+        assert second.reserve("a")
+        second.add("a")
+    with mock.patch("common.dedup_store.time.time", return_value=1200):
+        assert not second.reserve("a")
+    second.close()
+
+def test_cached_fetcher_records_only_successes(tmp_path):
+    path = str(tmp_path / "dedup.db")
+
+    @cached_fetcher(20, key=lambda link: link, store=lambda _: SqliteDedupStore(path))
+    def fetch(link):
+        return None if "fail" in link else link
+
+    fetch("https://a/x")
+    fetch("https://a/fail")
+    store = SqliteDedupStore(path)
+    assert store.seen("https://a/x")
+    assert not store.seen("https://a/fail")
+    assert store.reserve("https://a/fail")
+    store.close()
+
+def test_cached_fetcher_runs_concurrent_calls_once():
+    calls = []
+    started = threading.Event()
+    finish = threading.Event()
+
+    @cached_fetcher(20)
+    def fetch(link):
+        calls.append(link)
+        started.set()
+        finish.wait(5)
+        return link
+
+    thread = threading.Thread(target=fetch, args=("https://a/x",))
+    thread.start()
+    started.wait(5)
+    assert fetch("https://a/x") is None # being fetched by the thread
+    finish.set()
+    thread.join()
+    assert calls == ["https://a/x"]
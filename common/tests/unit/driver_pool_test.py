@@ -0,0 +1,71 @@
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from common.driver_pool import DriverPool
+
+def fake_driver():
+    driver = MagicMock()
+    driver.execute_script.return_value = 1
+    return driver
+
+def test_sessions_are_created_on_demand_and_reused():
+    factory = MagicMock(side_effect=fake_driver)
+    prepare = MagicMock()
+    pool = DriverPool(factory, size=2, prepare=prepare)
+
+    with pool.lease() as first:
+        pass
+    with pool.lease() as second:
+        pass
+
+    assert first is second
+    factory.assert_called_once()
+    prepare.assert_called_once_with(first)
+
+def test_pool_is_bounded():
+    pool = DriverPool(fake_driver, size=2)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work():
+        with pool.lease(timeout=5):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak[0] == 2
+    assert len(pool.sessions) == 2
+
+def test_unhealthy_session_is_replaced():
+    pool = DriverPool(fake_driver, size=1)
+    with pool.lease() as broken:
+        pass
+    broken.execute_script.side_effect = Exception("session deleted")
+
+    with pool.lease() as driver:
+        assert driver is not broken
+    broken.quit.assert_called_once()
+    assert pool.sessions == [driver]
+
+def test_close_quits_all_sessions():
+    pool = DriverPool(fake_driver, size=2)
+    with pool.lease() as first:
+        with pool.lease() as second:
+            pass
+    pool.close()
+    first.quit.assert_called_once()
+    second.quit.assert_called_once()
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        DriverPool(fake_driver, size=0)
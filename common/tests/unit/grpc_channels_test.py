@@ -0,0 +1,42 @@
+import json
+import pytest
+from common.grpc_channels import GrpcChannelRegistry, resolve_target, service_config
+
+def test_resolve_target():
+    assert resolve_target("mock_executor:50051") == "dns:///mock_executor:50051"
+    assert resolve_target("dns:///gateway:50053") == "dns:///gateway:50053"
+    assert resolve_target("ipv4:10.0.0.1:50051") == "ipv4:10.0.0.1:50051"
+
+def test_service_config():
+    config = json.loads(service_config())
+    assert config["loadBalancingConfig"] == [{"round_robin": {}}]
+    methods = {
+        (entry["name"][0]["service"], entry["name"][0]["method"]): entry
+        for entry in config["methodConfig"]}
+    # every method called from python has a deadline
+    assert methods[("trading_executor.TradeExecutor", "ExecuteTrade")]["timeout"] == "30s"
+    assert methods[("analysispush.AnalysisPushGateway", "Push")]["timeout"] == "600s"
+    # a trade is never retried, the push is
+    assert "retryPolicy" not in methods[("trading_executor.TradeExecutor", "ExecuteTrade")]
+    retry = methods[("analysispush.AnalysisPushGateway", "Push")]["retryPolicy"]
+    assert retry["retryableStatusCodes"] == ["UNAVAILABLE"]
+
+def test_service_config_without_retries():
+    config = json.loads(service_config(retry_methods=[]))
+    assert all("retryPolicy" not in entry for entry in config["methodConfig"])
+
+def test_channels_are_shared_per_target():
+    registry = GrpcChannelRegistry()
+    channel = registry.channel("localhost:50051")
+    assert registry.channel("localhost:50051") is channel
+    assert registry.channel("localhost:50052") is not channel
+    registry.close()
+    assert registry.channels == {}
+
+@pytest.mark.asyncio
+async def test_aio_channels_are_shared_per_target():
+    registry = GrpcChannelRegistry()
+    channel = registry.aio_channel("localhost:50053")
+    assert registry.aio_channel("localhost:50053") is channel
+    await registry.aclose()
+    assert dict(registry.aio_channels) == {}
@@ -0,0 +1,84 @@
+import os
+import threading
+import pytest
+from unittest import mock
+from common.html_archive import HtmlArchive
+
+PAGE = "<html><body><h1>Title</h1>" + "<p>text</p>" * 200 + "</body></html>"
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = HtmlArchive(str(tmp_path / "archive"))
+    yield archive
+    archive.close()
+
+def test_put_stores_compressed_page_by_content(archive):
+    key = archive.put("https://a/news/1?utm_source=x", PAGE, "Title")
+    archive.flush()
+
+    assert key == HtmlArchive.content_key(PAGE)
+    assert archive.get(key) == PAGE
+    assert os.path.getsize(archive.path(key)) < len(PAGE)
+    assert archive.get("0" * 32) is None
+
+def test_same_content_stored_once(archive):
+    first = archive.put("https://a/news/1", PAGE)
+    second = archive.put("https://a/news/1/", PAGE)
+    archive.put("https://a/news/2", PAGE + "<!-- changed -->")
+    archive.flush()
+
+    assert first == second
+    snapshots = archive.lookup("https://a/news/1")
+    assert [s.key for s in snapshots] == [first, first]
+    assert len(list(archive.snapshots())) == 3
+
+def test_page_file_without_row_is_indexed_again(archive):
+    key = archive.put("https://a/news/1", PAGE)
+    archive.flush()
+    # as after a crash between the file write and the index update
+    with archive.lock:
+        archive.conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+
+    archive.put("https://a/news/1", PAGE)
+    archive.flush()
+
+    row = archive.conn.execute("SELECT size FROM pages WHERE key = ?", (key,)).fetchone()
+    assert row == (os.path.getsize(archive.path(key)),)
+    archive.max_bytes = 1
+    assert archive.prune() == 1
+    assert not os.path.exists(archive.path(key))
+
+def test_prune_by_age_and_size(tmp_path):
+    archive = HtmlArchive(str(tmp_path / "archive"), max_age=60, max_bytes=None)
+    with mock.patch("common.html_archive.time.time", return_value=1000):
+        old = archive.put("https://a/old", PAGE)
+        archive.flush()
+    new = archive.put("https://a/new", PAGE + "new")
+    archive.flush()
+
+    assert archive.prune() == 1
+    assert archive.get(old) is None
+    assert archive.lookup("https://a/old") == []
+    assert archive.get(new) is not None
+
+    archive.max_bytes = 1
+    assert archive.prune() == 1
+    assert archive.get(new) is None
+    archive.close()
+
+def test_full_queue_drops_snapshot(tmp_path):
+    archive = HtmlArchive(str(tmp_path / "archive"), queue_size=1)
+    release = threading.Event()
+    writing = threading.Event()
+
+    def slow_write(*args):
+        writing.set()
+        release.wait(5)
+
+    with mock.patch.object(archive, "_write", side_effect=slow_write):
+        assert archive.put("https://a/1", PAGE) is not None
+        writing.wait(5)
+        assert archive.put("https://a/2", PAGE) is not None
+        assert archive.put("https://a/3", PAGE) is None
+        release.set()
+        archive.close()
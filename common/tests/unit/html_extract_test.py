@@ -0,0 +1,66 @@
+from pathlib import Path
+import pytest
+from unittest import mock
+from bs4 import BeautifulSoup
+from common import html_extract
+from common.html_extract import extract_article, article_subtree, TRADINGVIEW_RULE, INVESTING_RULE
+from news_model.message import ArticlePayload
+
+CORPUS = Path(__file__).parent / "html_corpus"
+
+# the extraction the scrapers did before, full page through html.parser
+def legacy_tradingview(html_text):
+    soup = BeautifulSoup(html_text, 'html.parser')
+    title = soup.find('h1', class_='title-KX2tCBZq')
+    content = soup.find('div', class_='body-KX2tCBZq')
+    return ArticlePayload(
+        title=title.text.strip() if title else "No Title",
+        content="\n".join(p.get_text(strip=True) for p in content.find_all('p')) if content else "No Content")
+
+def legacy_investing(html_text):
+    soup = BeautifulSoup(html_text, 'html.parser')
+    title_tag = soup.find('h1', id='articleTitle')
+    title = title_tag.get_text(strip=True) if title_tag else ''
+    article = soup.find('div', id='article')
+    content = []
+    if article is not None:
+        for tag in article.find_all(['p', 'div'], recursive=True):
+            if tag.name == 'div' and tag.get('id') == 'article-newsletter-hook':
+                break
+            if tag.name == 'p':
+                content.append(tag.get_text(strip=True))
+    return ArticlePayload(
+        title=title if title else "No Title",
+        content="\n".join(content) if content else "No Content")
+
+PAGES = [
+    ("tradingview_article.html", TRADINGVIEW_RULE, legacy_tradingview),
+    ("investing_article.html", INVESTING_RULE, legacy_investing),
+]
+
+@pytest.mark.parametrize("parser", ["lexbor", "soup"])
+@pytest.mark.parametrize("page, rule, legacy", PAGES)
+def test_matches_legacy_extraction(page, rule, legacy, parser):
+    html = (CORPUS / page).read_text(encoding="utf-8")
+    if parser == "soup":
+        with mock.patch.object(html_extract, "LexborHTMLParser", None):
+            article = extract_article(html, rule)
+    else:
+        article = extract_article(html, rule)
+    expected = legacy(html)
+    assert (article.title, article.content) == (expected.title, expected.content)
+    assert article.content.count("\n") >= 9
+
+def test_stop_selector_ends_content():
+    html = (CORPUS / "investing_article.html").read_text(encoding="utf-8")
+    assert "Sign up for our newsletter" not in extract_article(html, INVESTING_RULE).content
+
+def test_falls_back_to_whole_page_without_anchor():
+    html = '<div class="body-KX2tCBZq"><p>one</p></div><h1 class="title-KX2tCBZq">Title</h1>'
+    article = extract_article(html, TRADINGVIEW_RULE)
+    assert (article.title, article.content) == ("Title", "one")
+    assert article_subtree(html, None) is None
+
+def test_missing_article():
+    article = extract_article("<html><body><p>nothing</p></body></html>", TRADINGVIEW_RULE)
+    assert (article.title, article.content) == ("No Title", "No Content")
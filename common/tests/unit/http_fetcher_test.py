@@ -0,0 +1,69 @@
+import asyncio
+import pickle
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from common.http_fetcher import HttpPageFetcher
+
+SELENIUM_COOKIES = [
+    {"name": "sessionid", "value": "abc", "domain": ".tradingview.com", "path": "/"},
+    {"name": "device_t", "value": "xyz", "domain": "www.tradingview.com", "path": "/"},
+]
+
+def recording_transport(status=200, text="<div class='body-KX2tCBZq'><p>news</p></div>"):
+    requests = []
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(status, text=text)
+    return httpx.MockTransport(handler), requests
+
+def test_fetch_sends_browser_cookies_and_user_agent():
+    transport, requests = recording_transport()
+    fetcher = HttpPageFetcher(SELENIUM_COOKIES, transport=transport)
+    fetcher.set_user_agent("test-agent")
+
+    html = fetcher.fetch("https://www.tradingview.com/news/abc/")
+
+    assert "body-KX2tCBZq" in html
+    cookie_header = requests[0].headers["cookie"]
+    assert "sessionid=abc" in cookie_header and "device_t=xyz" in cookie_header
+    assert requests[0].headers["user-agent"] == "test-agent"
+    fetcher.close()
+
+def test_fetch_returns_none_on_error_status():
+    transport, _ = recording_transport(status=403, text="blocked")
+    fetcher = HttpPageFetcher(transport=transport)
+    assert fetcher.fetch("https://www.tradingview.com/news/abc/") is None
+    fetcher.close()
+
+def test_from_cookie_file(tmp_path):
+    path = tmp_path / "cookies.pkl"
+    with open(path, "wb") as file:
+        pickle.dump(SELENIUM_COOKIES, file)
+    transport, requests = recording_transport()
+
+    fetcher = HttpPageFetcher.from_cookie_file(str(path), transport=transport)
+    fetcher.fetch("https://www.tradingview.com/news/abc/")
+
+    assert "sessionid=abc" in requests[0].headers["cookie"]
+    fetcher.close()
+
+def test_threads_share_one_async_client():
+    in_flight = []
+    peak = []
+    async def handler(request):
+        in_flight.append(request)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.05)
+        in_flight.remove(request)
+        return httpx.Response(200, text=str(request.url))
+    fetcher = HttpPageFetcher(transport=httpx.MockTransport(handler))
+    urls = [f"https://www.tradingview.com/news/{n}/" for n in range(4)]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pages = list(executor.map(fetcher.fetch, urls))
+
+    assert pages == urls
+    # the requests overlapped on the fetcher's loop
+    assert max(peak) > 1
+    fetcher.close()
+    fetcher.close()
@@ -0,0 +1,93 @@
+import io
+import json
+import logging
+import threading
+import pytest
+from unittest import mock
+from common.logger import SingletonLoggerSafe, _LogPipeline, _PayloadFormatter, parse_sample_rates
+
+def new_sink():
+    sink = logging.StreamHandler(io.StringIO())
+    sink.setFormatter(logging.Formatter("%(message)s"))
+    return sink
+
+def new_record(msg: str):
+    return logging.makeLogRecord({"msg": msg, "levelno": logging.INFO, "levelname": "INFO"})
+
+def test_pipeline_writes_in_order():
+    sink = new_sink()
+    pipeline = _LogPipeline([sink], capacity=100, batch_size=10)
+    for i in range(50):
+        pipeline.put(new_record(f"msg{i}"))
+    assert pipeline.flush(timeout=5)
+
+    assert sink.stream.getvalue().splitlines() == [f"msg{i}" for i in range(50)]
+    pipeline.close()
+
+def test_pipeline_drop_newest_when_full():
+    sink = new_sink()
+    pipeline = _LogPipeline([sink], capacity=2, batch_size=10, overflow="drop_newest")
+    gate = threading.Event()
+    with mock.patch.object(pipeline, "_write", side_effect=lambda records: gate.wait()):
+        pipeline.put(new_record("first"))     # picked up by the writer, which then stalls
+        assert not pipeline.flush(timeout=0.1)
+        for i in range(5):
+            pipeline.put(new_record(f"msg{i}"))
+        assert len(pipeline.buffer) == 2
+        assert pipeline.total_dropped == 3
+        gate.set()
+        assert pipeline.flush(timeout=5)
+    pipeline.close()
+
+def test_pipeline_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        _LogPipeline([new_sink()], overflow="spill")
+
+@pytest.mark.asyncio
+async def test_async_logging_does_not_use_threads():
+    with mock.patch("asyncio.to_thread") as to_thread:
+        await SingletonLoggerSafe.ainfo("async info")
+        await SingletonLoggerSafe.component("test").aerror("async error")
+    to_thread.assert_not_called()
+    assert SingletonLoggerSafe.flush(timeout=5)
+
+def payload_record(fields: dict, full: bool):
+    record = new_record("payload")
+    record.component = "test"
+    record.fields = fields
+    record.full_payload = full
+    return record
+
+def test_formatter_truncates_unsampled_fields():
+    formatter = _PayloadFormatter("%(message)s", structured=True, field_limit=10)
+    entry = json.loads(formatter.format(payload_record({"prompt": "x" * 100}, full=False)))
+
+    assert entry["component"] == "test"
+    assert entry["truncated"] is True
+    assert entry["fields"]["prompt"] == "x" * 10 + "...(+90 chars)"
+
+def test_formatter_keeps_full_payload_and_defers_callables():
+    formatter = _PayloadFormatter("%(message)s", structured=True, field_limit=10)
+    render = mock.Mock(return_value="y" * 100)
+    record = payload_record({"prompt": render, "row": {"id": 1}}, full=True)
+    render.assert_not_called()
+
+    entry = json.loads(formatter.format(record))
+    assert entry["fields"] == {"prompt": "y" * 100, "row": '{"id": 1}'}
+    assert entry["truncated"] is False
+
+def test_component_sampling(mocker):
+    adapter = SingletonLoggerSafe.component("test")
+    emitted = mocker.patch.object(adapter.logger, "_log")
+
+    adapter.sample_rate = 0.0
+    adapter.info("info", fields={"prompt": "p"})
+    adapter.error("error", fields={"prompt": "p"})
+    adapter.sample_rate = 1.0
+    adapter.info("sampled", fields={"prompt": "p"})
+
+    full = [c.kwargs["extra"]["full_payload"] for c in emitted.call_args_list]
+    assert full == [False, True, True]
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("Agent=0.1, *=0,bad,PostgresWriter=2") == {"Agent": 0.1, "*": 0.0, "PostgresWriter": 1.0}
@@ -0,0 +1,83 @@
+import pytest
+from unittest import mock
+from unittest.mock import AsyncMock, MagicMock
+from common.mq_connection import MQConnectionManager
+
+def fake_connection():
+    connection = AsyncMock()
+    connection.is_closed = False
+    connection.reconnect_callbacks = MagicMock()
+    connection.close_callbacks = MagicMock()
+    return connection
+
+@pytest.mark.asyncio
+async def test_shared_connection_is_reused():
+    connection = fake_connection()
+    with mock.patch("common.mq_connection.aio_pika.connect_robust", return_value=connection) as connect:
+        first = MQConnectionManager.shared("localhost", "guest", "guest")
+        second = MQConnectionManager.shared("localhost", "guest", "guest")
+        assert first is second
+        await first.connect()
+        await second.connect()
+
+    connect.assert_awaited_once()
+    assert first.healthy
+    assert first.users == 2
+
+@pytest.mark.asyncio
+async def test_connection_closes_with_last_user():
+    connection = fake_connection()
+    manager = MQConnectionManager("localhost", "guest", "guest")
+    with mock.patch("common.mq_connection.aio_pika.connect_robust", return_value=connection):
+        await manager.connect()
+        await manager.connect()
+
+    await manager.release()
+    connection.close.assert_not_awaited()
+    await manager.release()
+    connection.close.assert_awaited_once()
+    assert not manager.healthy
+
+@pytest.mark.asyncio
+async def test_channels():
+    connection = fake_connection()
+    manager = MQConnectionManager("localhost", "guest", "guest")
+    with mock.patch("common.mq_connection.aio_pika.connect_robust", return_value=connection):
+        await manager.connect()
+
+    channel = await manager.consume_channel(prefetch_count=8)
+    channel.set_qos.assert_awaited_once_with(prefetch_count=8)
+
+    async with manager.publish_channel() as first:
+        pass
+    async with manager.publish_channel() as second:
+        pass
+    assert first is second # returned to the pool and reused
+
+@pytest.mark.asyncio
+async def test_connect_gives_up():
+    manager = MQConnectionManager("localhost", "guest", "guest")
+    with mock.patch("common.mq_connection.aio_pika.connect_robust", side_effect=ConnectionError("refused")):
+        with pytest.raises(ConnectionError):
+            await manager.connect()
+    assert manager.users == 0
+
+@pytest.mark.asyncio
+async def test_reconnect_and_close_events():
+    connection = fake_connection()
+    manager = MQConnectionManager("localhost", "guest", "guest")
+    with mock.patch("common.mq_connection.aio_pika.connect_robust", return_value=connection):
+        await manager.connect()
+    events = []
+    manager.on_close(lambda exc: events.append(("close", exc)))
+    manager.on_reconnect(lambda: events.append(("reconnect", None)))
+    lost = ConnectionResetError("lost")
+
+    manager._on_close(connection, lost)
+    assert not manager.connected.is_set()
+    # a robust connection is not closed while it reconnects
+    assert not manager.healthy
+    manager._on_reconnect(connection)
+    assert manager.connected.is_set()
+    assert manager.healthy
+    assert events == [("close", lost), ("reconnect", None)]
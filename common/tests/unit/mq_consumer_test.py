@@ -1,10 +1,13 @@
 import pytest
 from unittest import mock
 from unittest.mock import AsyncMock, MagicMock
-from common.mq_consumer import RabbitMQConsumer
+from common.mq_consumer import RabbitMQConsumer, DEFAULT_BATCH_SIZE
 import asyncio
 from contextlib import asynccontextmanager
 from common.logger import SingletonLoggerSafe
+from common.codec import CodecRegistry, JsonCodec
+from common.tests.mq_messages import batch_message, tracked_message
+from news_model.message import ArticlePayload
 
 @pytest.fixture
 def consumer():
@@ -18,6 +21,8 @@ def consumer():
 @pytest.mark.asyncio
 async def test_connect_success(consumer):
     mock_connection = AsyncMock()
+    mock_connection.reconnect_callbacks = MagicMock()
+    mock_connection.close_callbacks = MagicMock()
     mock_channel = AsyncMock()
     mock_queue = AsyncMock()
     mock_connection.channel.return_value = mock_channel
@@ -71,10 +76,338 @@ async def test_shutdown(consumer):
     consumer.queue = MagicMock()
     consumer.channel = AsyncMock()
     consumer.connection = AsyncMock()
+    consumer.mq = AsyncMock()
     consumer.stop_event = MagicMock()
     
     await consumer.shutdown()
 
     consumer.stop_event.set.assert_called()
     consumer.channel.close.assert_awaited()
-    consumer.connection.close.assert_awaited()
+    consumer.mq.release.assert_awaited()
+
+
+def fake_queue(bodies):
+    messages = []
+    for body in bodies:
+        message = MagicMock()
+        message.body.decode.return_value = body
+        message.process.return_value = AsyncMock()
+        messages.append(message)
+
+    async def message_iter():
+        for message in messages:
+            yield message
+
+    @asynccontextmanager
+    async def fake_iterator():
+        yield message_iter()
+
+    queue = AsyncMock()
+    queue.iterator = fake_iterator
+    return queue, messages
+
+@pytest.mark.asyncio
+async def test_connect_sets_qos():
+    consumer = RabbitMQConsumer(
+        {"host": "localhost",
+        "queue_name": "test",
+        "username": "guest",
+        "password": "guest",
+        "concurrency": 4,
+        "prefetch_count": 12})
+    mock_connection = AsyncMock()
+    mock_connection.reconnect_callbacks = MagicMock()
+    mock_connection.close_callbacks = MagicMock()
+    mock_channel = AsyncMock()
+    mock_connection.channel.return_value = mock_channel
+
+    with mock.patch("common.mq_consumer.aio_pika.connect_robust", return_value=mock_connection):
+        await consumer.connect()
+
+    mock_channel.set_qos.assert_awaited_with(prefetch_count=12)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("batch, prefetch", [(False, 2), (True, 2 * DEFAULT_BATCH_SIZE)])
+async def test_default_prefetch_follows_handler_kind(batch, prefetch):
+    consumer = RabbitMQConsumer(
+        {"host": "localhost", "queue_name": "test", "username": "guest", "password": "guest"})
+    if batch:
+        consumer.with_batch_handler(AsyncMock())
+    else:
+        consumer.with_handler(AsyncMock())
+    mock_connection = AsyncMock()
+    mock_connection.reconnect_callbacks = MagicMock()
+    mock_connection.close_callbacks = MagicMock()
+    mock_channel = AsyncMock()
+    mock_connection.channel.return_value = mock_channel
+
+    with mock.patch("common.mq_consumer.aio_pika.connect_robust", return_value=mock_connection):
+        await consumer.connect()
+
+    mock_channel.set_qos.assert_awaited_with(prefetch_count=prefetch)
+    await consumer.shutdown()
+
+@pytest.mark.asyncio
+async def test_consume_concurrency_is_bounded():
+    consumer = RabbitMQConsumer(
+        {"host": "localhost",
+        "queue_name": "test",
+        "username": "guest",
+        "password": "guest",
+        "concurrency": 3})
+    consumer.queue, messages = fake_queue([f"msg{i}" for i in range(10)])
+
+    running = 0
+    peak = 0
+    async def handler(body):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    consumer.with_handler(handler)
+    await consumer.consume()
+
+    assert peak == 3
+    for message in messages:
+        message.process.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_consume_preserves_order_per_key():
+    consumer = RabbitMQConsumer(
+        {"host": "localhost",
+        "queue_name": "test",
+        "username": "guest",
+        "password": "guest",
+        "concurrency": 4})
+    bodies = ["a:1", "b:1", "a:2", "b:2", "a:3"]
+    consumer.queue, _ = fake_queue(bodies)
+
+    processed = []
+    async def handler(body):
+        # earlier messages sleep longer, so without ordering they would finish last
+        await asyncio.sleep(0.01 * (4 - int(body.split(":")[1])))
+        processed.append(body)
+
+    consumer.with_handler(handler)
+    consumer.with_ordering_key(lambda body: body.split(":")[0])
+    await consumer.consume()
+
+    assert [b for b in processed if b.startswith("a")] == ["a:1", "a:2", "a:3"]
+    assert [b for b in processed if b.startswith("b")] == ["b:1", "b:2"]
+    assert consumer._key_tails == {}
+
+@pytest.mark.asyncio
+async def test_handlers_run_concurrently(consumer):
+    async def slow_handler(body):
+        await asyncio.sleep(0.1)
+
+    consumer.with_handler(slow_handler).with_handler(slow_handler).with_handler(slow_handler)
+    message = tracked_message("msg")
+
+    start = asyncio.get_running_loop().time()
+    await consumer._process_message(message, "msg")
+    elapsed = asyncio.get_running_loop().time() - start
+
+    assert elapsed < 0.25
+    assert message.outcome == "ack"
+
+@pytest.mark.parametrize("policy, outcome", [
+    ("ack", "ack"),
+    ("requeue", "requeue"),
+    ("dead_letter", "reject"),
+])
+@pytest.mark.asyncio
+async def test_handler_timeout_failure_policy(policy, outcome):
+    consumer = RabbitMQConsumer(
+        {"host": "localhost",
+        "queue_name": "test",
+        "username": "guest",
+        "password": "guest",
+        "handler_timeout": 0.05,
+        "failure_policy": policy})
+    ok_handler = AsyncMock()
+    async def hung_handler(body):
+        await asyncio.sleep(10)
+
+    consumer.with_handler(ok_handler).with_handler(hung_handler)
+    message = tracked_message("msg")
+    await consumer._process_message(message, "msg")
+
+    ok_handler.assert_awaited_once_with("msg")
+    assert message.outcome == outcome
+
+def test_unknown_failure_policy():
+    with pytest.raises(ValueError):
+        RabbitMQConsumer(
+            {"host": "localhost",
+            "queue_name": "test",
+            "username": "guest",
+            "password": "guest",
+            "failure_policy": "bounce"})
+
+@pytest.mark.asyncio
+async def test_consume_batches_multi_ack_and_nack_failed():
+    consumer = RabbitMQConsumer(
+        {"host": "localhost",
+        "queue_name": "test",
+        "username": "guest",
+        "password": "guest",
+        "batch_size": 3,
+        "batch_timeout_ms": 50,
+        "failure_policy": "dead_letter"})
+    messages = [batch_message(f"msg{i}", i) for i in range(5)]
+
+    async def message_iter():
+        for message in messages:
+            yield message
+
+    @asynccontextmanager
+    async def fake_iterator():
+        yield message_iter()
+
+    consumer.channel = AsyncMock()
+    consumer.queue = AsyncMock()
+    consumer.queue.iterator = fake_iterator
+
+    batches = []
+    async def batch_handler(bodies):
+        batches.append(bodies)
+        return [2] if len(bodies) == 3 else None # last item of the first batch fails
+
+    consumer.with_batch_handler(batch_handler)
+    await consumer.consume()
+
+    assert batches == [["msg0", "msg1", "msg2"], ["msg3", "msg4"]]
+    messages[2].nack.assert_awaited_once_with(requeue=False)
+    messages[1].ack.assert_awaited_once_with(multiple=True)
+    messages[4].ack.assert_awaited_once_with(multiple=True)
+    for i in (0, 3):
+        messages[i].ack.assert_not_awaited()
+        messages[i].nack.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_default_config_batches_are_not_capped_by_prefetch():
+    consumer = RabbitMQConsumer(
+        {"host": "localhost", "queue_name": "test", "username": "guest", "password": "guest",
+        "batch_timeout_ms": 50})
+    mock_connection = AsyncMock()
+    mock_connection.reconnect_callbacks = MagicMock()
+    mock_connection.close_callbacks = MagicMock()
+    mock_channel = AsyncMock()
+    mock_connection.channel.return_value = mock_channel
+    # connected before the batch handler is registered, as with "async with consumer"
+    with mock.patch("common.mq_consumer.aio_pika.connect_robust", return_value=mock_connection):
+        await consumer.connect()
+    mock_channel.set_qos.assert_awaited_with(prefetch_count=2)
+
+    messages = [batch_message(f"msg{i}", i) for i in range(5)]
+    async def message_iter():
+        for message in messages:
+            yield message
+    @asynccontextmanager
+    async def fake_iterator():
+        yield message_iter()
+    consumer.queue.iterator = fake_iterator
+    batches = []
+    async def batch_handler(bodies):
+        batches.append(bodies)
+    consumer.with_batch_handler(batch_handler)
+    await consumer.consume()
+
+    mock_channel.set_qos.assert_awaited_with(prefetch_count=2 * DEFAULT_BATCH_SIZE)
+    assert batches == [[f"msg{i}" for i in range(5)]]
+    await consumer.shutdown()
+
+@pytest.mark.asyncio
+async def test_batch_handler_exception_fails_whole_batch():
+    consumer = RabbitMQConsumer(
+        {"host": "localhost",
+        "queue_name": "test",
+        "username": "guest",
+        "password": "guest",
+        "failure_policy": "requeue"})
+    messages = [batch_message(f"msg{i}", i) for i in range(3)]
+    consumer.with_batch_handler(AsyncMock(side_effect=RuntimeError("db down")))
+
+    await consumer._process_batch(messages)
+
+    for message in messages:
+        message.nack.assert_awaited_once_with(requeue=True)
+        message.ack.assert_not_awaited()
+
+def test_cannot_mix_handler_kinds(consumer):
+    consumer.queue = AsyncMock()
+    consumer.with_handler(AsyncMock()).with_batch_handler(AsyncMock())
+    with pytest.raises(Exception):
+        asyncio.run(consumer.consume())
+
+@pytest.mark.asyncio
+async def test_consume_decodes_once_with_codec(consumer):
+    consumer.queue, messages = fake_queue([])
+    good = MagicMock()
+    good.body = b'{"article_id": "a1", "content": "text"}'
+    good.content_type = "application/json"
+    good.content_encoding = None
+    good.process.return_value = AsyncMock()
+    bad = MagicMock()
+    bad.body = b'not json'
+    bad.content_type = None
+    bad.content_encoding = None
+    bad.reject = AsyncMock()
+
+    async def message_iter():
+        yield good
+        yield bad
+
+    @asynccontextmanager
+    async def fake_iterator():
+        yield message_iter()
+    consumer.queue.iterator = fake_iterator
+
+    handler1 = AsyncMock()
+    handler2 = AsyncMock()
+    consumer.with_handler(handler1).with_handler(handler2)
+    consumer.with_codec(CodecRegistry(JsonCodec()), ArticlePayload.from_dict)
+    with mock.patch.object(JsonCodec, "decode", wraps=JsonCodec().decode) as decode:
+        await consumer.consume()
+
+    assert decode.call_count == 2
+    handler1.assert_awaited_once()
+    article = handler1.call_args[0][0]
+    assert isinstance(article, ArticlePayload) and article.article_id == "a1"
+    assert handler2.call_args[0][0] is article
+    bad.reject.assert_awaited_once_with(requeue=False)
+
+@pytest.mark.asyncio
+async def test_retry_policy_republishes_and_acks():
+    consumer = RabbitMQConsumer(
+        {"host": "localhost",
+        "queue_name": "test",
+        "username": "guest",
+        "password": "guest",
+        "failure_policy": "retry"})
+    consumer.retries.retry = AsyncMock(return_value=True)
+    consumer.with_handler(AsyncMock(side_effect=RuntimeError("weaviate down")))
+    message = tracked_message("msg")
+
+    await consumer._process_message(message, "msg")
+
+    consumer.retries.retry.assert_awaited_once()
+    assert message.outcome == "ack"
+
+@pytest.mark.asyncio
+async def test_retry_policy_requeues_when_republish_fails():
+    consumer = RabbitMQConsumer(
+        {"host": "localhost",
+        "queue_name": "test",
+        "username": "guest",
+        "password": "guest",
+        "failure_policy": "retry"})
+    consumer.retries.retry = AsyncMock(side_effect=RuntimeError("channel closed"))
+    consumer.with_handler(AsyncMock(side_effect=RuntimeError("weaviate down")))
+    message = tracked_message("msg")
+
+    await consumer._process_message(message, "msg")
+    assert message.outcome == "requeue"
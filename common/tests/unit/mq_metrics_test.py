@@ -0,0 +1,69 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+from prometheus_client import REGISTRY
+from common.mq_consumer import RabbitMQConsumer
+from common.mq_metrics import ConsumerMetrics
+from common.tests.mq_messages import tracked_message, batch_message
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def metered_consumer(queue_name, **config):
+    consumer = RabbitMQConsumer(
+        {"host": "localhost",
+        "queue_name": queue_name,
+        "username": "guest",
+        "password": "guest",
+        "metrics_port": 0,
+        **config})
+    return consumer
+
+def test_disabled_metrics_are_noops():
+    metrics = ConsumerMetrics("metrics_disabled", enabled=False)
+    metrics.received(MagicMock())
+    metrics.settled("ack")
+    metrics.handler_latency("handler", 0.1)
+    assert sample("mq_messages_received_total", queue="metrics_disabled") == 0
+
+def test_received_observes_time_in_queue():
+    metrics = ConsumerMetrics("metrics_tiq")
+    message = MagicMock()
+    message.timestamp = datetime.now(timezone.utc) - timedelta(seconds=2)
+
+    metrics.received(message)
+
+    assert sample("mq_messages_received_total", queue="metrics_tiq") == 1
+    assert sample("mq_messages_inflight", queue="metrics_tiq") == 1
+    assert sample("mq_time_in_queue_seconds_count", queue="metrics_tiq") == 1
+    assert sample("mq_time_in_queue_seconds_sum", queue="metrics_tiq") >= 2
+
+@pytest.mark.asyncio
+async def test_consumer_records_outcome_and_handler_latency():
+    consumer = metered_consumer("metrics_single", failure_policy="dead_letter")
+    async def failing_handler(body):
+        raise RuntimeError("boom")
+    consumer.with_handler(AsyncMock()).with_handler(failing_handler)
+    message = tracked_message("msg")
+
+    consumer.metrics.received(message)
+    await consumer._process_message(message, "msg")
+
+    assert message.outcome == "reject"
+    assert sample("mq_messages_settled_total", queue="metrics_single", outcome="reject") == 1
+    assert sample("mq_messages_inflight", queue="metrics_single") == 0
+    handler = failing_handler.__qualname__
+    assert sample("mq_handler_latency_seconds_count", queue="metrics_single", handler=handler, status="error") == 1
+
+@pytest.mark.asyncio
+async def test_batch_outcomes_are_counted():
+    consumer = metered_consumer("metrics_batch", failure_policy="requeue")
+    consumer.with_batch_handler(AsyncMock(return_value=[1]))
+    messages = [batch_message(f"msg{i}", i) for i in range(3)]
+
+    await consumer._process_batch(messages)
+
+    assert sample("mq_messages_received_total", queue="metrics_batch") == 3
+    assert sample("mq_messages_settled_total", queue="metrics_batch", outcome="ack") == 2
+    assert sample("mq_messages_settled_total", queue="metrics_batch", outcome="requeue") == 1
+    assert sample("mq_messages_inflight", queue="metrics_batch") == 0
@@ -0,0 +1,61 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from common.mq_retry import RetryTopology, backoff_delays, RETRY_COUNT_HEADER, LAST_ERROR_HEADER
+
+def incoming(headers=None):
+    message = MagicMock()
+    message.body = b'{"article_id": "a1"}'
+    message.headers = headers or {}
+    message.content_type = "application/json"
+    message.message_id = "m1"
+    message.timestamp = None
+    return message
+
+@pytest.fixture
+def topology():
+    return RetryTopology("articles", base_delay_ms=1000, backoff=2, max_retries=3)
+
+def test_backoff_delays():
+    assert backoff_delays(1000, 2, 3) == [1000, 2000, 4000]
+
+@pytest.mark.asyncio
+async def test_declare(topology):
+    channel = AsyncMock()
+    await topology.declare(channel)
+
+    names = [c.args[0] for c in channel.declare_queue.await_args_list]
+    assert names == ["articles.retry.1000ms", "articles.retry.2000ms", "articles.retry.4000ms", "articles.parking"]
+    arguments = channel.declare_queue.await_args_list[1].kwargs["arguments"]
+    assert arguments == {
+        "x-message-ttl": 2000,
+        "x-dead-letter-exchange": "",
+        "x-dead-letter-routing-key": "articles",
+    }
+
+@pytest.mark.asyncio
+async def test_retry_moves_to_next_delay(topology):
+    channel = AsyncMock()
+    await topology.declare(channel)
+
+    assert await topology.retry(incoming({RETRY_COUNT_HEADER: 1}), "boom")
+
+    published, = channel.default_exchange.publish.await_args_list
+    assert published.kwargs["routing_key"] == "articles.retry.2000ms"
+    message = published.args[0]
+    assert message.headers[RETRY_COUNT_HEADER] == 2
+    assert message.headers[LAST_ERROR_HEADER] == "boom"
+    assert message.body == b'{"article_id": "a1"}'
+    assert message.content_type == "application/json"
+
+@pytest.mark.asyncio
+async def test_retry_parks_when_exhausted(topology):
+    channel = AsyncMock()
+    await topology.declare(channel)
+
+    assert not await topology.retry(incoming({RETRY_COUNT_HEADER: 3}), "boom")
+    assert channel.default_exchange.publish.await_args.kwargs["routing_key"] == "articles.parking"
+
+@pytest.mark.asyncio
+async def test_retry_requires_declare(topology):
+    with pytest.raises(Exception):
+        await topology.retry(incoming(), "boom")
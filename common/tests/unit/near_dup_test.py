@@ -0,0 +1,56 @@
+import time
+from common.near_dup import NearDuplicateIndex
+from news_model.fingerprint import content_hash, hamming_distance, simhash
+from news_model.message import ArticlePayload
+
+STORY = ("美联储周三宣布维持基准利率不变，符合市场预期。鲍威尔表示，通胀仍高于目标，"
+         "未来政策将取决于数据。美股三大指数盘中震荡，纳斯达克指数收涨0.5%。") * 3
+
+def test_fingerprints_ignore_formatting():
+    assert content_hash("Fed holds rates, steady!") == content_hash("fed holds   rates steady")
+    assert hamming_distance(simhash(STORY), simhash(STORY + " 来源：Investing")) <= 3
+    assert hamming_distance(simhash(STORY), simhash("Apple unveils a new iPhone at its annual event")) > 3
+
+def test_near_duplicate_is_found():
+    index = NearDuplicateIndex()
+    original = ArticlePayload(article_id="tv-1", title="Fed holds", content=STORY)
+    copy = ArticlePayload(article_id="iv-7", title="Fed keeps rates", content="【快讯】" + STORY)
+    other = ArticlePayload(article_id="x-3", content="Apple unveils a new iPhone at its annual event")
+
+    assert index.check_and_add(original) is None
+    assert index.check_and_add(copy) == "tv-1"
+    assert index.check_and_add(other) is None
+    assert len(index) == 2
+
+def test_redelivered_article_is_not_its_own_duplicate():
+    index = NearDuplicateIndex()
+    article = ArticlePayload(article_id="tv-1", content=STORY)
+    assert index.check_and_add(article) is None
+    assert index.check_and_add(article) is None
+
+def test_entries_expire_after_window():
+    index = NearDuplicateIndex(window=60)
+    index.check_and_add(ArticlePayload(article_id="tv-1", content=STORY), now=1000)
+
+    assert index.find(ArticlePayload(content=STORY).fingerprint(), now=1030) == "tv-1"
+    assert index.find(ArticlePayload(content=STORY).fingerprint(), now=1100) is None
+    assert len(index) == 0
+    assert all(not band for band in index.band_index)
+
+def test_lookup_is_fast():
+    index = NearDuplicateIndex()
+    for i in range(5000):
+        index.check_and_add(ArticlePayload(article_id=str(i), content=f"headline {i} " * 20), now=1000)
+    probe = ArticlePayload(content=STORY).fingerprint()
+
+    start = time.perf_counter()
+    for _ in range(100):
+        index.find(probe, now=1000)
+    assert (time.perf_counter() - start) / 100 < 0.001
+
+def test_articles_without_content_are_not_indexed():
+    index = NearDuplicateIndex()
+    failed = [ArticlePayload(article_id=f"tv-{n}", title="Fed holds", content=ArticlePayload.NO_CONTENT) for n in range(2)]
+    assert [index.check_and_add(article) for article in failed] == [None, None]
+    assert failed[0].content_hash == "" and failed[0].simhash == ""
+    assert len(index) == 0
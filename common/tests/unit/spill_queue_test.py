@@ -0,0 +1,124 @@
+import asyncio
+import sqlite3
+import threading
+import pytest
+from prometheus_client import REGISTRY
+from common.mq_metrics import HandoffMetrics
+from common.spill_queue import SpillJournal, SpillQueue
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def new_queue(tmp_path, **kwargs):
+    return SpillQueue(
+        asyncio.get_running_loop(),
+        str(tmp_path / "spill.db"),
+        encode=str,
+        decode=int,
+        **kwargs)
+
+def test_journal_survives_restart(tmp_path):
+    journal = SpillJournal(str(tmp_path / "spill.db"))
+    for body in ("1", "2", "3"):
+        journal.append(body)
+    claimed = journal.claim(2)
+    assert [body for _, body in claimed] == ["1", "2"]
+    assert len(journal) == 1
+    journal.ack(claimed[0][0])
+    journal.close()
+
+    # "2" was claimed but never handed on
+    journal = SpillJournal(str(tmp_path / "spill.db"))
+    assert len(journal) == 2
+    assert [body for _, body in journal.claim(10)] == ["2", "3"]
+    assert journal.claim(10) == []
+    journal.close()
+
+def test_unclaimed_entry_keeps_its_place(tmp_path):
+    journal = SpillJournal(str(tmp_path / "spill.db"))
+    for body in ("1", "2"):
+        journal.append(body)
+    (first, _), _ = journal.claim(2)
+    journal.unclaim(first)
+    journal.unclaim(first)
+    assert len(journal) == 1
+    assert [body for _, body in journal.claim(10)] == ["1"]
+    journal.close()
+
+def test_journal_of_an_older_version_is_read(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "spill.db"))
+    conn.execute("CREATE TABLE spilled (id INTEGER PRIMARY KEY AUTOINCREMENT, body TEXT NOT NULL, spilled_at REAL NOT NULL)")
+    conn.execute("INSERT INTO spilled (body, spilled_at) VALUES ('1', 0)")
+    conn.commit()
+    conn.close()
+    journal = SpillJournal(str(tmp_path / "spill.db"))
+    assert [body for _, body in journal.claim(10)] == ["1"]
+    journal.close()
+
+@pytest.mark.asyncio
+async def test_full_queue_spills_and_replays_when_drained(tmp_path):
+    queue = new_queue(tmp_path, maxsize=2, put_timeout=0.05, metrics=HandoffMetrics("handoff_spill"))
+
+    # a producer thread outrunning the consumer
+    results = await asyncio.to_thread(lambda: [queue.put(i) for i in range(5)])
+
+    assert results == [True, True, False, False, False]
+    assert len(queue.journal) == 3
+    assert sample("handoff_spilled_total", queue="handoff_spill", reason="full") == 3
+    assert sample("handoff_journal_depth", queue="handoff_spill") == 3
+
+    items = []
+    while len(items) < 5:
+        items.append(await queue.get(timeout=1))
+        queue.task_done()
+    assert items == [0, 1, 2, 3, 4]
+    assert len(queue.journal) == 0
+    assert sample("handoff_replayed_total", queue="handoff_spill") == 3
+    assert await queue.get(timeout=0.01) is None
+    queue.close()
+
+@pytest.mark.asyncio
+async def test_put_waits_for_room(tmp_path):
+    queue = new_queue(tmp_path, maxsize=1, put_timeout=5)
+    assert await asyncio.to_thread(queue.put, 1)
+
+    producer = asyncio.create_task(asyncio.to_thread(queue.put, 2))
+    await asyncio.sleep(0.05)
+    assert not producer.done() # backpressure on the producer
+    assert await queue.get() == 1
+    assert await producer
+    assert await queue.get() == 2
+    assert len(queue.journal) == 0
+    queue.close()
+
+@pytest.mark.asyncio
+async def test_spilled_items_replayed_after_restart(tmp_path):
+    queue = new_queue(tmp_path)
+    queue.spill(7, "publish_failed")
+    queue.close()
+
+    queue = new_queue(tmp_path)
+    assert queue.empty()
+    assert await queue.get(timeout=1) == 7
+    queue.close()
+
+@pytest.mark.asyncio
+async def test_replayed_item_leaves_the_journal_when_done(tmp_path):
+    queue = new_queue(tmp_path)
+    queue.spill(7, "publish_failed")
+    queue.spill(8, "publish_failed")
+    assert await queue.get(timeout=1) == 7
+    queue.task_done()
+    assert await queue.get(timeout=1) == 8
+    # a crash before the second item is done
+    queue.close()
+
+    queue = new_queue(tmp_path)
+    assert await queue.get(timeout=1) == 8
+    queue.task_done()
+    queue.close()
+
+    queue = new_queue(tmp_path)
+    assert len(queue.journal) == 0
+    assert await queue.get(timeout=0.01) is None
+    queue.close()
@@ -0,0 +1,59 @@
+import os
+import asyncio
+import pytest
+from unittest import mock
+from unittest.mock import MagicMock
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from common.worker_pool import ProcessWorkerPool
+
+@pytest.mark.asyncio
+async def test_run_in_worker_process():
+    async with ProcessWorkerPool(2) as pool:
+        assert await pool.run(pow, 2, 10) == 1024
+        assert await pool.run(os.getpid) != os.getpid()
+
+def test_invalid_worker_count():
+    with pytest.raises(ValueError):
+        ProcessWorkerPool(0)
+
+@pytest.mark.asyncio
+async def test_broken_pool_is_replaced():
+    pool = ProcessWorkerPool(1)
+    broken = MagicMock()
+    broken.submit.side_effect = BrokenProcessPool("worker died")
+    pool.executor = broken
+
+    with pytest.raises(BrokenProcessPool):
+        await pool.run(pow, 2, 10)
+
+    broken.shutdown.assert_called_once()
+    assert await pool.run(pow, 2, 10) == 1024
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_broken_pool_is_replaced_once_for_calls_in_flight():
+    pool = ProcessWorkerPool(1)
+    futures = []
+    def submit(*args):
+        futures.append(Future())
+        return futures[-1]
+    broken = MagicMock()
+    broken.submit.side_effect = submit
+    pool.executor = broken
+
+    calls = asyncio.gather(*(pool.run(pow, 2, n) for n in range(3)), return_exceptions=True)
+    while len(futures) < 3:
+        await asyncio.sleep(0)
+    with mock.patch.object(pool, "_new_executor", wraps=pool._new_executor) as new_executor:
+        for future in futures:
+            future.set_exception(BrokenProcessPool("worker died"))
+        results = await calls
+        replacement = pool.executor
+
+    assert all(isinstance(result, BrokenProcessPool) for result in results)
+    new_executor.assert_called_once()
+    broken.shutdown.assert_called_once()
+    assert pool.executor is replacement
+    assert await pool.run(pow, 2, 10) == 1024
+    await pool.close()
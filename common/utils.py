@@ -1,63 +1,79 @@
 from functools import wraps
-from cachetools import LRUCache
-from typing import Callable
+from typing import Callable, Optional
 from common.logger import SingletonLoggerSafe
+from common.dedup_store import DedupStore, MemoryDedupStore
+from common.grpc_channels import channel_registry
+from common.mq_connection import MQConnectionManager, MQ_CONNECT_TIMEOUT
 import os
 import asyncio
 import aio_pika
 import time
-import grpc
+import threading
 from selenium.webdriver import Remote as RemoteWebDriver
 from selenium.webdriver.chrome.options import Options
 from proto import analysis_push_gateway_pb2 as pb2
 from proto import analysis_push_gateway_pb2_grpc as pb2_grpc
 
-MQ_CONNECT_TIMEOUT = 60 # seconds
-
-def cached_fetcher(maxsize: int):
+def cached_fetcher(
+        maxsize: int,
+        key: Optional[Callable[..., str]] = None,
+        store: Callable[[int], DedupStore] = MemoryDedupStore):
+    """Skip calls that were already fetched successfully (returned something) or are
+    being fetched.
+    key maps the call arguments to the dedup key, default all arguments. store builds
+    the dedup store from maxsize on first call, e.g. dedup_store_from_env for a
+    persistent one."""
     def decorator(func):
-        already_processed = LRUCache(maxsize)
+        already_processed: Optional[DedupStore] = None
+        lock = threading.Lock()
+
+        def processed_store() -> DedupStore:
+            nonlocal already_processed
+            with lock:
+                if already_processed is None:
+                    already_processed = store(maxsize)
+            return already_processed
+
+        def dedup_key(*args, **kwargs) -> str:
+            return key(*args, **kwargs) if key else str((args, tuple(sorted(kwargs.items()))))
 
         @wraps(func)
         def wrapper(*args, **kwargs):
-            key = (args, tuple(sorted(kwargs.items())))
-            if already_processed.get(key):
+            call_key = dedup_key(*args, **kwargs)
+            # claimed before the call, so concurrent callers of one key fetch it once;
+            # recorded as processed only once the call returned something
+            if not processed_store().reserve(call_key):
                 return
-            result = func(*args, **kwargs)
-            already_processed[key] = True
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                processed_store().release(call_key)
+                raise
+            if result is None:
+                processed_store().release(call_key)
+            else:
+                processed_store().add(call_key)
             return result
+
+        # tells a skipped call (already fetched) from a failed one, both return None
+        wrapper.processed = lambda *args, **kwargs: processed_store().seen(dedup_key(*args, **kwargs))
         return wrapper
     return decorator
 
 
 async def new_mq_channel(timeout = MQ_CONNECT_TIMEOUT) -> aio_pika.channel.Channel:
-    host = os.getenv("RABBITMQ_HOST", "rabbitmq")
-    username = os.getenv("RABBITMQ_USER", "admin")
-    password = os.getenv("RABBITMQ_PASS", "password")
-
-    connection = None
-    channel = None
-    giveup_time = time.time() + timeout
-    while time.time() < giveup_time:
-        try:
-            connection = await aio_pika.connect_robust(
-                host=host,
-                login=username,
-                password=password,
-                heartbeat=600,
-            )
-            channel = await connection.channel()
-            SingletonLoggerSafe.info(f"Connected to RabbitMQ")
-            return channel
-        except Exception as e:
-            SingletonLoggerSafe.error(f"Failed to connect to RabbitMQ: {e}")
-            await asyncio.sleep(5)
-    raise Exception("Failed to connect to RabbitMQ")
+    """A new channel on the process-wide RabbitMQ connection, see MQConnectionManager"""
+    manager = MQConnectionManager.from_env()
+    try:
+        await manager.connect(timeout)
+        return await manager.consume_channel()
+    except Exception as e:
+        raise Exception(f"Failed to connect to RabbitMQ: {e}")
 
 async def new_aws_conn(endpoint: str) -> pb2_grpc.AnalysisPushGatewayStub:
     """ Caller needs to handle the exception
     """
-    channel = grpc.aio.insecure_channel(endpoint)
+    channel = channel_registry().aio_channel(endpoint)
     stub = pb2_grpc.AnalysisPushGatewayStub(channel)
     return stub
 
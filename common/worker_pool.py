@@ -0,0 +1,56 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+from common.logger import SingletonLoggerSafe
+
+class ProcessWorkerPool:
+    """Runs CPU-bound functions in worker processes from asyncio code.
+
+    The asyncio parent keeps its connections and only ships arguments and results
+    across. initializer runs once in every worker, so expensive state such as a model
+    is loaded per worker, not per call. Functions and arguments must be picklable,
+    i.e. module level functions.
+    """
+    def __init__(self, workers: int, initializer: Optional[Callable] = None, initargs: tuple = ()):
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        self.workers = workers
+        self.initializer = initializer
+        self.initargs = initargs
+        self.lock = threading.Lock()
+        self.executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn, forking a parent with running threads (logger, torch) is unsafe
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=self.initializer,
+            initargs=self.initargs)
+
+    async def run(self, func: Callable, *args):
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool as e:
+            # a worker died (e.g. OOM killed), the executor is unusable from now on.
+            # Every call in flight fails with it, only the first one replaces it.
+            with self.lock:
+                if self.executor is executor:
+                    SingletonLoggerSafe.error(f"Worker process died, restarting pool: {e}")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self.executor = self._new_executor()
+            raise e
+
+    async def close(self):
+        await asyncio.to_thread(self.executor.shutdown, True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
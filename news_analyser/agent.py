@@ -4,6 +4,7 @@ from typing import Annotated, Optional, TypedDict
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from typing import List
 from langchain_openai import ChatOpenAI
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
 from langgraph.graph import StateGraph, END
 from news_analyser.tooling import get_prices, get_indicators
 from news_analyser.providers import LLMProvider
@@ -13,6 +14,9 @@ from langchain_core.runnables import RunnableSequence
 from langchain_core.output_parsers import JsonOutputParser
 from common.logger import SingletonLoggerSafe
 
+# LLM failures that are worth retrying later rather than recording as a failed analysis
+TRANSIENT_LLM_ERRORS = (APIConnectionError, APITimeoutError, InternalServerError, RateLimitError)
+
 class AgentState(TypedDict):
     messages: Annotated[List[HumanMessage | AIMessage], operator.add]
     news_text: str
@@ -27,6 +31,7 @@ class Agent:
     def __init__(self, provider: LLMProvider):
         self.state = AgentState(messages=[], news_text="", stock_symbol=None, prices=None, response=None)
         self.provider = provider
+        self.logger = SingletonLoggerSafe.component("Agent")
         self.llm = ChatOpenAI(
             model=provider.model_name,
             base_url=provider.base_url,
@@ -57,10 +62,10 @@ class Agent:
             news_text=state.get("news_text"),
             stock_identification_output_schema=json.dumps(STOCK_IDENTIFICATION_OUTPUT_SCHEMA, ensure_ascii=False)
         )
-        await SingletonLoggerSafe.ainfo(f"Prompt: {formatted_prompt.to_string()}")
+        await self.logger.ainfo("Identify prompt", fields={"prompt": formatted_prompt.to_string})
         try:
             response = await self.llm_identify.ainvoke(formatted_prompt.to_messages())
-            await SingletonLoggerSafe.ainfo(f"Response: {response}")
+            await self.logger.ainfo("Identify response", fields={"response": response})
             if  not response.get("stock_symbol"):
                 return {
                     "messages": [AIMessage(content="failed to identify stock. Response: " + json.dumps(response, ensure_ascii=False))],
@@ -84,7 +89,11 @@ class Agent:
                 "toolcalls": tool_call.tool_calls,
                 "stock_symbol": response.get("stock_symbol")
             }
+        except TRANSIENT_LLM_ERRORS as e:
+            await self.logger.aerror(f"LLM unavailable: {e}")
+            raise e
         except Exception as e:
+            await self.logger.aerror(f"Failed to identify stock: {e}", fields={"prompt": formatted_prompt.to_string})
             return {
                 "messages": [AIMessage(content=f"failed to identify stock: {str(e)}")],
                 "error": "failed to identify stock"
@@ -149,13 +158,17 @@ class Agent:
             indicators=json.dumps(indicators, ensure_ascii=False),
             stock_prediction_output_schema=json.dumps(STOCK_PREDICTION_OUTPUT_SCHEMA, ensure_ascii=False)
         )
-        await SingletonLoggerSafe.ainfo(f"Prompt: {formatted_prompt.to_string()}")
+        await self.logger.ainfo("Prediction prompt", fields={"prompt": formatted_prompt.to_string})
 
         try:
             response = await self.llm_predict.ainvoke(formatted_prompt.to_messages())
-            await SingletonLoggerSafe.ainfo(f"Response: {response}")
+            await self.logger.ainfo("Prediction response", fields={"response": response})
             return {"response": response}
+        except TRANSIENT_LLM_ERRORS as e:
+            await self.logger.aerror(f"LLM unavailable: {e}")
+            raise e
         except Exception as e:
+            await self.logger.aerror(f"Prediction failed: {e}", fields={"prompt": formatted_prompt.to_string})
             return {
                 "messages": [AIMessage(content=f"Prediction failed: {str(e)}")],
                 "error": "Prediction failed: " + str(e),
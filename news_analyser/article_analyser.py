@@ -1,14 +1,19 @@
+import os
 import time
 import asyncio
 import aio_pika
 import json
-from datetime           import datetime
+from datetime           import datetime, timezone
 from typing             import Optional, Tuple
 from proto import analysis_push_gateway_pb2 as pb2
 from proto import analysis_push_gateway_pb2_grpc as pb2_grpc
 
 from common.interface import NewsAnalyser
 from common.logger import SingletonLoggerSafe
+from common.codec import Codec, decode_message, default_codecs, encode_message
+from common.mq_retry import RetryTopology
+from common.mq_connection import MQConnectionManager
+from common.near_dup import NearDuplicateIndex
 from news_model.message import ArticlePayload
 from news_analyser.providers import LLMProvider
 from news_analyser.trade_policy import TradePolicy
@@ -19,16 +24,38 @@ from news_analyser.agent import Agent
 # timeout for push to AWS
 TIMEOUT_PUSH_TO_AWS = 600
 
+# decoders for incoming articles, selected by the message content type
+ARTICLE_CODECS = default_codecs()
+# encoding of outgoing articles
+ARTICLE_CODEC = ARTICLE_CODECS.get(os.getenv("ARTICLE_CONTENT_TYPE", "application/json"))
+ARTICLE_COMPRESSED = os.getenv("ARTICLE_COMPRESS", "0") == "1"
+# pin to the oldest schema the consumers read while they are being upgraded
+ARTICLE_SCHEMA_VERSION = int(os.getenv("ARTICLE_SCHEMA_VERSION", str(ArticlePayload.SCHEMA_VERSION)))
+# near-duplicates are dropped, or linked to the original and stored without analysis
+DEDUP_ACTION = os.getenv("DEDUP_ACTION", "drop")
+
 # Push processed article to processed articles queue
-async def push_to_processed_queue(queue: aio_pika.Queue, article: ArticlePayload):
+async def push_to_processed_queue(
+        queue_name: str,
+        article: ArticlePayload,
+        codec: Codec = ARTICLE_CODEC,
+        compressed: bool = ARTICLE_COMPRESSED,
+        schema_version: int = ARTICLE_SCHEMA_VERSION):
     try:
-        await SingletonLoggerSafe.ainfo(f"Pushing processed article to queue {queue.name}")
-        await queue.channel.default_exchange.publish(
-            aio_pika.Message(body=article.to_json().encode()),
-            routing_key=queue.name)
-        await SingletonLoggerSafe.ainfo(f"Message pushed to queue {queue.name}: {article.to_json()[:80]}...")
+        await SingletonLoggerSafe.ainfo(f"Pushing processed article to queue {queue_name}")
+        # a pooled publish channel, the consumer channels stay free for acks
+        async with MQConnectionManager.from_env().publish_channel() as channel:
+            await channel.default_exchange.publish(
+                encode_message(
+                    article.to_dict(schema_version),
+                    codec,
+                    compressed=compressed,
+                    schema_version=schema_version,
+                    timestamp=datetime.now(timezone.utc)),
+                routing_key=queue_name)
+        await SingletonLoggerSafe.ainfo(f"Message pushed to queue {queue_name}: article_id={article.article_id}")
     except Exception as e:
-        await SingletonLoggerSafe.aerror(f"Failed to push message to queue {queue.name}: {e}")
+        await SingletonLoggerSafe.aerror(f"Failed to push message to queue {queue_name}: {e}")
 
 # Push analysis results to AWS gateway
 async def push_to_aws_gateway(analysis_push_gateway: pb2_grpc.AnalysisPushGatewayStub, timeout: int, message: str):
@@ -36,7 +63,7 @@ async def push_to_aws_gateway(analysis_push_gateway: pb2_grpc.AnalysisPushGatewa
     await SingletonLoggerSafe.ainfo(f"Pushing analysis results to AWS at {time.ctime(start)}")
     try:
         response = await asyncio.wait_for(
-            analysis_push_gateway.Push(pb2.PushRequest(message=message)),
+            analysis_push_gateway.Push(pb2.PushRequest(message=message), timeout=timeout),
             timeout=timeout
         )
         await SingletonLoggerSafe.ainfo(f"PushResponse: status_code={response.status_code}, response_text={response.response_text}")
@@ -56,13 +83,32 @@ async def evaluate_trade_policy(trade_policy: TradePolicy, struct_result: dict):
 async def consume_message(
         message: aio_pika.IncomingMessage,
         analyser, trade_policy, analysis_push_gateway,
-        queue_processed_articles):
+        queue_processed_articles: str,
+        retries: Optional[RetryTopology] = None,
+        near_duplicates: Optional[NearDuplicateIndex] = None):
     async with message.process(ignore_processed=True):
+        article_id = None
         try:
             # Read message
-            article = ArticlePayload.from_json(message.body.decode())
+            try:
+                article = ArticlePayload.from_dict(decode_message(message, ARTICLE_CODECS))
+            except Exception as e:
+                await SingletonLoggerSafe.aerror(f"Failed to decode message: {e}")
+                await park_message(message, retries, f"Failed to decode message: {e}")
+                return
+            article_id = article.article_id
             await SingletonLoggerSafe.ainfo(f"New message received. article_id={article.article_id}")
 
+            # Skip stories already analysed under another title or source
+            if near_duplicates is not None:
+                original = near_duplicates.check_and_add(article)
+                if original is not None:
+                    await SingletonLoggerSafe.ainfo(f"[{article_id}] near duplicate of {original}, skipping analysis")
+                    if DEDUP_ACTION == "link":
+                        article.duplicate_of = original
+                        await push_to_processed_queue(queue_processed_articles, article)
+                    return
+
             # Analyze message
             await SingletonLoggerSafe.ainfo(f"Analyzing message content...")
             analysis_dict, article.error = await analyser.invoke(article.content)
@@ -83,11 +129,29 @@ async def consume_message(
                 await push_to_aws_gateway(analysis_push_gateway, TIMEOUT_PUSH_TO_AWS, aws_message)
 
         except Exception as e:
-            await SingletonLoggerSafe.aerror(f"[{article.article_id}] Error processing message: {e}", exc_info=True)
-            if not message.channel.is_closed:
+            await SingletonLoggerSafe.aerror(f"[{article_id}] Error processing message: {e}", exc_info=True)
+            if message.channel.is_closed:
+                await SingletonLoggerSafe.ainfo(f"[{article_id}] Cannot reject message — channel already closed.")
+            elif retries is None:
                 await message.reject(requeue=False)
             else:
-                await SingletonLoggerSafe.ainfo(f"[{article.article_id}] Cannot reject message — channel already closed.")
+                try:
+                    # the original is acked when the context exits
+                    await retries.retry(message, str(e))
+                except Exception as retry_err:
+                    await SingletonLoggerSafe.aerror(f"[{article_id}] Failed to schedule retry: {retry_err}")
+                    await message.reject(requeue=True)
+
+# Move a message that can never be processed to the parking queue, or drop it
+async def park_message(message: aio_pika.IncomingMessage, retries: Optional[RetryTopology], reason: str):
+    try:
+        if retries is not None:
+            await retries.park(message, reason)
+        else:
+            await message.reject(requeue=False)
+    except Exception as e:
+        await SingletonLoggerSafe.aerror(f"Failed to park message: {e}")
+        await message.reject(requeue=True)
 
 async def graceful_shutdown(channel):
     await SingletonLoggerSafe.ainfo("Shutting down")
@@ -5,14 +5,18 @@ from pathlib import Path
 from functools import partial
 from common.utils       import new_mq_channel, new_aws_conn
 from common.logger      import SingletonLoggerSafe
+from common.mq_retry    import RetryTopology
+from common.near_dup    import NearDuplicateIndex, DEFAULT_DEDUP_WINDOW, DEFAULT_MAX_DISTANCE
 from news_analyser.providers   import DeepSeekProvider
 from news_analyser.executor_proxy import MockTradeExecutorProxy
 from news_analyser.trade_policy import TradePolicy
 from news_analyser.agent import Agent
 from news_analyser.article_analyser import consume_message, graceful_shutdown
 
-# source
+# sources, all carry ArticlePayload
 QUEUE_TV_ARTICLES = "tv_articles"
+QUEUE_IV_ARTICLES = "iv_articles"
+QUEUE_X_ARTICLES = "x_articles"
 # destination
 QUEUE_PROCESSED_ARTICLES = "processed_articles"
 
@@ -21,12 +25,16 @@ async def main():
     SingletonLoggerSafe("output/deepseek_analyser.log")
 
     await SingletonLoggerSafe.ainfo("Connecting to request queue")
-    in_queue = None
-    out_queue = None
+    in_queues = []
+    source_queues = os.getenv("ANALYSER_SOURCE_QUEUES", f"{QUEUE_TV_ARTICLES},{QUEUE_IV_ARTICLES},{QUEUE_X_ARTICLES}")
     try:
         channel = await new_mq_channel()
-        in_queue = await channel.declare_queue(QUEUE_TV_ARTICLES, durable=True)
-        out_queue = await channel.declare_queue(QUEUE_PROCESSED_ARTICLES, durable=True)
+        for queue_name in [name.strip() for name in source_queues.split(",") if name.strip()]:
+            in_queue = await channel.declare_queue(queue_name, durable=True)
+            retries = RetryTopology(queue_name)
+            await retries.declare(channel)
+            in_queues.append((in_queue, retries))
+        await channel.declare_queue(QUEUE_PROCESSED_ARTICLES, durable=True)
     except Exception as e:
         await SingletonLoggerSafe.aerror(f"Failed to connect to RabbitMQ: {e}")
         return
@@ -52,13 +60,21 @@ async def main():
             await SingletonLoggerSafe.aerror(f" Failed to initialize gRPC client for AWS Gateway: {e}")
             analysis_push_gateway = None
 
-    await SingletonLoggerSafe.ainfo("Setting up queue consumer")
-    await in_queue.consume(
-        partial(consume_message,
-                analyser=analyser,
-                trade_policy=trade_policy,
-                analysis_push_gateway=analysis_push_gateway,
-                queue_processed_articles=out_queue))
+    near_duplicates = NearDuplicateIndex(
+        window=float(os.getenv("DEDUP_WINDOW_SECONDS", str(DEFAULT_DEDUP_WINDOW))),
+        max_distance=int(os.getenv("DEDUP_MAX_DISTANCE", str(DEFAULT_MAX_DISTANCE))))
+
+    await SingletonLoggerSafe.ainfo("Setting up queue consumers")
+    for in_queue, retries in in_queues:
+        # the near-duplicate index is shared, a story seen on one site is dropped on the others
+        await in_queue.consume(
+            partial(consume_message,
+                    analyser=analyser,
+                    trade_policy=trade_policy,
+                    analysis_push_gateway=analysis_push_gateway,
+                    queue_processed_articles=QUEUE_PROCESSED_ARTICLES,
+                    retries=retries,
+                    near_duplicates=near_duplicates))
 
     loop = asyncio.get_running_loop()
     loop_stop = asyncio.Event()
@@ -1,12 +1,12 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Tuple
-import grpc
 import os
 import sys
 
 from proto.trade_executor_pb2_grpc import TradeExecutorStub
 from proto.trade_executor_pb2      import TradeRequest
 from grpc                          import RpcError 
+from common.grpc_channels          import METHOD_TIMEOUTS, channel_registry
 
 class TradeExecutor(ABC):
     @abstractmethod
@@ -20,14 +20,15 @@ class MockTradeExecutorProxy(TradeExecutor):
     """
 
     def __init__(self, host: str = "mock_executor", port: int = 50051):
-        self.channel = grpc.insecure_channel(f"{host}:{port}")
+        self.channel = channel_registry().channel(f"{host}:{port}")
         self.stub = TradeExecutorStub(self.channel)
 
     def execute_trade(self, symbol: str, trade: str, amount: float) -> Tuple[str, float, Dict[str, float]]:
         try:
             request = TradeRequest(symbol=symbol, trade=trade, amount=amount)
             print("execute_trade begin")
-            response = self.stub.ExecuteTrade(request)
+            response = self.stub.ExecuteTrade(
+                request, timeout=METHOD_TIMEOUTS[("trading_executor.TradeExecutor", "ExecuteTrade")])
             print("execute_trade done")
 
             return response.message, response.cash_balance, dict(response.portfolio)
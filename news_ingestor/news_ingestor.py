@@ -6,6 +6,8 @@ from contextlib import AsyncExitStack
 import asyncio
 from common.logger import SingletonLoggerSafe
 from common.mq_consumer import RabbitMQConfig
+from common.codec import default_codecs
+from news_model.message import ArticlePayload
 
 # This module is responsible for ingesting news articles from RabbitMQ and storing them in Weaviate.
 QUEUE_PROCESSED_ARTICLES = "processed_articles"
@@ -18,15 +20,25 @@ async def main():
         http_port=os.getenv("WEAVIATE_HTTP_PORT", "8080"),
         grpc_port=os.getenv("WEAVIATE_GRPC_PORT", "50051"),
         class_name="articles",
+        encode_workers=int(os.getenv("INGESTOR_ENCODE_WORKERS", "0")),
     )
     logger.info(f"Connecting to Weaviate at {weaviate_config['host']}:{weaviate_config['http_port']}")
 
+    batch_size = int(os.getenv("INGESTOR_BATCH_SIZE", "0")) # > 1 enables batch inserts
     mq_config = RabbitMQConfig(
         host=os.getenv("RABBITMQ_HOST", "rabbitmq"),
         username=os.getenv("RABBITMQ_USER", "admin"),
         password=os.getenv("RABBITMQ_PASS", "password"),
         queue_name=QUEUE_PROCESSED_ARTICLES,
+        concurrency=int(os.getenv("INGESTOR_CONCURRENCY", "8")),
+        prefetch_count=int(os.getenv("INGESTOR_PREFETCH", str(max(16, 2 * batch_size)))),
+        handler_timeout=float(os.getenv("INGESTOR_HANDLER_TIMEOUT", "30")),
+        failure_policy=os.getenv("INGESTOR_FAILURE_POLICY", "retry"),
+        batch_size=batch_size,
+        batch_timeout_ms=int(os.getenv("INGESTOR_BATCH_TIMEOUT_MS", "200")),
     )
+    if os.getenv("METRICS_PORT"):
+        mq_config["metrics_port"] = int(os.getenv("METRICS_PORT"))
     logger.info(f"Connecting to RabbitMQ at {mq_config['host']}:{mq_config['queue_name']}")
 
     pg_config = PostgresConfig(
@@ -36,6 +48,7 @@ async def main():
         password=os.getenv("POSTGRES_PASSWORD", "password"),
         database=os.getenv("POSTGRES_DB", "postgres"),
         table_name=os.getenv("PG_TABLE", "articles"),
+        pool_size=mq_config["concurrency"],
     )
     logger.info(f"Connecting to Postgres at {pg_config['host']}:{pg_config['port']}/{pg_config['database']}")
 
@@ -44,8 +57,15 @@ async def main():
         pg_client = await stack.enter_async_context(PostgresWriter(pg_config))
         mq_consumer = await stack.enter_async_context(RabbitMQConsumer(mq_config))
 
-        mq_consumer.with_handler(wv_client.store_article)
-        mq_consumer.with_handler(pg_client.store_article)
+        mq_consumer.with_codec(default_codecs(), ArticlePayload.from_dict)
+        if batch_size > 1:
+            mq_consumer.with_batch_handler(wv_client.store_articles)
+            mq_consumer.with_batch_handler(pg_client.store_articles)
+        else:
+            mq_consumer.with_handler(wv_client.store_article)
+            mq_consumer.with_handler(pg_client.store_article)
+            # upserts of the same article must not race each other
+            mq_consumer.with_ordering_key(lambda article: article.article_id)
         await mq_consumer.consume() # wait until stop_event is set
 
 if __name__ == "__main__":
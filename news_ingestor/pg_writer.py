@@ -1,5 +1,5 @@
 import asyncpg
-from typing import TypedDict
+from typing import List, TypedDict
 from news_model.message import ArticlePayload
 from common.logger import SingletonLoggerSafe
 from common.pg_common import PostgresConfig
@@ -29,19 +29,25 @@ class PostgresWriter:
             },
             "error": {
                 "type": "text",
+            },
+            "duplicate_of": {
+                "type": "text",
             }
         }
         self.field_names = self.table_defn.keys()
         self.logger = SingletonLoggerSafe.component("PostgresWriter")
+        self.pool: asyncpg.Pool | None = None
 
     async def __aenter__(self):
         try:
-            self.conn = await asyncpg.connect(
+            self.pool = await asyncpg.create_pool(
                 host=self.config["host"],
                 port=self.config["port"],
                 user=self.config["user"],
                 password=self.config["password"],
                 database=self.config["database"],
+                min_size=1,
+                max_size=self.config.get("pool_size", 1),
             )
             await self.logger.ainfo(
                 f"Connected to Postgres at {self.config['host']}:{self.config['port']}/{self.config['database']}"
@@ -55,7 +61,7 @@ class PostgresWriter:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         try:
-            await self.conn.close()
+            await self.pool.close()
             await self.logger.ainfo("Disconnected from Postgres")
         except Exception as e:
             await self.logger.aerror(f"Failed to disconnect from Postgres: {e}")
@@ -75,37 +81,76 @@ class PostgresWriter:
             )
             """
             await self.logger.ainfo(f"Executing SQL: {create_table_sql}")
-            await self.conn.execute(create_table_sql)
+            # tables created before a column was added gain it
+            add_columns_sql = [
+                f"ALTER TABLE {self.table} ADD COLUMN IF NOT EXISTS {field_name} {field_defn['type']}"
+                for field_name, field_defn in self.table_defn.items() if not field_defn.get("primary_key")]
+            async with self.pool.acquire() as conn:
+                await conn.execute(create_table_sql)
+                for sql in add_columns_sql:
+                    await conn.execute(sql)
             await self.logger.ainfo(f"Table '{self.table}' exists or created successfully")
         except Exception as e:
             await self.logger.aerror(f"Failed to create table '{self.table}': {e}")
             raise e
 
-    async def store_article(self, article_text):
+    def _to_row(self, article: ArticlePayload) -> dict:
+        filtered = {k: v for k, v in asdict(article).items() if k in self.field_names}
+        for k, v in filtered.items():
+            if v is None:
+                continue
+            if self.table_defn[k]['type'] == "text":
+                filtered[k] = v.strip()
+            elif self.table_defn[k]['type'] == "timestamp":
+                filtered[k] = datetime.fromisoformat(v)
+        return filtered
+
+    def _upsert_sql(self, columns: List[str]) -> str:
+        # parameter placeholders: $1, $2, $3 ...
+        placeholders = ", ".join(f"${i+1}" for i in range(len(columns)))
+        set_clause = ", ".join(f"{col}=EXCLUDED.{col}" for col in columns if col != "article_id")
+
+        return f"""
+            INSERT INTO {self.table} ({", ".join(columns)})
+            VALUES ({placeholders})
+            ON CONFLICT (article_id) DO UPDATE SET {set_clause}
+        """
+
+    async def store_article(self, article: ArticlePayload):
+        filtered = {}
         try:
-            article = ArticlePayload.from_json(article_text)
-            filtered = {k: v for k, v in asdict(article).items() if k in self.field_names}
-            for k, v in filtered.items():
-                if v is None:
-                    continue
-                if self.table_defn[k]['type'] == "text":
-                    filtered[k] = v.strip()
-                elif self.table_defn[k]['type'] == "timestamp":
-                    filtered[k] = datetime.fromisoformat(v)
-            columns = list(filtered.keys())
-            values = list(filtered.values())
+            filtered = self._to_row(article)
+            sql = self._upsert_sql(list(filtered.keys()))
+            async with self.pool.acquire() as conn:
+                await conn.execute(sql, *filtered.values())
+            await self.logger.ainfo(
+                f"Article stored successfully: article_id={filtered.get('article_id')}",
+                fields={"sql": sql, "row": filtered})
+        except Exception as e:
+            await self.logger.aerror(f"Failed to store article: {e}", fields={"row": filtered})
+            raise e
 
-            # parameter placeholders: $1, $2, $3 ...
-            placeholders = ", ".join(f"${i+1}" for i in range(len(values)))
-            set_clause = ", ".join(f"{col}=EXCLUDED.{col}" for col in columns if col != "article_id")
+    async def store_articles(self, articles: List[ArticlePayload]) -> List[int]:
+        """Batch handler: upsert all valid articles with one executemany.
+        Returns the indices of invalid articles, raises if the write fails."""
+        failed = []
+        rows = []
+        for i, article in enumerate(articles):
+            try:
+                rows.append(self._to_row(article))
+            except Exception as e:
+                await self.logger.aerror(f"Invalid article: {e}", fields={"article": article})
+                failed.append(i)
+        if not rows:
+            return failed
 
-            sql = f"""
-                INSERT INTO {self.table} ({", ".join(columns)})
-                VALUES ({placeholders})
-                ON CONFLICT (article_id) DO UPDATE SET {set_clause}
-            """
-            await self.logger.ainfo(f"Executing SQL: {sql}")
-            await self.conn.execute(sql, *filtered.values())
-            await self.logger.ainfo(f"Article stored successfully: {filtered}")
+        columns = list(rows[0].keys())
+        sql = self._upsert_sql(columns)
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.executemany(sql, [[row[col] for col in columns] for row in rows])
+            await self.logger.ainfo(f"{len(rows)} articles stored successfully", fields={"sql": sql})
         except Exception as e:
-            await self.logger.aerror(f"Failed to store article: {e}")
+            await self.logger.aerror(f"Failed to store {len(rows)} articles: {e}")
+            raise e
+        return failed
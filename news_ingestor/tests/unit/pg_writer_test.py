@@ -40,27 +40,33 @@ def mock_config():
     )
 
 @pytest.fixture
-def writer(mock_config):
-    # Create PostgresWriter instance with mocked connection
+def mock_conn():
+    return mock.AsyncMock()
+
+@pytest.fixture
+def writer(mock_config, mock_conn):
+    # Create PostgresWriter instance with a mocked connection pool
     w = PostgresWriter(mock_config)
-    w.conn = mock.AsyncMock()
+    mock_acquire = mock.MagicMock()
+    mock_acquire.__aenter__.return_value = mock_conn
+    mock_acquire.__aexit__.return_value = None
+    w.pool = mock.MagicMock()
+    w.pool.acquire.return_value = mock_acquire
     return w
 
 # -------------------------
 # Tests
 # -------------------------
 @pytest.mark.asyncio
-async def test_store_article(writer, article_json_str, article_obj):
-    # Patch from_json method to return the pre-created article object
-    with mock.patch.object(ArticlePayload, "from_json", return_value=article_obj):
-        await writer.store_article(article_json_str)
+async def test_store_article(writer, mock_conn, article_obj):
+    await writer.store_article(article_obj)
 
     # Check that conn.execute was called
-    writer.conn.execute.assert_awaited(), "Expected conn.execute to be called"
+    mock_conn.execute.assert_awaited(), "Expected conn.execute to be called"
 
     # Verify SQL parameters include article data
-    sql_call_args = writer.conn.execute.call_args[0][0]
-    values_call_args = writer.conn.execute.call_args[0][1:]
+    sql_call_args = mock_conn.execute.call_args[0][0]
+    values_call_args = mock_conn.execute.call_args[0][1:]
     for key, val in asdict(article_obj).items():
         if key in writer.table_defn:
             if writer.table_defn[key]['type'] == "timestamp":
@@ -69,15 +75,53 @@ async def test_store_article(writer, article_json_str, article_obj):
                 assert str(val) in str(values_call_args) or val is None
 
 @pytest.mark.asyncio
-async def test___ensure_table(writer, mock_config):
+async def test___ensure_table(writer, mock_conn, mock_config):
     # Call _ensure_table to create table if it does not exist
     await writer._ensure_table()
 
     # Verify that conn.execute was called to create the table
-    writer.conn.execute.assert_awaited(), "Expected execute to be called to create table"
+    mock_conn.execute.assert_awaited(), "Expected execute to be called to create table"
 
     # Check that SQL statement contains table name and all fields
-    sql_call_args = writer.conn.execute.call_args[0][0]
+    sql_call_args = mock_conn.execute.await_args_list[0][0][0]
     assert mock_config["table_name"] in sql_call_args
-    for field in ["article_id", "time", "title", "content", "analysis", "error"]:
+    for field in ["article_id", "time", "title", "content", "analysis", "error", "duplicate_of"]:
         assert field in sql_call_args
+
+    # columns added later reach tables created before them
+    altered = [call[0][0] for call in mock_conn.execute.await_args_list[1:]]
+    assert any("ADD COLUMN IF NOT EXISTS duplicate_of text" in sql for sql in altered)
+    assert not any("article_id" in sql for sql in altered)
+
+@pytest.mark.asyncio
+async def test_store_article_keeps_duplicate_link(writer, mock_conn, article_obj):
+    article_obj.duplicate_of = "tv-1"
+    await writer.store_article(article_obj)
+    sql_call_args = mock_conn.execute.call_args[0][0]
+    assert "duplicate_of" in sql_call_args
+    assert "tv-1" in mock_conn.execute.call_args[0][1:]
+
+@pytest.mark.asyncio
+async def test_store_articles(writer, mock_conn, article_obj):
+    invalid = ArticlePayload(article_id="test_002", time="not a timestamp")
+    failed = await writer.store_articles([article_obj, invalid, article_obj])
+
+    assert failed == [1]
+    mock_conn.executemany.assert_awaited_once()
+    sql_call_args, rows = mock_conn.executemany.call_args[0]
+    assert "ON CONFLICT (article_id)" in sql_call_args
+    assert len(rows) == 2
+    assert rows[0][0] == "test_001"
+
+@pytest.mark.asyncio
+async def test_store_articles_write_failure(writer, mock_conn, article_obj):
+    mock_conn.executemany.side_effect = RuntimeError("connection lost")
+    with pytest.raises(RuntimeError):
+        await writer.store_articles([article_obj])
+
+@pytest.mark.asyncio
+async def test_store_article_failure_is_raised(writer, mock_conn, article_obj):
+    # errors propagate so the consumer can retry the message
+    mock_conn.execute.side_effect = RuntimeError("connection lost")
+    with pytest.raises(RuntimeError):
+        await writer.store_article(article_obj)
@@ -2,7 +2,11 @@ import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 
 from news_ingestor.weaviate_writer import WeaviateWriter, WeaviateConfig
+from news_model.message import ArticlePayload
 from common.logger import SingletonLoggerSafe
+from common.mq_consumer import RabbitMQConsumer
+from common.tests.mq_messages import tracked_message
+from weaviate.util import generate_uuid5
 
 @pytest.fixture
 def mock_config():
@@ -34,21 +38,17 @@ async def test_store_article_success(writer):
     mock_client = AsyncMock()
     mock_collection = AsyncMock()
     mock_client.collections.get.return_value = mock_collection
+    mock_collection.data.exists.return_value = False
     writer.client = mock_client
-    fake_article = MagicMock()
-    fake_article.article_id = "123"
-    fake_article.content = "测试文章"
-    
-    with patch("news_model.message.ArticlePayload") as mock_article_cls:
-        mock_model = MagicMock()
-        mock_model.encode.return_value = [0.1, 0.2, 0.3]
-        writer.model = mock_model
-        mock_article_cls.from_json.return_value = fake_article
+    mock_model = MagicMock()
+    mock_model.encode.return_value = [0.1, 0.2, 0.3]
+    writer.model = mock_model
 
-        await writer.store_article('{"article_id": "123", "content": "测试文章"}')
+    await writer.store_article(ArticlePayload(article_id="123", content="测试文章"))
 
-        mock_model.encode.assert_called_once_with("测试文章")
-        mock_collection.data.insert.assert_awaited_once()
+    mock_model.encode.assert_called_once_with("测试文章")
+    mock_collection.data.insert.assert_awaited_once()
+    assert mock_collection.data.insert.call_args.kwargs["uuid"] == generate_uuid5("123")
 
 
 @pytest.mark.asyncio
@@ -56,10 +56,91 @@ async def test_store_article_failure(writer):
     mock_client = AsyncMock()
     mock_collection = AsyncMock()
     mock_client.collections.get.return_value = mock_collection
+    mock_collection.data.exists.return_value = False
+    mock_collection.data.insert.side_effect = ValueError("weaviate unavailable")
+    writer.client = mock_client
+    writer.model = MagicMock()
+
+    with pytest.raises(ValueError):
+        await writer.store_article(ArticlePayload(article_id="123", content="测试文章"))
+
+
+@pytest.mark.asyncio
+async def test_store_articles_batch(writer):
+    mock_client = AsyncMock()
+    mock_collection = AsyncMock()
+    mock_client.collections.get.return_value = mock_collection
+    mock_collection.data.insert_many.return_value = MagicMock(errors={1: MagicMock(message="rejected")})
+    writer.client = mock_client
+    mock_model = MagicMock()
+    mock_model.encode.return_value = [[0.1], [0.2]]
+    writer.model = mock_model
+
+    failed = await writer.store_articles([
+        ArticlePayload(article_id="1", content="a"),
+        ArticlePayload(article_id="2", content="b"),
+    ])
+
+    assert failed == [1]
+    mock_model.encode.assert_called_once_with(["a", "b"])
+    objects = mock_collection.data.insert_many.call_args[0][0]
+    assert [o.properties["article_id"] for o in objects] == ["1", "2"]
+    assert [o.uuid for o in objects] == [generate_uuid5("1"), generate_uuid5("2")]
+
+@pytest.mark.asyncio
+async def test_encode_in_worker_processes(mock_config):
+    mock_config["encode_workers"] = 2
+    with patch("news_ingestor.weaviate_writer.SentenceTransformer") as model_cls:
+        writer = WeaviateWriter(mock_config)
+    model_cls.assert_not_called() # the model is loaded by the workers
+    writer.client = AsyncMock()
+    writer.encode_pool = AsyncMock()
+    writer.encode_pool.run.return_value = [0.1, 0.2]
+
+    await writer.store_article(ArticlePayload(article_id="123", content="测试文章"))
+
+    writer.encode_pool.run.assert_awaited_once()
+    assert writer.encode_pool.run.call_args[0][1] == "测试文章"
+
+class FakeData:
+    """Weaviate collection data keyed by object id"""
+    def __init__(self):
+        self.objects = {}
+
+    async def exists(self, uuid):
+        return uuid in self.objects
+
+    async def insert(self, properties, vector, uuid):
+        if uuid in self.objects:
+            raise ValueError(f"id {uuid} already exists")
+        self.objects[uuid] = properties
+
+    async def replace(self, uuid, properties, vector):
+        self.objects[uuid] = properties
+
+@pytest.mark.asyncio
+async def test_retried_message_stores_one_object(writer):
+    collection = MagicMock()
+    collection.data = FakeData()
+    writer.client.collections.get.return_value = collection
+    writer.model = MagicMock()
+    pg_store = AsyncMock(side_effect=[RuntimeError("postgres down"), None])
 
-    with patch("weaviate.WeaviateAsyncClient", return_value=mock_client), \
-         patch("news_model.message.ArticlePayload") as mock_article_cls:
+    consumer = RabbitMQConsumer(
+        {"host": "localhost",
+        "queue_name": "test",
+        "username": "guest",
+        "password": "guest",
+        "failure_policy": "retry"})
+    consumer.retries.retry = AsyncMock(return_value=True)
+    consumer.with_handler(writer.store_article).with_handler(pg_store)
+    article = ArticlePayload(article_id="123", content="测试文章")
 
-        mock_article_cls.from_json.side_effect = ValueError("bad json")
+    # first delivery: weaviate succeeds, postgres fails, the message is retried
+    await consumer._process_message(tracked_message("msg"), article)
+    consumer.retries.retry.assert_awaited_once()
+    # redelivery runs every handler again
+    await consumer._process_message(tracked_message("msg"), article)
 
-        await writer.store_article("invalid json")
+    assert pg_store.await_count == 2
+    assert list(collection.data.objects) == [generate_uuid5("123")]
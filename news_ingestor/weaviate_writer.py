@@ -1,17 +1,34 @@
+import asyncio
 import weaviate
 from weaviate.connect import ConnectionParams
 from weaviate.collections.classes.config import DataType
-from typing import TypedDict
+from weaviate.collections.classes.data import DataObject
+from weaviate.util import generate_uuid5
+from typing import List, NotRequired, TypedDict
 from news_model.message import ArticlePayload
 from common.logger import SingletonLoggerSafe
+from common.worker_pool import ProcessWorkerPool
 from dataclasses import asdict
 from sentence_transformers import SentenceTransformer
 
+EMBEDDING_MODEL = "BAAI/bge-base-zh-v1.5"
+
 class WeaviateConfig(TypedDict):
     host: str
     http_port: str
     grpc_port: str
     class_name: str
+    encode_workers: NotRequired[int]    # > 0 encodes in that many worker processes, default 0 (thread)
+
+# model of an encode worker process, loaded once by _load_worker_model
+_worker_model = None
+
+def _load_worker_model(model_name: str):
+    global _worker_model
+    _worker_model = SentenceTransformer(model_name)
+
+def _worker_encode(content):
+    return _worker_model.encode(content)
 
 
 class WeaviateWriter:
@@ -23,9 +40,16 @@ class WeaviateWriter:
         ]
         self.property_keys = {p["name"] for p in self.properties}
         self.logger = SingletonLoggerSafe.component("WeaviateWriter")
-        self.model = SentenceTransformer("BAAI/bge-base-zh-v1.5")
+        self.encode_workers = config.get("encode_workers", 0)
+        self.encode_pool = None
+        # with encode workers the model lives in the workers only
+        self.model = None if self.encode_workers > 0 else SentenceTransformer(EMBEDDING_MODEL)
     
     async def __aenter__(self):
+        if self.encode_workers > 0:
+            self.encode_pool = ProcessWorkerPool(
+                self.encode_workers, initializer=_load_worker_model, initargs=(EMBEDDING_MODEL,))
+            await self.logger.ainfo(f"Encoding in {self.encode_workers} worker processes")
         try:
             self.client = weaviate.WeaviateAsyncClient(
             connection_params=ConnectionParams.from_params(
@@ -46,6 +70,8 @@ class WeaviateWriter:
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.encode_pool is not None:
+            await self.encode_pool.close()
         try:
             await self.client.close()
             await self.logger.ainfo(f"Disconnected from Weaviate at {self.config['host']}:{self.config['http_port']}")
@@ -68,17 +94,56 @@ class WeaviateWriter:
         except Exception as e:
             await self.logger.aerror(f"Failed to create class '{class_name}': {e}")
 
-    async def store_article(self, article_text):
+    async def _encode(self, content):
+        # encode is CPU bound, keep it off the event loop so other messages progress
+        if self.encode_pool is not None:
+            return await self.encode_pool.run(_worker_encode, content)
+        return await asyncio.to_thread(self.model.encode, content)
+
+    async def store_article(self, article: ArticlePayload):
         try:
-            article = ArticlePayload.from_json(article_text)
             collection = await self.client.collections.get(self.config["class_name"])
-            await self.logger.ainfo(f"Storing article: {article}")
+            await self.logger.ainfo(f"Storing article: article_id={article.article_id}")
             if article.article_id is not None and article.content is not None:
-                embedding = self.model.encode(article.content)
-                await collection.data.insert(
-                    properties={"article_id": article.article_id, "content": article.content},
-                    vector=embedding
-                )
-                await self.logger.ainfo(f"Article stored successfully: {article}")
+                embedding = await self._encode(article.content)
+                # the object id derives from the article id, a retried message replaces
+                # what an earlier (possibly timed out) attempt wrote instead of adding a copy
+                uuid = generate_uuid5(article.article_id)
+                properties = {"article_id": article.article_id, "content": article.content}
+                if await collection.data.exists(uuid):
+                    await collection.data.replace(uuid=uuid, properties=properties, vector=embedding)
+                else:
+                    await collection.data.insert(properties=properties, vector=embedding, uuid=uuid)
+                await self.logger.ainfo(
+                    f"Article stored successfully: article_id={article.article_id}",
+                    fields={"content": article.content})
         except Exception as e:
             await self.logger.aerror(f"Failed to store article: {e}")
+            raise e
+
+    async def store_articles(self, batch: List[ArticlePayload]) -> List[int]:
+        """Batch handler: embed all articles with one encode call and insert them with
+        one insert_many. Returns the indices of articles that failed."""
+        failed = []
+        articles = [
+            (i, article) for i, article in enumerate(batch)
+            if article.article_id is not None and article.content is not None
+        ]
+        if not articles:
+            return failed
+
+        collection = await self.client.collections.get(self.config["class_name"])
+        embeddings = await self._encode([article.content for _, article in articles])
+        # batch imports overwrite objects with the same id, so redelivered articles are upserted
+        result = await collection.data.insert_many([
+            DataObject(
+                properties={"article_id": article.article_id, "content": article.content},
+                vector=embedding,
+                uuid=generate_uuid5(article.article_id))
+            for (_, article), embedding in zip(articles, embeddings)
+        ])
+        for index, error in result.errors.items():
+            await self.logger.aerror(f"Failed to store article: {error.message}")
+            failed.append(articles[index][0])
+        await self.logger.ainfo(f"{len(articles) - len(result.errors)} articles stored successfully")
+        return failed
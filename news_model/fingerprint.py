@@ -0,0 +1,37 @@
+import re
+import hashlib
+import unicodedata
+from collections import Counter
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3 # characters, works for CJK text without word boundaries
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+def normalize_text(text: str) -> str:
+    """NFKC, lowercase, punctuation and whitespace collapsed to single spaces"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return _NON_WORD.sub(" ", text).strip()
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).hexdigest()
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over character shingles: similar texts differ in few bits"""
+    text = normalize_text(text)
+    if len(text) <= SHINGLE_SIZE:
+        shingles = Counter([text])
+    else:
+        shingles = Counter(text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1))
+    weights = [0] * SIMHASH_BITS
+    for shingle, count in shingles.items():
+        h = _feature_hash(shingle)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += count if h >> bit & 1 else -count
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
@@ -1,21 +1,61 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
+from typing import ClassVar, Dict, Optional
 import uuid
 import json
 from datetime import datetime, timezone
+from news_model.fingerprint import content_hash, simhash
 @dataclass
 class ArticlePayload:
+    # bump when fields are added or change meaning. Consumers before version 2 build the
+    # payload from every key of the message and fail on keys they do not know.
+    SCHEMA_VERSION: ClassVar[int] = 2
+    # fields added after version 1, with the version that added them. They are left out of
+    # messages while empty or when the consumers are pinned to an older version.
+    FIELD_VERSIONS: ClassVar[Dict[str, int]] = {"content_hash": 2, "simhash": 2, "duplicate_of": 2}
+    # content of an article whose body could not be extracted
+    NO_CONTENT: ClassVar[str] = "No Content"
+
     article_id: str = field(default_factory=lambda: str(uuid.uuid4()))
     time: str = field(default_factory=lambda: datetime.now(timezone.utc).replace(microsecond=0).isoformat())
     title: str = ""
     content: str = ""
     analysis: str = ""
     error: str = ""
-    
-    def to_json(self):
-        return json.dumps(self.__dict__)
-    
+    content_hash: str = ""  # exact fingerprint of the normalised content
+    simhash: str = ""       # near-duplicate fingerprint, 64-bit hex
+    duplicate_of: str = ""  # article_id of the near-duplicate this article was linked to
+
+    def has_content(self) -> bool:
+        return bool(self.content) and self.content != self.NO_CONTENT
+
+    def fingerprint(self):
+        """Fill content_hash and simhash from the content. Left empty when the body could not
+        be extracted, every such article would share one fingerprint."""
+        if not self.has_content():
+            self.content_hash = self.simhash = ""
+            return self
+        text = self.content
+        self.content_hash = content_hash(text)
+        self.simhash = f"{simhash(text):016x}"
+        return self
+
+    def to_json(self, schema_version: Optional[int] = None):
+        return json.dumps(self.to_dict(schema_version))
+
+    def to_dict(self, schema_version: Optional[int] = None) -> dict:
+        """Fields a consumer of schema_version (the current one by default) can read"""
+        version = schema_version or self.SCHEMA_VERSION
+        return {
+            name: value for name, value in self.__dict__.items()
+            if name not in self.FIELD_VERSIONS or (value and self.FIELD_VERSIONS[name] <= version)}
+
     @classmethod
     def from_json(cls, json_str: str):
-        return cls(**json.loads(json_str))
-        
+        return cls.from_dict(json.loads(json_str))
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        # ignore fields this version does not know about
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
 
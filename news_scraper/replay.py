@@ -0,0 +1,364 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+from common.card_extract import CARD_SCRIPT, extract_cards_from_html
+from common.logger import SingletonLoggerSafe
+from common.html_archive import HtmlArchive
+from common.html_extract import RULES, extract_article
+from common.http_fetcher import HttpPageFetcher
+from news_scraper.scrapers.trade_view import NEWS_CARD_SELECTOR, NEWS_FLOW_URL, TradingViewScraper
+from news_scraper.scrapers.investing import InvestingScraper
+from news_scraper.scrapers.x_timeline import XTimelineScraper
+
+# Replays saved article pages through the scrapers and the extractors without touching
+# the live sites, and reports throughput, latency percentiles and memory per page:
+#
+#   python -m news_scraper.replay output/html_archive --mode scraper
+#   python -m news_scraper.replay saved_pages/ --site investing --mode extract --json baseline.json
+#
+# Modes: extract runs only the extraction rules, scraper runs the scraper's page
+# processing on a WebDriver that serves the saved pages, http fetches them from a
+# local HTTP server through HttpPageFetcher (TradingView only, the other sites have no
+# HTTP path), listing runs the listing pages (the TradingView news flow, X timelines)
+# through the scrapers' listing paths, their card links are read from the saved pages.
+
+MODES = ("extract", "scraper", "http", "listing")
+HTTP_SITES = ("tradingview",)
+# markup of the listing pages the scrapers read
+LISTING_MARKERS = {"tradingview": NEWS_CARD_SELECTOR.lstrip("."), "x": 'data-testid="tweet"'}
+# every card of a saved listing is read
+LISTING_LIMIT = 1000
+
+@dataclass
+class ReplayPage:
+    site: str
+    url: str
+    title: str
+    html: str
+    listing: bool = False
+
+def detect_site(url: str, html: str) -> Optional[str]:
+    host = urlsplit(url).netloc
+    for site, rule in RULES.items():
+        if site in host or rule["anchor"] in html:
+            return site
+    return None
+
+def detect_listing(html: str) -> Optional[str]:
+    for site, marker in LISTING_MARKERS.items():
+        if marker in html and not (site in RULES and RULES[site]["anchor"] in html):
+            return site
+    return None
+
+def url_slug(url: str) -> str:
+    """Last path segment of url without .html, e.g. the account of an X timeline"""
+    return urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1].removesuffix(".html")
+
+def load_pages(
+        path: str,
+        site: Optional[str] = None,
+        limit: Optional[int] = None,
+        listings: bool = False) -> List[ReplayPage]:
+    """Article pages of an HtmlArchive root (the newest snapshot of each URL) or of a
+    directory of .html files. Pages of other sites than site, or of no known site, are
+    skipped. With listings, the listing pages and every article page they can link to."""
+    pages = []
+    if os.path.exists(os.path.join(path, "index.db")):
+        archive = HtmlArchive(path, max_age=None, max_bytes=None)
+        try:
+            latest = {snapshot.url: snapshot for snapshot in archive.snapshots()}
+            sources = [(s.url, s.title, lambda s=s: archive.get(s.key)) for s in latest.values()]
+            pages = _select(sources, site, limit, listings)
+        finally:
+            archive.close()
+    else:
+        files = sorted(Path(path).rglob("*.html"))
+        sources = [
+            (f"https://replay.local/{file.relative_to(path).as_posix()}", file.stem,
+             lambda file=file: file.read_text(encoding="utf-8", errors="replace"))
+            for file in files]
+        pages = _select(sources, site, limit, listings)
+    return pages
+
+def _select(sources, site, limit, listings) -> List[ReplayPage]:
+    pages = []
+    selected = 0
+    for url, title, read in sources:
+        html = read()
+        listing_site = detect_listing(html) if html else None
+        page_site = listing_site or (detect_site(url, html) if html else None)
+        if page_site is None or (site and page_site != site):
+            continue
+        page = ReplayPage(page_site, url, title, html, listing=listing_site is not None)
+        if page.listing != listings:
+            if listings:
+                pages.append(page) # an article a listing may link to
+            continue
+        if limit and selected >= limit:
+            continue
+        pages.append(page)
+        selected += 1
+    return pages
+
+class ReplayWebDriver:
+    """Enough of a WebDriver for the scrapers' page reads: get() loads the saved page,
+    element lookups and card reads are answered from its markup. A URL with no saved
+    page is served the page saved under its last path segment, if there is one."""
+    def __init__(self, pages: Dict[str, str]):
+        self.pages = pages
+        self.by_slug = {url_slug(url): html for url, html in pages.items()}
+        self.current_url = None
+        self.page_source = ""
+
+    def get(self, url: str):
+        html = self.pages.get(url, self.by_slug.get(url_slug(url)))
+        if html is None:
+            raise ValueError(f"No saved page for {url}")
+        self.current_url = url
+        self.page_source = html
+
+    def find_element(self, by: str = By.ID, value: str = None):
+        if by == By.ID:
+            marker = f'id="{value}"'
+        elif by == By.CLASS_NAME:
+            marker = value
+        elif by == By.CSS_SELECTOR:
+            last = value.split()[-1]
+            if not re.fullmatch(r"[.#]?[\w-]+", last):
+                # attribute selectors and the like need the parsed page
+                if BeautifulSoup(self.page_source, "html.parser").select_one(value) is None:
+                    raise NoSuchElementException(f"{by} {value}")
+                return object()
+            # last simple selector, e.g. ".card" or "#articleTitle"
+            marker = last.lstrip(".#")
+        else:
+            return object()
+        if marker not in self.page_source:
+            raise NoSuchElementException(f"{by} {value}")
+        return object()
+
+    def execute_script(self, script: str, *args):
+        if script == CARD_SCRIPT:
+            return extract_cards_from_html(self.page_source, *args, base_url=self.current_url)
+        return 1 if script == "return 1" else None
+
+    def save_screenshot(self, path: str):
+        return False
+
+    def get_cookies(self):
+        return []
+
+    def quit(self):
+        pass
+
+class ReplayServer:
+    """Local HTTP server serving the saved pages by URL path"""
+    def __init__(self, pages: List[ReplayPage]):
+        self.by_path = {self._path(page.url): page.html.encode("utf-8") for page in pages}
+        by_path = self.by_path
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = by_path.get(self.path)
+                self.send_response(200 if body is not None else 404)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body or b"")))
+                self.end_headers()
+                self.wfile.write(body or b"")
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="replay-http", daemon=True)
+
+    @staticmethod
+    def _path(url: str) -> str:
+        parts = urlsplit(url)
+        return parts.path + (f"?{parts.query}" if parts.query else "")
+
+    def url(self, page: ReplayPage) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}{self._path(page.url)}"
+
+    def __enter__(self) -> "ReplayServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.server.shutdown()
+        self.server.server_close()
+
+def page_processor(
+        mode: str,
+        site: str,
+        pages: List[ReplayPage],
+        server: Optional[ReplayServer] = None,
+        fetcher: Optional[HttpPageFetcher] = None) -> Callable:
+    """Function reading one page the way mode does, returns the extracted article or None.
+    http mode reads the pages from server with fetcher, which the caller closes."""
+    if mode == "extract":
+        return lambda page: extract_article(page.html, RULES[page.site])
+
+    driver = ReplayWebDriver({page.url: page.html for page in pages})
+    if site == "tradingview":
+        scraper = TradingViewScraper(
+            username="", password="", driver=driver, http_fetcher=fetcher if mode == "http" else None)
+    elif site == "investing" and mode == "scraper":
+        scraper = InvestingScraper(driver=driver)
+    else:
+        raise ValueError(f"Mode {mode} is not supported for {site}")
+    # unwrapped, the dedup store would skip pages already replayed
+    process_html = scraper._process_html.__wrapped__
+    if mode == "http":
+        return lambda page: process_html(scraper, server.url(page), page.title)
+    return lambda page: process_html(scraper, page.url, page.title)
+
+def uncached(scraper, name: str):
+    """Replace the cached_fetcher method name of scraper by the bare method, the dedup
+    store would skip pages already replayed"""
+    func = getattr(type(scraper), name).__wrapped__
+    def call(*args, **kwargs):
+        return func(scraper, *args, **kwargs)
+    call.processed = lambda *args, **kwargs: False
+    setattr(scraper, name, call)
+
+def listing_processor(site: str, pages: List[ReplayPage]) -> Callable:
+    """Function reading one listing page through the scraper's listing path, returns the
+    articles read. Each page gets a fresh scraper, with no mark or cursor of earlier scans."""
+    driver = ReplayWebDriver({page.url: page.html for page in pages if not page.listing})
+    if site == "tradingview":
+        def process(page: ReplayPage) -> List:
+            driver.pages[NEWS_FLOW_URL] = page.html
+            scraper = TradingViewScraper(username="", password="", driver=driver)
+            uncached(scraper, "_process_html")
+            return list(scraper.fetch_news(limit=LISTING_LIMIT))
+    elif site == "x":
+        def process(page: ReplayPage) -> List:
+            account = url_slug(page.url)
+            driver.pages[f"https://x.com/{account}"] = page.html
+            scraper = XTimelineScraper([account], driver=driver, cursor_path="", scroll_pause=0)
+            articles, _ = scraper._scan_account(account, LISTING_LIMIT)
+            return articles
+    else:
+        raise ValueError(f"Listing mode is not supported for {site}")
+    return process
+
+def read_nothing(result) -> bool:
+    """No article with content read, of a page or of any card of a listing"""
+    articles = result if isinstance(result, list) else [result]
+    return not any(article is not None and article.has_content() for article in articles)
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+def benchmark(pages: List[ReplayPage], process: Callable, repeat: int = 1, memory: bool = True) -> dict:
+    """Time every page, then measure its peak allocation in a second pass (tracemalloc
+    slows the code down, so it stays out of the timings)"""
+    latencies = []
+    failures = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            page_start = time.perf_counter()
+            try:
+                article = process(page)
+            except Exception as e:
+                SingletonLoggerSafe.error(f"Replay of {page.url} failed: {e}")
+                article = None
+            latencies.append(time.perf_counter() - page_start)
+            if read_nothing(article):
+                failures += 1
+    elapsed = time.perf_counter() - start
+
+    peaks = []
+    if memory:
+        tracemalloc.start()
+        try:
+            for page in pages:
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                try:
+                    process(page)
+                except Exception:
+                    pass
+                peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        finally:
+            tracemalloc.stop()
+
+    count = len(latencies)
+    return {
+        "pages": count,
+        "failures": failures,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else 0.0,
+        "p90_ms": round(percentile(latencies, 90) * 1000, 2) if latencies else 0.0,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else 0.0,
+        "mem_per_page_kb": round(sum(peaks) / len(peaks) / 1024, 1) if peaks else 0.0,
+        "mem_max_kb": round(max(peaks) / 1024, 1) if peaks else 0.0,
+    }
+
+def run(path: str, mode: str, site: Optional[str] = None, limit: Optional[int] = None, repeat: int = 1) -> Dict[str, dict]:
+    """Report per site"""
+    listings = mode == "listing"
+    pages = load_pages(path, site, limit, listings)
+    reports = {}
+    for page_site in sorted({page.site for page in pages if page.listing == listings}):
+        site_pages = [page for page in pages if page.site == page_site]
+        if listings:
+            process = listing_processor(page_site, site_pages)
+            listing_pages = [page for page in site_pages if page.listing]
+            reports[page_site] = benchmark(listing_pages, process, repeat)
+            continue
+        if mode == "http" and page_site not in HTTP_SITES:
+            SingletonLoggerSafe.info(f"Skipping {page_site}, it has no HTTP fetch path")
+            continue
+        if mode == "http":
+            fetcher = HttpPageFetcher(max_connections=1)
+            try:
+                with ReplayServer(site_pages) as server:
+                    process = page_processor(mode, page_site, site_pages, server, fetcher)
+                    reports[page_site] = benchmark(site_pages, process, repeat)
+            finally:
+                fetcher.close()
+        else:
+            process = page_processor(mode, page_site, site_pages)
+            reports[page_site] = benchmark(site_pages, process, repeat)
+    return reports
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay saved pages through the scrapers and extractors")
+    parser.add_argument("path", help="HtmlArchive root or directory of .html files")
+    parser.add_argument("--mode", choices=MODES, default="extract")
+    parser.add_argument("--site", choices=sorted(set(RULES) | set(LISTING_MARKERS)), help="only pages of this site")
+    parser.add_argument("--limit", type=int, help="at most this many pages")
+    parser.add_argument("--repeat", type=int, default=1, help="timed passes over the pages")
+    parser.add_argument("--json", help="also write the report to this file, e.g. as a baseline")
+    args = parser.parse_args(argv)
+
+    SingletonLoggerSafe("output/replay.log")
+    reports = run(args.path, args.mode, args.site, args.limit, args.repeat)
+    if not reports:
+        print(f"No pages of a known site under {args.path}")
+        return
+    for site, report in reports.items():
+        print(f"{site} ({args.mode}): " + ", ".join(f"{name} {value}" for name, value in report.items()))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"mode": args.mode, "reports": reports}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import os
+import asyncio
+import threading
+import signal
+from typing import Callable, Dict, List, Optional, TypedDict
+
+from scrapers.trade_view import TVScraperContext
+from scrapers.investing import IVScraperContext
+from scrapers.x_timeline import XScraperContext
+from scrapers.scraper_worker import scraper_worker, SCRAPE_MIN_INTERVAL, SCRAPE_MAX_INTERVAL
+from scrapers.publish_worker import article_publisher
+from common.interface import ScraperContext
+from common.codec import default_codecs
+from common.spill_queue import SpillQueue, DEFAULT_QUEUE_SIZE, DEFAULT_PUT_TIMEOUT
+from common.mq_metrics import HandoffMetrics, start_metrics_server
+from news_model.message import ArticlePayload
+from common.logger import SingletonLoggerSafe
+from common.mq_connection import MQConnectionManager, MQ_CONNECT_TIMEOUT
+from common.utils import new_webdriver
+
+# Runs any number of scraper sources in one process: each source scrapes in its own
+# thread at its own cadence and publishes through its own article_publisher task,
+# all borrowing channels from the publish pool of the process-wide RabbitMQ connection.
+
+class ScraperSource(TypedDict):
+    name: str
+    context: Callable[[], ScraperContext]   # called once at startup
+    queue_name: str
+    min_interval: float                     # seconds between scans at most, the rate limit of the site
+    max_interval: float                     # seconds between scans when quiet
+
+def source_interval(name: str, bound: str, default: float) -> float:
+    """<NAME>_MIN_INTERVAL / <NAME>_MAX_INTERVAL, e.g. TRADINGVIEW_MIN_INTERVAL"""
+    return float(os.getenv(f"{name.upper()}_{bound}_INTERVAL", str(default)))
+
+def tradingview_source() -> Optional[ScraperSource]:
+    username = os.getenv("TRADE_VIEW_USER")
+    password = os.getenv("TRADE_VIEW_PASS")
+    if not username or not password:
+        SingletonLoggerSafe.error("Missing credentials. Set TRADE_VIEW_USER and TRADE_VIEW_PASS in your environment.")
+        return None
+    hub_url = os.getenv("SELENIUM_HUB_URL", "http://selenium-hub:4444/wd/hub")
+    # > 0 reads articles in parallel on that many more grid sessions
+    sessions = int(os.getenv("TRADINGVIEW_SESSIONS", os.getenv("SCRAPER_SESSIONS", "0")))
+    return ScraperSource(
+        name="tradingview",
+        context=lambda: TVScraperContext(
+            new_webdriver(hub_url), username, password,
+            driver_factory=lambda: new_webdriver(hub_url),
+            sessions=sessions,
+            http_fetch=os.getenv("SCRAPER_HTTP_FETCH", "1") == "1"),
+        queue_name="tv_articles",
+        min_interval=source_interval("tradingview", "MIN", SCRAPE_MIN_INTERVAL),
+        max_interval=source_interval("tradingview", "MAX", SCRAPE_MAX_INTERVAL),
+    )
+
+def investing_source() -> Optional[ScraperSource]:
+    hub_url = os.getenv("SELENIUM_HUB_URL", "http://selenium-hub:4444/wd/hub")
+    return ScraperSource(
+        name="investing",
+        context=lambda: IVScraperContext(new_webdriver(hub_url)),
+        queue_name="iv_articles",
+        min_interval=source_interval("investing", "MIN", 10),
+        max_interval=source_interval("investing", "MAX", SCRAPE_MAX_INTERVAL),
+    )
+
+def x_source() -> Optional[ScraperSource]:
+    accounts = [account.strip().lstrip("@") for account in os.getenv("X_ACCOUNTS", "").split(",") if account.strip()]
+    if not accounts:
+        SingletonLoggerSafe.error("No accounts to watch. Set X_ACCOUNTS in your environment.")
+        return None
+    hub_url = os.getenv("SELENIUM_HUB_URL", "http://selenium-hub:4444/wd/hub")
+    return ScraperSource(
+        name="x",
+        # one warm session walks all the accounts
+        context=lambda: XScraperContext(new_webdriver(hub_url), accounts),
+        queue_name="x_articles",
+        min_interval=source_interval("x", "MIN", 30),
+        max_interval=source_interval("x", "MAX", 300),
+    )
+
+SOURCES: Dict[str, Callable[[], Optional[ScraperSource]]] = {
+    "tradingview": tradingview_source,
+    "investing": investing_source,
+    "x": x_source,
+}
+
+async def run_sources(sources: List[ScraperSource]):
+    loop = asyncio.get_running_loop()
+    thread_stop = threading.Event()
+    loop_stop = asyncio.Event()
+
+    def _stop(signum, frame):
+        SingletonLoggerSafe.info(f"Gracefully shutting down for signal {signum}")
+        thread_stop.set()
+        loop.call_soon_threadsafe(loop_stop.set)
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    codec = default_codecs().get(os.getenv("ARTICLE_CONTENT_TYPE", "application/json"))
+    compressed = os.getenv("ARTICLE_COMPRESS", "0") == "1"
+    # pin to the oldest schema the consumers read while they are being upgraded
+    schema_version = int(os.getenv("ARTICLE_SCHEMA_VERSION", str(ArticlePayload.SCHEMA_VERSION)))
+    # bounded handoff per source, overflow goes to a journal replayed once the publisher catches up
+    queue_size = int(os.getenv("SCRAPER_QUEUE_SIZE", str(DEFAULT_QUEUE_SIZE)))
+    put_timeout = float(os.getenv("SCRAPER_PUT_TIMEOUT", str(DEFAULT_PUT_TIMEOUT)))
+    spill_dir = os.getenv("SCRAPER_SPILL_DIR", "output/spill")
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        start_metrics_server(int(metrics_port))
+    mq = MQConnectionManager.from_env()
+    await mq.connect(MQ_CONNECT_TIMEOUT)
+    threads, queues = [], []
+    for source in sources:
+        await SingletonLoggerSafe.ainfo(
+            f"Starting source {source['name']} -> {source['queue_name']}, "
+            f"scan every {source['min_interval']:.0f}-{source['max_interval']:.0f}s")
+        message_queue = SpillQueue(
+            loop,
+            os.path.join(spill_dir, f"{source['queue_name']}.db"),
+            encode=ArticlePayload.to_json,
+            decode=ArticlePayload.from_json,
+            maxsize=queue_size,
+            put_timeout=put_timeout,
+            metrics=HandoffMetrics(source["queue_name"], enabled=bool(metrics_port)))
+        asyncio.create_task(
+            article_publisher(mq, source["queue_name"], message_queue, loop_stop, codec, compressed, schema_version))
+        thread = threading.Thread(
+            target=scraper_worker,
+            name=f"scraper-{source['name']}",
+            args=(message_queue, thread_stop, source["context"]()),
+            kwargs={
+                "name": source["name"],
+                "min_interval": source["min_interval"],
+                "max_interval": source["max_interval"],
+            })
+        thread.start()
+        threads.append(thread)
+        queues.append(message_queue)
+
+    def _reconnected():
+        spilled = sum(len(message_queue.journal) for message_queue in queues)
+        SingletonLoggerSafe.info(f"Publishing resumes, {spilled} spilled articles to replay")
+    mq.on_reconnect(_reconnected)
+
+    await loop_stop.wait()
+
+    await SingletonLoggerSafe.ainfo("Shutting down, waiting for queues to drain")
+    for message_queue in queues:
+        await message_queue.join()
+
+    await SingletonLoggerSafe.ainfo("Shutting down RabbitMQ connection")
+    await mq.release()
+
+    await SingletonLoggerSafe.ainfo("Shutting down scraper threads")
+    # off the loop, a thread may still be handing over its last article
+    for thread in threads:
+        await asyncio.to_thread(thread.join, 5)
+    for message_queue in queues:
+        message_queue.close()
+
+async def main():
+    SingletonLoggerSafe("output/scraper_runtime.log")
+    names = [name.strip() for name in os.getenv("SCRAPER_SOURCES", "tradingview").split(",") if name.strip()]
+    sources = []
+    for name in names:
+        if name not in SOURCES:
+            await SingletonLoggerSafe.aerror(f"Unknown scraper source {name}, known: {', '.join(SOURCES)}")
+            return
+        source = SOURCES[name]()
+        if source is not None:
+            sources.append(source)
+    if not sources:
+        await SingletonLoggerSafe.aerror("No scraper source to run")
+        return
+    await run_sources(sources)
+
+if __name__ == "__main__":
+    asyncio.run(main())
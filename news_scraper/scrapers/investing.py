@@ -0,0 +1,102 @@
+from typing import List, Optional
+from selenium.webdriver.common.by  import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support    import expected_conditions as EC
+from selenium.webdriver import Remote as RemoteWebDriver
+from common.logger import SingletonLoggerSafe
+from common.interface import NewsScraper, ScraperContext
+from common.utils import cached_fetcher
+from common.dedup_store import dedup_store_from_env, normalize_url
+from common.html_archive import HtmlArchive, html_archive_from_env
+from common.html_extract import extract_article, INVESTING_RULE
+from common.card_extract import CardField, extract_cards
+from news_model.message import ArticlePayload
+
+HEADLINES_URL = "https://au.investing.com/news/headlines"
+HEADLINE_SELECTOR = ".inline-block"
+HEADLINE_FIELDS = {
+    "href": CardField(attribute="href"),
+    "title": CardField(),
+}
+
+class InvestingScraper(NewsScraper):
+    def __init__(
+            self,
+            driver: RemoteWebDriver = None,
+            driver_timeout: int = 60,
+            archive: Optional[HtmlArchive] = None):
+        self.driver = driver
+        self.driver_timeout = driver_timeout
+        self.archive = archive
+
+    def login(self) -> bool:
+        # headlines are public
+        return self.driver is not None
+
+    def fetch_news(self, limit=5) -> List[ArticlePayload]:
+        SingletonLoggerSafe.section("Starting new scan(au.investing.com)")
+        count = 0
+        try:
+            self.driver.get(HEADLINES_URL)
+
+            # wait page to load
+            WebDriverWait(self.driver, self.driver_timeout).until(
+                EC.text_to_be_present_in_element(
+                    (By.CSS_SELECTOR, "h1.text-xl\\/7.sm\\:text-3xl\\/8.font-bold"),
+                    "Breaking News"
+                )
+            )
+
+            cards = [
+                (card["href"], card["title"] or "")
+                for card in extract_cards(self.driver, HEADLINE_SELECTOR, HEADLINE_FIELDS)
+                if card["href"]]
+
+            for link, title in cards[:limit]:
+                article = self._process_html(link, title)
+                if article:
+                    yield article
+                    count += 1
+
+        except Exception as e:
+            self.driver.save_screenshot(f"output/investing_error.png")
+            SingletonLoggerSafe.error(f"An error occurred when reading new messages: {e}")
+        finally:
+            SingletonLoggerSafe.info(f"Scraped {count} articles.")
+
+    def _extract_article(self, html_text) -> ArticlePayload:
+        return extract_article(html_text, INVESTING_RULE)
+
+    @cached_fetcher(20, key=lambda self, link, title: normalize_url(link), store=dedup_store_from_env)
+    def _process_html(self, link: str, title: str) -> Optional[ArticlePayload]:
+        SingletonLoggerSafe.info(f"Reading new article.")
+        SingletonLoggerSafe.info(f"title: {title}\nlink: {link}\n")
+        try:
+            self.driver.get(link)
+            WebDriverWait(self.driver, 15).until(
+                EC.presence_of_element_located((By.ID, "articleTitle")))
+
+            html_content = self.driver.page_source
+            if self.archive is not None:
+                self.archive.put(link, html_content, title)
+
+            return self._extract_article(html_content)
+        except Exception as e:
+            SingletonLoggerSafe.error(f"Failed to read article: {e}")
+
+
+class IVScraperContext(ScraperContext):
+    def __init__(self, driver: RemoteWebDriver):
+        self.driver = driver
+        self.archive = html_archive_from_env()
+
+    def __enter__(self) -> InvestingScraper:
+        return InvestingScraper(driver = self.driver, archive = self.archive)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.archive:
+            self.archive.close()
+            self.archive = None
+        if self.driver:
+            self.driver.quit()
+        self.driver = None
@@ -1,31 +1,56 @@
 import asyncio
-import aio_pika
 import json
+from datetime import datetime, timezone
 from common.logger import SingletonLoggerSafe
+from common.codec import Codec, JsonCodec, encode_message
+from common.mq_connection import MQConnectionManager
+from common.spill_queue import SpillQueue
 from news_model.message import ArticlePayload
 
-async def article_publisher(mq_channel: aio_pika.channel.Channel, mq_name: str, in_queue: asyncio.Queue, stop_event:asyncio.Event):
-    await mq_channel.declare_queue(mq_name, durable=True)
+async def article_publisher(
+        mq: MQConnectionManager,
+        mq_name: str,
+        in_queue: SpillQueue,
+        stop_event:asyncio.Event,
+        codec: Codec = JsonCodec(),
+        compressed: bool = False,
+        schema_version: int = ArticlePayload.SCHEMA_VERSION):
+    async with mq.publish_channel() as channel:
+        await channel.declare_queue(mq_name, durable=True)
     while not (stop_event.is_set() and in_queue.empty()): # break when stop_event is set and in_queue is empty, allow queue to drain
-        try:
-            article = await asyncio.wait_for(in_queue.get(), timeout=1)
-        except asyncio.TimeoutError:
+        article = await in_queue.get(timeout=1)
+        if article is None:
             continue
         if article:
             try:
                 await SingletonLoggerSafe.ainfo(f"Publishing article: {article.title}")
-                await mq_channel.default_exchange.publish(
-                    aio_pika.Message(body=article.to_json().encode()),
-                    routing_key=mq_name
-                )
-            except aio_pika.exceptions.AMQPError as e:
-                await SingletonLoggerSafe.aerror(f"Queue error: {e}")
-                await in_queue.put(article)
-                break
+                if not article.content_hash:
+                    await asyncio.to_thread(article.fingerprint)
+                if not mq.healthy:
+                    # spilled below, the journal is replayed once the connection is back
+                    raise ConnectionError("RabbitMQ connection is down")
+                async with mq.publish_channel() as channel:
+                    await channel.default_exchange.publish(
+                        encode_message(
+                            article.to_dict(schema_version),
+                            codec,
+                            compressed=compressed,
+                            schema_version=schema_version,
+                            timestamp=datetime.now(timezone.utc)),
+                        routing_key=mq_name
+                    )
             except Exception as e:
-                await SingletonLoggerSafe.aerror(f"Failed to publish article: {e}, return to queue")
-                await asyncio.sleep(5)
-                await in_queue.put(article)
+                # the robust channel reconnects, the journal keeps the article until then
+                await SingletonLoggerSafe.aerror(f"Failed to publish article: {e}, spilled for replay")
+                await asyncio.to_thread(in_queue.spill, article, "publish_failed")
+                if not stop_event.is_set():
+                    # back off until the connection is restored, at most 5s between attempts
+                    try:
+                        await asyncio.wait_for(mq.connected.wait(), timeout=5)
+                    except asyncio.TimeoutError:
+                        pass
+                    if mq.healthy:
+                        await asyncio.sleep(1)
             finally:
                 in_queue.task_done()
             
\ No newline at end of file
@@ -1,31 +1,45 @@
-import asyncio
+import os
 import threading
 import time
 from common.logger import SingletonLoggerSafe
 from common.interface import ScraperContext
+from common.adaptive_interval import AdaptiveInterval
+from common.spill_queue import SpillQueue
 
 LOGIN_RETRY_TIMEOUT = 60
-SCRAPE_INTERVAL = 10
+SCRAPE_MIN_INTERVAL = float(os.getenv("SCRAPE_MIN_INTERVAL", "5"))
+SCRAPE_MAX_INTERVAL = float(os.getenv("SCRAPE_MAX_INTERVAL", "60"))
 def scraper_worker(
-    loop: asyncio.AbstractEventLoop,
-    message_queue: asyncio.Queue,
+    message_queue: SpillQueue,
     stop_event: threading.Event,
-    context: ScraperContext):
+    context: ScraperContext,
+    name: str = "tradingview",
+    min_interval: float = SCRAPE_MIN_INTERVAL,
+    max_interval: float = SCRAPE_MAX_INTERVAL):
 
     with context as scraper:
         giveup_time = time.time() + LOGIN_RETRY_TIMEOUT
         while not scraper.login():
-            SingletonLoggerSafe.error("tradingview login failed. Retrying...")
+            SingletonLoggerSafe.error(f"{name} login failed. Retrying...")
             if time.time() > giveup_time:
-                SingletonLoggerSafe.error("tradingview login failed. Give up.")
+                SingletonLoggerSafe.error(f"{name} login failed. Give up.")
                 return
             stop_event.wait(5)
 
-        # fetch news every SCRAPE_INTERVAL seconds unless stop_event is set
-        while not stop_event.wait(SCRAPE_INTERVAL):
+        # poll faster while news arrives, back off when it is quiet, unless stop_event is set
+        interval = AdaptiveInterval(min_interval, max_interval)
+        last_poll = time.monotonic()
+        while not stop_event.wait(interval.interval):
+            new_articles = 0
             try:
                 for article in scraper.fetch_news(limit=5):
                     if article:
-                        asyncio.run_coroutine_threadsafe(message_queue.put(article), loop)
+                        # blocks while the publisher is behind, spills when it stays behind
+                        message_queue.put(article)
+                        new_articles += 1
             except Exception as e:
-                SingletonLoggerSafe.error(f"Failed to fetch news: {e}")
\ No newline at end of file
+                SingletonLoggerSafe.error(f"[{name}] Failed to fetch news: {e}")
+            now = time.monotonic()
+            interval.update(new_articles, now - last_poll)
+            last_poll = now
+            SingletonLoggerSafe.info(f"[{name}] {new_articles} new articles, next scan in {interval.interval:.0f}s")
@@ -1,10 +1,11 @@
 import os
 import traceback
 import pickle
-import re
 
-from typing import List, Optional
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 from selenium.webdriver.common.by  import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support    import expected_conditions as EC
@@ -13,8 +14,48 @@ from selenium.webdriver.chrome.options import Options
 from common.logger import SingletonLoggerSafe
 from common.interface import NewsScraper, ScraperContext
 from common.utils import cached_fetcher
+from common.driver_pool import DriverPool
+from common.http_fetcher import HttpPageFetcher
+from common.html_archive import HtmlArchive, html_archive_from_env
+from common.html_extract import extract_article, TRADINGVIEW_RULE
+from common.card_extract import CardField, extract_cards
+from common.dedup_store import dedup_store_from_env, normalize_url
 from news_model.message import ArticlePayload
 
+ARTICLE_BODY_CLASS = "body-KX2tCBZq"
+NEWS_FLOW_URL = "https://www.tradingview.com/news-flow/"
+NEWS_CARD_SELECTOR = ".card-DmjQR0Aa"
+NEWS_CARD_FIELDS = {
+    "href": CardField(attribute="href"),
+    "title": CardField(selector=".title-e7vDzPX4"),
+    # identity and publication time of a card, they place the high-water mark
+    "timestamp": CardField(selector="relative-time", attribute="event-time"),
+    "card_id": CardField(attribute="data-id"),
+}
+MAX_CARD_ATTEMPTS = 3
+
+def card_key(card: Dict[str, Any]) -> str:
+    """Identity of a news card: its id, the normalised link if it has none"""
+    return card.get("card_id") or normalize_url(card["href"])
+
+def card_time(card: Dict[str, Any]) -> Optional[float]:
+    """Publication time of a card in epoch seconds, None if it has none readable"""
+    value = card.get("timestamp")
+    if not value:
+        return None
+    try:
+        number = float(value)
+        return number / 1000 if number > 1e11 else number # epoch milliseconds or seconds
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
 
 class TradingViewScraper(NewsScraper):
     def __init__(
@@ -23,18 +64,37 @@ class TradingViewScraper(NewsScraper):
             password: str,
             driver: RemoteWebDriver = None,
             driver_timeout: int = 20,
-            cookies_path="output/trading_view_cookies.pkl"):
+            cookies_path="output/trading_view_cookies.pkl",
+            driver_pool: Optional[DriverPool] = None,
+            http_fetcher: Optional[HttpPageFetcher] = None,
+            archive: Optional[HtmlArchive] = None):
         self.username = username
         self.password = password
         self.cookies_path = cookies_path
         self.driver = driver
         self.driver_timeout = driver_timeout
-        self.output_dir = "output/trading_view"
-        os.makedirs(self.output_dir, exist_ok=True)
+        # extra grid sessions to read articles in parallel, the listing page stays on driver
+        self.driver_pool = driver_pool
+        # plain HTTP for article pages, the browser is the fallback
+        self.http_fetcher = http_fetcher
+        # newest card already read, cards above it are new
+        self.high_water_mark: Optional[Dict[str, Any]] = None
+        # failed scans of the cards read again
+        self.attempts: Dict[str, int] = {}
+        # raw page snapshots, written in the background
+        self.archive = archive
 
     def login(self) -> bool:
+        logged_in = self._login()
+        if logged_in and self.http_fetcher is not None:
+            # requests go out as the browser session: same cookies, same user agent
+            self.http_fetcher.update_cookies(self.driver.get_cookies())
+            self.http_fetcher.set_user_agent(self.driver.execute_script("return navigator.userAgent"))
+        return logged_in
+
+    def _login(self) -> bool:
         if os.path.exists(self.cookies_path):
-            self.driver.get("https://www.tradingview.com/news-flow/")
+            self.driver.get(NEWS_FLOW_URL)
             try:
                 self._load_cookies()
                 self.driver.refresh()
@@ -53,26 +113,31 @@ class TradingViewScraper(NewsScraper):
         return self._new_login()
 
     def fetch_news(self, limit=5) -> List[ArticlePayload]:
+        """Articles of all cards newer than the last scan; limit caps only the first scan"""
         SingletonLoggerSafe.section("Starting new scan(www.tradingview.com)")
         count = 0
         try:
-            url = 'https://www.tradingview.com/news-flow/'
-            self.driver.get(url)
+            self.driver.get(NEWS_FLOW_URL)
 
             # wait page to load
             WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "card-DmjQR0Aa"))
+                EC.presence_of_element_located((By.CSS_SELECTOR, NEWS_CARD_SELECTOR))
             )
 
-            new_items = self.driver.find_elements(By.CSS_SELECTOR, ".card-DmjQR0Aa")
-            links = [el.get_attribute("href") for el in new_items if el.get_attribute("href")]
-            titles = [el.find_element(By.CSS_SELECTOR, ".title-e7vDzPX4").text for el in new_items]
-                
-            for link, title in zip(links[:limit], titles[:limit]):
-                article = self._process_html(link, title)
+            cards = [
+                card for card in extract_cards(self.driver, NEWS_CARD_SELECTOR, NEWS_CARD_FIELDS)
+                if card["href"]]
+            new_cards = self._new_cards(cards, limit)
+
+            failed = []
+            for card, article in self._process_cards(new_cards):
                 if article:
                     yield article
                     count += 1
+                elif not self._process_html.processed(self, card["href"], card["title"] or ""):
+                    failed.append(card)
+            # articles are handed on before the mark moves past their cards
+            self._advance_mark(new_cards, failed)
 
         except Exception as e:
             self.driver.save_screenshot(f"output/investing_error.png")
@@ -80,6 +145,74 @@ class TradingViewScraper(NewsScraper):
         finally:
             SingletonLoggerSafe.info(f"Scraped {count} articles.")
 
+    def _new_cards(self, cards, limit):
+        """Cards (newest first) above the high-water mark"""
+        if not cards:
+            return []
+        if self.high_water_mark is None:
+            return cards[:limit]
+        keys = [card_key(card) for card in cards]
+        if card_key(self.high_water_mark) in keys:
+            return cards[:keys.index(card_key(self.high_water_mark))]
+        mark_time = card_time(self.high_water_mark)
+        if mark_time is not None:
+            SingletonLoggerSafe.info("Last seen card is off the page, reading the cards published after it")
+            return [card for card in cards if (card_time(card) or mark_time + 1) > mark_time]
+        SingletonLoggerSafe.info("Last seen card is off the page, reading all cards")
+        return cards
+
+    def _advance_mark(self, new_cards, failed):
+        """Move the mark to the newest card read, but below the oldest failed card, so
+        failed cards are new again on the next scan. A card failing MAX_CARD_ATTEMPTS
+        scans is given up."""
+        failed_keys = set()
+        attempts = {}
+        for card in failed:
+            key = card_key(card)
+            attempts[key] = self.attempts.get(key, 0) + 1
+            if attempts[key] < MAX_CARD_ATTEMPTS:
+                failed_keys.add(key)
+            else:
+                SingletonLoggerSafe.error(f"Giving up on {card['href']} after {attempts[key]} attempts")
+        self.attempts = {key: count for key, count in attempts.items() if key in failed_keys}
+        if not new_cards:
+            return
+        keys = [card_key(card) for card in new_cards]
+        if not failed_keys:
+            self.high_water_mark = new_cards[0]
+            return
+        oldest_failed = max(keys.index(key) for key in failed_keys)
+        if oldest_failed + 1 < len(new_cards):
+            self.high_water_mark = new_cards[oldest_failed + 1]
+        # otherwise the mark stays, every card above it is read again; those read
+        # already are skipped by the dedup store
+
+    def _process_cards(self, cards):
+        """(card, article or None) for every card"""
+        if self.driver_pool is None:
+            for card in cards:
+                yield card, self._process_html(card["href"], card["title"] or "")
+            return
+        # browser fallbacks are bounded by the driver pool, HTTP fetches by the client pool
+        workers = max(self.driver_pool.size, self.http_fetcher.max_connections if self.http_fetcher else 0)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self._process_html, card["href"], card["title"] or ""): card
+                for card in cards}
+            for future in as_completed(futures):
+                try:
+                    article = future.result()
+                except Exception as e:
+                    SingletonLoggerSafe.error(f"Failed to read article: {e}")
+                    article = None
+                yield futures[future], article
+
+    def share_login(self, driver: RemoteWebDriver):
+        """Log a pool session in with the cookies of the main session"""
+        driver.get(NEWS_FLOW_URL)
+        for cookie in self.driver.get_cookies():
+            driver.add_cookie(cookie)
+
     def _save_cookies(self):
         with open(self.cookies_path, "wb") as file:
             pickle.dump(self.driver.get_cookies(), file)
@@ -90,10 +223,6 @@ class TradingViewScraper(NewsScraper):
             for cookie in cookies:
                 self.driver.add_cookie(cookie)
 
-    def _slugify(self, text, max_length=100):
-        text = re.sub(r'[<>:"/\\|?*\s,\.]', '_', text.strip("'"))
-        return text[:max_length]
-    
     def _new_login(self) -> bool:
         wait = WebDriverWait(self.driver, self.driver_timeout)
         self.driver.get("https://www.tradingview.com/#signin")
@@ -133,34 +262,39 @@ class TradingViewScraper(NewsScraper):
 
 
     def _extract_article(self, html_text) -> ArticlePayload:
-        soup = BeautifulSoup(html_text, 'html.parser')
-        title = soup.find('h1', class_='title-KX2tCBZq')
-        content = soup.find('div', class_='body-KX2tCBZq')
-        return ArticlePayload(
-            title=title.text.strip() if title else "No Title",
-            content="\n".join(p.get_text(strip=True) for p in content.find_all('p')) if content else "No Content"
-        )
-
-    @cached_fetcher(20)
+        return extract_article(html_text, TRADINGVIEW_RULE)
+
+    def _fetch_http(self, link: str) -> Optional[str]:
+        if self.http_fetcher is None:
+            return None
+        html_content = self.http_fetcher.fetch(link)
+        if html_content and ARTICLE_BODY_CLASS in html_content:
+            return html_content
+        SingletonLoggerSafe.info(f"No article body over HTTP, falling back to browser: {link}")
+        return None
+
+    def _fetch_browser(self, link: str) -> str:
+        if self.driver_pool is None:
+            return self._render(self.driver, link)
+        with self.driver_pool.lease(timeout=60) as driver:
+            return self._render(driver, link)
+
+    def _render(self, driver: RemoteWebDriver, link: str) -> str:
+        driver.get(link)
+        WebDriverWait(driver, 5).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, f".{ARTICLE_BODY_CLASS}")))
+        return driver.page_source
+
+    @cached_fetcher(20, key=lambda self, link, title: normalize_url(link), store=dedup_store_from_env)
     def _process_html(self, link: str, title: str) -> ArticlePayload:
 
         SingletonLoggerSafe.info(f"Reading new article.")
         SingletonLoggerSafe.info(f"title: {title}\nlink: {link}\n")
         try:
-            self.driver.get(link)
-            WebDriverWait(self.driver, 5).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".body-KX2tCBZq")))
-
-            # Save page HTML to file
-            fname = self._slugify(title)
-            html_path = f"{self.output_dir}/{fname}.html"
-            html_content = self.driver.page_source
-            
-            # Save to file 
-            with open(html_path, "w", encoding="utf-8") as f:
-                f.write(html_content)
-            SingletonLoggerSafe.info(f"Saved HTML to {html_path}")
-            
+            html_content = self._fetch_http(link) or self._fetch_browser(link)
+            if self.archive is not None:
+                self.archive.put(link, html_content, title)
+
             article = self._extract_article(html_content)
             return article
         except Exception as e:
@@ -168,18 +302,46 @@ class TradingViewScraper(NewsScraper):
 
 
 class TVScraperContext(ScraperContext):
-    def __init__(self, driver: RemoteWebDriver, username: str, password: str):
+    def __init__(
+            self,
+            driver: RemoteWebDriver,
+            username: str,
+            password: str,
+            driver_factory=None,
+            sessions: int = 0,
+            http_fetch: bool = False):
         self.driver = driver
         self.username = username
         self.password = password
+        self.driver_factory = driver_factory
+        self.sessions = sessions
+        self.driver_pool = None
+        self.http_fetcher = HttpPageFetcher() if http_fetch else None
+        self.archive = html_archive_from_env()
     
     def __enter__(self) -> TradingViewScraper:
-        return TradingViewScraper(
+        scraper = TradingViewScraper(
             driver = self.driver,
             username = self.username,
-            password = self.password)
+            password = self.password,
+            http_fetcher = self.http_fetcher,
+            archive = self.archive)
+        if self.driver_factory is not None and self.sessions > 0:
+            # sessions copy the cookies of the main one, which logs in before fetching
+            self.driver_pool = DriverPool(self.driver_factory, self.sessions, prepare=scraper.share_login)
+            scraper.driver_pool = self.driver_pool
+        return scraper
     
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.archive:
+            self.archive.close()
+            self.archive = None
+        if self.http_fetcher:
+            self.http_fetcher.close()
+            self.http_fetcher = None
+        if self.driver_pool:
+            self.driver_pool.close()
+            self.driver_pool = None
         if self.driver:
             self.driver.quit()
         self.driver = None
\ No newline at end of file
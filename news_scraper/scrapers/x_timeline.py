@@ -0,0 +1,190 @@
+import os
+import re
+import json
+import pickle
+import time
+from typing import Dict, List, Optional, Tuple
+from selenium.webdriver.common.by  import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support    import expected_conditions as EC
+from selenium.webdriver import Remote as RemoteWebDriver
+from common.logger import SingletonLoggerSafe
+from common.interface import NewsScraper, ScraperContext
+from common.card_extract import CardField, extract_cards
+from news_model.message import ArticlePayload
+
+TWEET_SELECTOR = "article[data-testid='tweet']"
+TWEET_FIELDS = {
+    "href": CardField(selector="a[href*='/status/']:has(time)", attribute="href"),
+    "datetime": CardField(selector="time", attribute="datetime"),
+    "text": CardField(selector="[data-testid='tweetText']"),
+    "social_context": CardField(selector="[data-testid='socialContext']"),
+    "card_text": CardField(),
+}
+STATUS_ID = re.compile(r"/status/(\d+)")
+
+def tweet_id(href: Optional[str]) -> Optional[int]:
+    match = STATUS_ID.search(href or "")
+    return int(match.group(1)) if match else None
+
+class XTimelineScraper(NewsScraper):
+    """Watches the timelines of several accounts in one browser session.
+
+    The newest tweet id read from each account (its since-id) is kept in a cursor file;
+    a scan scrolls an account only until it reaches that id, so a quiet account costs one
+    page load and one card read. The first scan of an account reads its newest limit tweets.
+    """
+    def __init__(
+            self,
+            accounts: List[str],
+            driver: RemoteWebDriver = None,
+            cookies_path: str = "output/x_cookies.pkl",
+            cursor_path: str = "output/x_since_ids.json",
+            max_scrolls: int = 10,
+            scroll_pause: float = 1):
+        self.accounts = accounts
+        self.driver = driver
+        self.cookies_path = cookies_path
+        self.cursor_path = cursor_path
+        self.max_scrolls = max_scrolls
+        self.scroll_pause = scroll_pause
+        self.since_ids: Dict[str, int] = self._load_cursor()
+
+    def _load_cursor(self) -> Dict[str, int]:
+        try:
+            with open(self.cursor_path, "r", encoding="utf-8") as f:
+                return {account: int(since_id) for account, since_id in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except (ValueError, AttributeError) as e:
+            SingletonLoggerSafe.error(f"Ignoring unreadable cursor file {self.cursor_path}: {e}")
+            return {}
+
+    def _save_cursor(self):
+        if os.path.dirname(self.cursor_path):
+            os.makedirs(os.path.dirname(self.cursor_path), exist_ok=True)
+        tmp_path = f"{self.cursor_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({account: str(since_id) for account, since_id in self.since_ids.items()}, f)
+        os.replace(tmp_path, self.cursor_path)
+
+    def _wait_for_tweets(self, timeout: int = 15) -> bool:
+        try:
+            WebDriverWait(self.driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, TWEET_SELECTOR)))
+            return True
+        except Exception:
+            return False
+
+    def login(self) -> bool:
+        self.driver.get("https://x.com/login")
+        if os.path.exists(self.cookies_path):
+            try:
+                with open(self.cookies_path, "rb") as file:
+                    for cookie in pickle.load(file):
+                        self.driver.add_cookie(cookie)
+                self.driver.get("https://x.com/home")
+                if self._wait_for_tweets():
+                    SingletonLoggerSafe.info("Logged in using saved cookies.")
+                    return True
+            except Exception as e:
+                SingletonLoggerSafe.error(f"Failed to login with cookies: {e}")
+
+        # no credentials flow, wait for the login to be completed in the session
+        SingletonLoggerSafe.info("Waiting for a manual login on the grid session...")
+        try:
+            WebDriverWait(self.driver, 60).until(lambda d: "home" in d.current_url)
+        except Exception:
+            SingletonLoggerSafe.error("Login timeout")
+            return False
+        with open(self.cookies_path, "wb") as file:
+            pickle.dump(self.driver.get_cookies(), file)
+        SingletonLoggerSafe.info("Logged in successfully.")
+        return True
+
+    def fetch_news(self, limit=5) -> List[ArticlePayload]:
+        SingletonLoggerSafe.section(f"Starting new scan(x.com) of {len(self.accounts)} accounts")
+        count = 0
+        for account in self.accounts:
+            try:
+                articles, newest_id = self._scan_account(account, limit)
+                for article in articles:
+                    yield article
+                    count += 1
+                # every article is queued by now, a crash before this reads them again
+                if newest_id is not None:
+                    self.since_ids[account] = newest_id
+                    self._save_cursor()
+            except Exception as e:
+                SingletonLoggerSafe.error(f"An error occurred when reading @{account}: {e}")
+        SingletonLoggerSafe.info(f"Scraped {count} tweets.")
+
+    def _scan_account(self, account: str, limit: int) -> Tuple[List[ArticlePayload], Optional[int]]:
+        """Tweets of account newer than its since-id, newest first, and the newest id read"""
+        self.driver.get(f"https://x.com/{account}")
+        if not self._wait_for_tweets():
+            SingletonLoggerSafe.info(f"No tweets loaded for @{account}")
+            return [], None
+
+        since_id = self.since_ids.get(account)
+        tweets: Dict[int, dict] = {}
+        reached = False
+        for scroll in range(self.max_scrolls + 1):
+            before = len(tweets)
+            # the timeline is virtualised, cards scrolled past are dropped from the DOM
+            for card in extract_cards(self.driver, TWEET_SELECTOR, TWEET_FIELDS):
+                if "pinned" in (card["social_context"] or "").lower():
+                    continue
+                status_id = tweet_id(card["href"])
+                if status_id is None:
+                    continue
+                if since_id is not None and status_id <= since_id:
+                    reached = True
+                    continue
+                tweets.setdefault(status_id, card)
+            if reached or (since_id is None and len(tweets) >= limit):
+                break
+            if scroll > 0 and len(tweets) == before:
+                break # nothing more loads
+            self.driver.execute_script("window.scrollBy(0, window.innerHeight * 2);")
+            time.sleep(self.scroll_pause)
+        if since_id is not None and not reached:
+            # the cursor still moves on, reading the same tweets again next scan would not close the gap
+            SingletonLoggerSafe.error(
+                f"@{account}: scan stopped before reaching tweet {since_id}, "
+                f"new tweets older than {min(tweets) if tweets else since_id} are missed")
+
+        newest = sorted(tweets, reverse=True)
+        if since_id is None:
+            newest = newest[:limit]
+
+        articles = []
+        for status_id in newest:
+            card = tweets[status_id]
+            if "Replying to" in (card["card_text"] or ""):
+                continue
+            text = card["text"] or ""
+            if not text:
+                continue
+            article = ArticlePayload(
+                title=f"@{account}: {text.splitlines()[0][:120]}",
+                content=text)
+            if card["datetime"]:
+                article.time = card["datetime"].replace(".000Z", "+00:00")
+            articles.append(article)
+        SingletonLoggerSafe.info(f"@{account}: {len(articles)} new tweets")
+        return articles, max(tweets) if tweets else None
+
+
+class XScraperContext(ScraperContext):
+    def __init__(self, driver: RemoteWebDriver, accounts: List[str]):
+        self.driver = driver
+        self.accounts = accounts
+
+    def __enter__(self) -> XTimelineScraper:
+        return XTimelineScraper(accounts = self.accounts, driver = self.driver)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.driver:
+            self.driver.quit()
+        self.driver = None
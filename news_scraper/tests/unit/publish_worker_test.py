@@ -0,0 +1,58 @@
+import asyncio
+import json
+import pytest
+from unittest import mock
+from unittest.mock import AsyncMock, MagicMock
+from common.mq_connection import MQConnectionManager
+from common.spill_queue import SpillQueue
+from news_model.message import ArticlePayload
+from news_scraper.scrapers.publish_worker import article_publisher
+
+async def connected_manager():
+    connection = AsyncMock()
+    connection.is_closed = False
+    connection.reconnect_callbacks = MagicMock()
+    connection.close_callbacks = MagicMock()
+    manager = MQConnectionManager("localhost", "guest", "guest")
+    with mock.patch("common.mq_connection.aio_pika.connect_robust", return_value=connection):
+        await manager.connect()
+    return manager, connection
+
+def published_titles(connection):
+    channel = connection.channel.return_value
+    return [json.loads(call.args[0].body)["title"] for call in channel.default_exchange.publish.await_args_list]
+
+@pytest.mark.asyncio
+async def test_articles_wait_in_the_journal_while_disconnected(tmp_path):
+    manager, connection = await connected_manager()
+    queue = SpillQueue(
+        asyncio.get_running_loop(), str(tmp_path / "spill.db"),
+        encode=ArticlePayload.to_json, decode=ArticlePayload.from_json)
+    stop = asyncio.Event()
+    publisher = asyncio.create_task(article_publisher(manager, "tv_articles", queue, stop))
+
+    await asyncio.to_thread(queue.put, ArticlePayload(title="first"))
+    await asyncio.wait_for(queue.join(), timeout=5)
+    assert published_titles(connection) == ["first"]
+
+    manager._on_close(connection, ConnectionResetError("lost"))
+    assert not manager.healthy
+    await asyncio.to_thread(queue.put, ArticlePayload(title="second"))
+    while len(queue.journal) == 0:
+        await asyncio.sleep(0.01)
+    # not sent into a dead connection, kept for replay
+    assert published_titles(connection) == ["first"]
+    assert len(queue.journal) == 1
+
+    manager._on_reconnect(connection)
+    for _ in range(500):
+        if len(published_titles(connection)) == 2:
+            break
+        await asyncio.sleep(0.01)
+    assert published_titles(connection) == ["first", "second"]
+    assert len(queue.journal) == 0
+    stop.set()
+    await asyncio.wait_for(publisher, timeout=5)
+    # one pooled channel served the declare and every publish
+    connection.channel.assert_awaited_once()
+    queue.close()
@@ -0,0 +1,92 @@
+import shutil
+import pathlib
+import pytest
+from unittest import mock
+from selenium.webdriver.support.ui import WebDriverWait
+from news_scraper import replay
+from news_scraper.scrapers import trade_view
+
+CORPUS = pathlib.Path(__file__).parents[3] / "common" / "tests" / "unit" / "html_corpus"
+# a TradingView news flow and an X timeline
+LISTINGS = pathlib.Path(__file__).parent / "replay_corpus"
+REPORT_KEYS = {
+    "pages", "failures", "seconds", "pages_per_sec",
+    "p50_ms", "p90_ms", "p99_ms", "mem_per_page_kb", "mem_max_kb"}
+
+@pytest.fixture
+def pages_dir(tmp_path):
+    for page in CORPUS.glob("*.html"):
+        shutil.copy(page, tmp_path / page.name)
+    # a TradingView page without an article body, and a page of no known site
+    (tmp_path / "tv").mkdir()
+    (tmp_path / "tv" / "broken.html").write_text('<html><body><h1 class="title-KX2tCBZq">Gone</h1></body></html>')
+    (tmp_path / "unknown.html").write_text("<html><body><p>hello</p></body></html>")
+    shutil.copytree(LISTINGS, tmp_path / "listings")
+    return tmp_path
+
+@pytest.mark.parametrize("mode", ["extract", "scraper"])
+def test_run_reports_per_site(pages_dir, mode, monkeypatch):
+    # the broken page would wait out the render timeout
+    monkeypatch.setattr(trade_view, "WebDriverWait", lambda driver, timeout: WebDriverWait(driver, 0.1))
+    reports = replay.run(str(pages_dir), mode)
+
+    assert set(reports) == {"investing", "tradingview"}
+    for report in reports.values():
+        assert set(report) == REPORT_KEYS
+    assert reports["investing"]["pages"] == 1
+    assert reports["investing"]["failures"] == 0
+    assert reports["tradingview"]["pages"] == 2
+    assert reports["tradingview"]["failures"] == 1
+
+def test_run_repeats_and_limits(pages_dir):
+    reports = replay.run(str(pages_dir), "extract", site="tradingview", limit=1, repeat=3)
+    assert list(reports) == ["tradingview"]
+    assert reports["tradingview"]["pages"] == 3
+
+def test_http_mode_closes_its_fetcher(pages_dir, monkeypatch):
+    # the broken page falls back to the browser, which waits out the render timeout
+    monkeypatch.setattr(trade_view, "WebDriverWait", lambda driver, timeout: WebDriverWait(driver, 0.1))
+    with mock.patch.object(replay.HttpPageFetcher, "close", autospec=True) as close:
+        reports = replay.run(str(pages_dir), "http")
+    # investing has no HTTP path
+    assert list(reports) == ["tradingview"]
+    assert reports["tradingview"]["pages"] == 2
+    close.assert_called_once()
+
+def test_listings_run_through_the_listing_paths(pages_dir, monkeypatch):
+    monkeypatch.setattr(trade_view, "WebDriverWait", lambda driver, timeout: WebDriverWait(driver, 0.1))
+    reports = replay.run(str(pages_dir), "listing")
+
+    assert set(reports) == {"tradingview", "x"}
+    assert reports["tradingview"]["pages"] == 1
+    assert reports["x"]["pages"] == 1
+    assert reports["tradingview"]["failures"] == 0
+    assert reports["x"]["failures"] == 0
+
+def test_news_flow_cards_are_read_from_the_saved_pages(pages_dir):
+    pages = replay.load_pages(str(pages_dir), "tradingview", listings=True)
+    listing = next(page for page in pages if page.listing)
+    articles = replay.listing_processor("tradingview", pages)(listing)
+    # the second card links to a page that was not saved
+    assert [article.title for article in articles] == ["Fed holds rates steady as inflation cools"]
+
+def test_timeline_is_scanned_from_the_recorded_dom(pages_dir):
+    pages = replay.load_pages(str(pages_dir), "x", listings=True)
+    assert [(page.site, page.listing) for page in pages] == [("x", True)]
+    articles = replay.listing_processor("x", pages)(pages[0])
+    # newest first, without the pinned tweet and the reply
+    assert [article.content for article in articles] == [
+        "Acme raises full-year guidance after record third quarter.",
+        "Q3 results will be published on Oct 18 before the open."]
+    assert articles[0].title.startswith("@acme: Acme raises")
+    assert articles[0].time == "2026-10-18T09:30:00+00:00"
+
+def test_driver_reads_cards_from_the_recorded_dom():
+    html = (LISTINGS / "tradingview" / "news-flow.html").read_text()
+    driver = replay.ReplayWebDriver({trade_view.NEWS_FLOW_URL: html})
+    driver.get(trade_view.NEWS_FLOW_URL)
+    cards = trade_view.extract_cards(driver, trade_view.NEWS_CARD_SELECTOR, trade_view.NEWS_CARD_FIELDS)
+    assert [card["href"] for card in cards] == [
+        "https://www.tradingview.com/news/tradingview_article/",
+        "https://www.tradingview.com/news/removed-story/"]
+    assert trade_view.card_time(cards[0]) == trade_view.card_time({"timestamp": "2026-10-18T09:00:00Z"})
@@ -0,0 +1,103 @@
+import uuid
+import pytest
+from unittest import mock
+from news_model.message import ArticlePayload
+from news_scraper.scrapers.trade_view import MAX_CARD_ATTEMPTS, TradingViewScraper, card_key, card_time
+
+class FakeSite:
+    """News flow page of cards, newest first; article pages fail while listed in failing"""
+    def __init__(self):
+        # links are unique per test, the dedup store is shared by every scraper
+        self.prefix = f"https://www.tradingview.com/news/{uuid.uuid4().hex[:8]}"
+        self.cards = []
+        self.failing = set()
+        self.fetched = []
+
+    def card(self, number: int, timestamp: int = None) -> dict:
+        return {
+            "href": f"{self.prefix}-{number}/",
+            "title": f"news {number}",
+            "card_id": f"tag:{self.prefix}-{number}",
+            "timestamp": str(timestamp if timestamp is not None else 1_700_000_000_000 + number * 1000),
+        }
+
+    def show(self, numbers):
+        self.cards = [self.card(number) for number in sorted(numbers, reverse=True)]
+
+    def fetch(self, link: str) -> str:
+        self.fetched.append(link)
+        if link in self.failing:
+            raise TimeoutError("article did not load")
+        return link
+
+@pytest.fixture
+def site():
+    return FakeSite()
+
+@pytest.fixture
+def scraper(site):
+    driver = mock.MagicMock()
+    driver.execute_script.side_effect = lambda *args: list(site.cards)
+    scraper = TradingViewScraper(username="", password="", driver=driver)
+    scraper._fetch_browser = site.fetch
+    scraper._extract_article = lambda html: ArticlePayload(title=html, content="body")
+    return scraper
+
+def scan(scraper, limit=5):
+    return [article.title for article in scraper.fetch_news(limit)]
+
+def test_first_scan_is_capped_at_limit(scraper, site):
+    site.show(range(1, 9))
+    assert scan(scraper) == [site.card(n)["href"] for n in (8, 7, 6, 5, 4)]
+    assert card_key(scraper.high_water_mark) == site.card(8)["card_id"]
+
+def test_later_scans_read_every_new_card(scraper, site):
+    site.show(range(1, 4))
+    scan(scraper)
+    # more new cards than limit since the last scan
+    site.show(range(1, 12))
+    assert scan(scraper) == [site.card(n)["href"] for n in range(11, 3, -1)]
+    assert scan(scraper) == []
+
+def test_mark_off_the_page_reads_cards_after_it(scraper, site):
+    site.show(range(1, 4))
+    scan(scraper)
+    # the mark (3) and everything older scrolled off
+    site.show(range(10, 20))
+    site.cards.append(site.card(0, timestamp=1_600_000_000_000))
+    assert scan(scraper) == [site.card(n)["href"] for n in range(19, 9, -1)]
+
+def test_failed_card_is_read_again(scraper, site):
+    site.show(range(1, 3))
+    scan(scraper)
+    site.show(range(1, 7))
+    site.failing = {site.card(4)["href"]}
+    assert scan(scraper) == [site.card(n)["href"] for n in (6, 5, 3)]
+    # the mark stays below the failed card
+    assert card_key(scraper.high_water_mark) == site.card(3)["card_id"]
+
+    site.failing = set()
+    site.fetched = []
+    assert scan(scraper) == [site.card(4)["href"]]
+    # cards read already are skipped without a page load
+    assert site.fetched == [site.card(4)["href"]]
+    assert card_key(scraper.high_water_mark) == site.card(6)["card_id"]
+
+def test_card_failing_every_scan_is_given_up(scraper, site):
+    site.show(range(1, 3))
+    scan(scraper)
+    site.show(range(1, 4))
+    site.failing = {site.card(3)["href"]}
+    for _ in range(MAX_CARD_ATTEMPTS):
+        assert scan(scraper) == []
+    assert card_key(scraper.high_water_mark) == site.card(3)["card_id"]
+    site.fetched = []
+    assert scan(scraper) == []
+    assert site.fetched == []
+
+def test_card_time():
+    assert card_time({"timestamp": "1700000000000"}) == 1_700_000_000
+    assert card_time({"timestamp": "2023-11-14T22:13:20Z"}) == 1_700_000_000
+    assert card_time({"timestamp": "Tue, 14 Nov 2023 22:13:20 GMT"}) == 1_700_000_000
+    assert card_time({"timestamp": "an hour ago"}) is None
+    assert card_time({"timestamp": None}) is None
@@ -0,0 +1,91 @@
+import os
+import json
+import pytest
+from unittest import mock
+from news_scraper.scrapers import x_timeline
+from news_scraper.scrapers.x_timeline import XTimelineScraper, tweet_id
+
+def tweet(status_id: int, text: str = None, pinned: bool = False) -> dict:
+    return {
+        "href": f"https://x.com/acme/status/{status_id}",
+        "datetime": "2026-10-18T09:00:00.000Z",
+        "text": text if text is not None else f"tweet {status_id}",
+        "social_context": "Pinned" if pinned else None,
+        "card_text": "",
+    }
+
+@pytest.fixture
+def timeline(monkeypatch):
+    """Screens of tweet cards, one per scroll; the last screen repeats"""
+    screens = []
+    reads = []
+    def extract_cards(driver, selector, fields):
+        reads.append(1)
+        return screens[min(len(reads), len(screens)) - 1]
+    monkeypatch.setattr(x_timeline, "extract_cards", extract_cards)
+    return screens, reads
+
+@pytest.fixture
+def scraper(tmp_path):
+    scraper = XTimelineScraper(
+        ["acme"], driver=mock.MagicMock(), cursor_path=str(tmp_path / "since_ids.json"),
+        max_scrolls=3, scroll_pause=0)
+    scraper._wait_for_tweets = lambda timeout=15: True
+    return scraper
+
+def test_tweet_id():
+    assert tweet_id("https://x.com/acme/status/1849000000000000001") == 1849000000000000001
+    assert tweet_id("https://x.com/acme/status/42/photo/1") == 42
+    assert tweet_id("https://x.com/acme") is None
+    assert tweet_id(None) is None
+
+@pytest.mark.parametrize("content", ["{not json", "[1, 2]", '{"acme": "abc"}'])
+def test_unreadable_cursor_is_ignored(tmp_path, content):
+    path = tmp_path / "since_ids.json"
+    path.write_text(content)
+    assert XTimelineScraper(["acme"], cursor_path=str(path)).since_ids == {}
+
+def test_scroll_stops_at_since_id(scraper, timeline):
+    screens, reads = timeline
+    scraper.since_ids = {"acme": 100}
+    screens += [
+        [tweet(90, pinned=True), tweet(105), tweet(104)],
+        [tweet(103), tweet(102)],
+        [tweet(101), tweet(100), tweet(99)],
+        [tweet(98)],
+    ]
+    articles, newest_id = scraper._scan_account("acme", limit=5)
+    assert [article.content for article in articles] == [f"tweet {n}" for n in (105, 104, 103, 102, 101)]
+    assert newest_id == 105
+    assert len(reads) == 3
+    assert scraper.driver.execute_script.call_count == 2
+
+def test_first_scan_reads_limit_tweets(scraper, timeline):
+    screens, reads = timeline
+    screens += [[tweet(n) for n in range(20, 10, -1)]]
+    articles, newest_id = scraper._scan_account("acme", limit=3)
+    assert [article.content for article in articles] == ["tweet 20", "tweet 19", "tweet 18"]
+    assert newest_id == 20
+    scraper.driver.execute_script.assert_not_called()
+
+def test_max_scrolls_before_since_id(scraper, timeline):
+    screens, reads = timeline
+    scraper.since_ids = {"acme": 1}
+    screens += [[tweet(n), tweet(n - 1)] for n in range(100, 0, -2)]
+    articles, newest_id = scraper._scan_account("acme", limit=5)
+    assert len(reads) == scraper.max_scrolls + 1
+    assert len(articles) == 2 * (scraper.max_scrolls + 1)
+    assert newest_id == 100
+
+def test_cursor_is_saved_after_the_articles_are_taken(scraper, timeline):
+    screens, reads = timeline
+    screens += [[tweet(12), tweet(11)]]
+    news = scraper.fetch_news(limit=5)
+    next(news)
+    next(news)
+    # both articles handed out, the consumer has not come back for more yet
+    assert not os.path.exists(scraper.cursor_path)
+    assert list(news) == []
+    with open(scraper.cursor_path) as f:
+        assert json.load(f) == {"acme": "12"}
+    assert XTimelineScraper(["acme"], cursor_path=scraper.cursor_path).since_ids == {"acme": 12}
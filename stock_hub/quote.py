@@ -4,6 +4,7 @@ import grpc
 import yfinance as yf
 from concurrent import futures
 from proto import stock_hub_pb2, stock_hub_pb2_grpc
+from common.grpc_channels import SERVER_OPTIONS
 from datetime import datetime
 
 # Ensure log directory exists
@@ -48,7 +49,7 @@ class QuoteService(stock_hub_pb2_grpc.StockQuoteServicer):
 
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10), options=SERVER_OPTIONS)
     stock_hub_pb2_grpc.add_StockQuoteServicer_to_server(QuoteService(), server)
     server.add_insecure_port('[::]:50052')
     logger.info("📈 Quote service started on port 50052")